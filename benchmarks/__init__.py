@@ -0,0 +1,5 @@
+from .fake_twitter import FakeTwitterSession
+from .fake_llm import FakeCompletion
+from .synthetic_data import generate_search_results
+
+__all__ = ['FakeTwitterSession', 'FakeCompletion', 'generate_search_results']
@@ -0,0 +1,41 @@
+import time
+from typing import Any, Callable
+
+from flow.base_flow import DEFAULT_KEYWORDS
+
+
+class FakeCompletion:
+    """
+    Drop-in for litellm.completion that never leaves the process
+
+    Delegates to litellm with `mock_response`, so callers get a real
+    ModelResponse (usage included) after an optional simulated latency.
+    """
+
+    def __init__(self, completion: Callable[..., Any], response_text: str = DEFAULT_KEYWORDS,
+                 latency_seconds: float = 0.0):
+        """
+        Args:
+            completion: The real litellm.completion
+            response_text: Content of every mocked reply
+            latency_seconds: Delay added to every call
+        """
+        self.completion = completion
+        self.response_text = response_text
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        kwargs['mock_response'] = self.response_text
+        return self.completion(*args, **kwargs)
+
+    @classmethod
+    def install(cls, **kwargs) -> 'FakeCompletion':
+        """Replace litellm.completion for everything set up afterwards"""
+        import litellm
+        fake = cls(litellm.completion, **kwargs)
+        litellm.completion = fake
+        return fake
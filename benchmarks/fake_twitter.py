@@ -0,0 +1,174 @@
+import re
+import json
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+import numpy as np
+import requests
+
+from .synthetic_data import sample_followers, sample_activity
+
+_TIMELINE_ROUTE = re.compile(r'/2/users/(\d+)/tweets$')
+
+# Tweet ids start here so they look like real snowflake ids
+_FIRST_TWEET_ID = 1_700_000_000_000_000_000
+
+
+class FakeTwitterSession:
+    """
+    In-process stand-in for the requests.Session behind tweepy.Client
+
+    Serves search_recent_tweets, get_users and get_users_tweets from a seeded
+    synthetic universe of `tweets` tweets by `users` authors, with the same
+    heavy-tailed follower and posting distributions as synthetic_data.
+    Every response carries x-rate-limit-* headers; latency and the share of
+    503 responses are configurable.
+    Assign it to `client.session` of a tweepy client.
+    """
+
+    def __init__(
+        self,
+        tweets: int = 10_000,
+        users: int = None,
+        latency_seconds: float = 0.0,
+        latency_jitter_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: int = 1_000_000,
+        timeline_tweets: int = 10,
+        seed: int = 0
+    ):
+        """
+        Args:
+            tweets: Total tweets the search endpoint serves across all queries
+            users: Number of distinct authors (default: tweets / 10)
+            latency_seconds: Base delay added to every response
+            latency_jitter_seconds: Upper bound of extra random delay per response
+            error_rate: Probability that a request fails with 503
+            rate_limit: Value reported in x-rate-limit-limit; remaining counts down from it
+            timeline_tweets: Tweets returned for each user timeline
+            seed: Seed for the synthetic universe and the latency/error draws
+        """
+        self.tweets = tweets
+        self.users = users or max(1, tweets // 10)
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.timeline_tweets = timeline_tweets
+
+        rng = np.random.default_rng(seed)
+        self.followers = sample_followers(rng, self.users)
+        self.tweet_authors = rng.choice(self.users, size=tweets, p=sample_activity(rng, self.users))
+        now = datetime.now(timezone.utc).timestamp()
+        self.tweet_times = (now - rng.uniform(0, 7 * 24 * 3600, size=tweets)).astype(np.int64)
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_tweet = 0
+        self._remaining = rate_limit
+        self.requests_served = 0
+        self.errors_served = 0
+
+    @property
+    def tweets_served(self) -> int:
+        """Search tweets handed out so far (shards may truncate their last page)"""
+        return self._next_tweet
+
+    def _user(self, index: int) -> Dict[str, Any]:
+        return {
+            'id': str(index + 1),
+            'username': f'user{index + 1}',
+            'name': f'User {index + 1}',
+            'verified': index % 50 == 0,
+            'public_metrics': {'followers_count': int(self.followers[index])}
+        }
+
+    def _tweet(self, row: int) -> Dict[str, Any]:
+        return {
+            'id': str(_FIRST_TWEET_ID + row),
+            'author_id': str(int(self.tweet_authors[row]) + 1),
+            'created_at': datetime.fromtimestamp(int(self.tweet_times[row]), timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            'text': f'Synthetic market tweet {row} $SPY',
+            'lang': 'es' if row % 10 == 0 else 'en',
+            'public_metrics': {'retweet_count': row % 7, 'reply_count': row % 3, 'like_count': row % 31, 'quote_count': 0}
+        }
+
+    def _response(self, status: int, body: Dict[str, Any], url: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.reason = 'OK' if status == 200 else 'Service Unavailable'
+        response.url = url
+        response._content = json.dumps(body).encode()
+        response._content_consumed = True
+        with self._lock:
+            self._remaining = max(0, self._remaining - 1)
+            remaining = self._remaining
+        response.headers['content-type'] = 'application/json'
+        response.headers['content-length'] = str(len(response._content))
+        response.headers['x-rate-limit-limit'] = str(self.rate_limit)
+        response.headers['x-rate-limit-remaining'] = str(remaining)
+        response.headers['x-rate-limit-reset'] = str(int(time.time()) + 900)
+        return response
+
+    def _search_page(self, max_results: int) -> Dict[str, Any]:
+        # All queries draw from one shared stream, so shards together serve `tweets` tweets
+        with self._lock:
+            start = self._next_tweet
+            end = min(self.tweets, start + max_results)
+            self._next_tweet = end
+        rows = range(start, end)
+        if not rows:
+            return {'meta': {'result_count': 0}}
+
+        authors = sorted({int(self.tweet_authors[row]) for row in rows})
+        meta = {'result_count': len(rows)}
+        if end < self.tweets:
+            meta['next_token'] = str(end)
+        return {
+            'data': [self._tweet(row) for row in rows],
+            'includes': {'users': [self._user(author) for author in authors]},
+            'meta': meta
+        }
+
+    def _timeline_page(self, user_id: int) -> Dict[str, Any]:
+        now = int(time.time())
+        return {
+            'data': [
+                {
+                    'id': str(_FIRST_TWEET_ID + self.tweets + user_id * self.timeline_tweets + i),
+                    'created_at': datetime.fromtimestamp(now - i * 86400, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                    'text': f'Timeline tweet {i}',
+                    'public_metrics': {'retweet_count': 0, 'reply_count': 0, 'like_count': i, 'quote_count': 0}
+                }
+                for i in range(self.timeline_tweets)
+            ],
+            'meta': {'result_count': self.timeline_tweets}
+        }
+
+    def request(self, method: str, url: str, params: Optional[Dict[str, Any]] = None, json=None,
+                headers=None, auth=None, **kwargs) -> requests.Response:
+        params = params or {}
+        with self._lock:
+            self.requests_served += 1
+            delay = self.latency_seconds + self._random.uniform(0, self.latency_jitter_seconds)
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors_served += 1
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return self._response(503, {'title': 'Service Unavailable', 'detail': 'Injected error'}, url)
+
+        timeline = _TIMELINE_ROUTE.search(url)
+        if timeline:
+            return self._response(200, self._timeline_page(int(timeline.group(1))), url)
+        if url.endswith('/2/users'):
+            ids = [int(user_id) - 1 for user_id in str(params.get('ids', '')).split(',') if user_id]
+            return self._response(200, {'data': [self._user(index) for index in ids if 0 <= index < self.users]}, url)
+        return self._response(200, self._search_page(int(params.get('max_results', 100))), url)
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the flow against the in-process Twitter API stand-in
+
+Runs the flow end-to-end (search, filter, format, save) once per volume,
+each in a fresh process so peak RSS is per run, and prints one JSON
+document with throughput, API latency, stage timings and memory.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --tweets 1000 10000 100000 --latency 0.05 --error-rate 0.01 --output bench.json
+    python -m benchmarks.run --with-llm    # TwitterFinancialFlow with a mocked LLM backend
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from typing import Dict, Any
+
+DEFAULT_VOLUMES = (1_000, 10_000, 100_000)
+
+
+def run_once(volume: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one flow against a fake API serving `volume` tweets and collect its metrics"""
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        return _run_flow(volume, options, scratch_dir)
+
+
+def _run_flow(volume: int, options: Dict[str, Any], scratch_dir: str) -> Dict[str, Any]:
+    # Live caches and crawl state would make runs depend on each other, and the
+    # fake users must never end up in the real profile index
+    os.environ.setdefault('TWITTER_BEARER_TOKEN', 'benchmark')
+    os.environ['TWITTER_CACHE_PATH'] = ''
+    os.environ['LLM_CACHE_PATH'] = ''
+    os.environ['USER_PROFILE_CACHE_PATH'] = ''
+    os.environ['CRAWL_STATE_PATH'] = os.path.join(scratch_dir, 'crawl_state.sqlite')
+    os.environ['CRAWL_SHARD_DIR'] = os.path.join(scratch_dir, 'shards')
+    os.environ['TWITTER_SEARCH_CONCURRENCY'] = str(options['concurrency'])
+
+    from loguru import logger
+    logger.remove()
+    logger.add(sys.stderr, level=options['log_level'])
+
+    from benchmarks.fake_twitter import FakeTwitterSession
+    keywords = ' '.join(f'ticker{i}' for i in range(options['keywords']))
+
+    if options['with_llm']:
+        from benchmarks.fake_llm import FakeCompletion
+        FakeCompletion.install(response_text=keywords, latency_seconds=options['llm_latency'])
+        from flow import TwitterFinancialFlow
+        flow = TwitterFinancialFlow(max_results=volume)
+    else:
+        from flow import BaseFinancialFlow
+        flow = BaseFinancialFlow(keywords=keywords, max_results=volume)
+
+    session = FakeTwitterSession(
+        tweets=volume,
+        latency_seconds=options['latency'],
+        latency_jitter_seconds=options['latency_jitter'],
+        error_rate=options['error_rate'],
+        rate_limit=options['rate_limit'],
+        seed=options['seed']
+    )
+    flow.twitter_client.client.session = session
+
+    from flow.profiling import peak_rss_mb
+    started = time.perf_counter()
+    output_file = flow.run_flow(os.path.join(scratch_dir, 'benchmark.json'))
+    wall_seconds = time.perf_counter() - started
+    with open(output_file, encoding='utf-8') as f:
+        statistics = json.load(f)['statistics']
+
+    tweets_processed = statistics.get('total_tweets_found', 0)
+    return {
+        'tweets_requested': volume,
+        'tweets_served': session.tweets_served,
+        'tweets_processed': tweets_processed,
+        'users_found': statistics.get('total_users_found', 0),
+        'users_filtered': statistics.get('total_users_filtered', 0),
+        'wall_seconds': round(wall_seconds, 3),
+        'tweets_per_second': round(tweets_processed / wall_seconds, 1) if wall_seconds else None,
+        'requests_served': session.requests_served,
+        'errors_injected': session.errors_served,
+        'peak_rss_mb': peak_rss_mb(),
+        'api_requests': statistics.get('api_requests', {}),
+        'stages': statistics.get('profile', {}).get('stages', {})
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the flow against a local Twitter API stand-in")
+    parser.add_argument("--tweets", type=int, nargs="+", default=list(DEFAULT_VOLUMES),
+                        help="Tweet volumes to benchmark (default: 1000 10000 100000)")
+    parser.add_argument("--keywords", type=int, default=200, help="Number of keywords; controls the number of query shards")
+    parser.add_argument("--concurrency", type=int, default=4, help="Query shards fetched in parallel")
+    parser.add_argument("--latency", type=float, default=0.0, help="Base latency per API response in seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Extra random latency per response in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 503 response")
+    parser.add_argument("--rate-limit", type=int, default=1_000_000, help="Value of the x-rate-limit-limit header")
+    parser.add_argument("--with-llm", action="store_true", help="Run TwitterFinancialFlow with a mocked LLM for keyword generation")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Latency of each mocked LLM call in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data")
+    parser.add_argument("--output", "-o", type=str, help="Write the JSON report here instead of stdout")
+    parser.add_argument("--log-level", default="WARNING", help="Flow log level (default: WARNING)")
+    args = parser.parse_args()
+
+    options = {
+        'keywords': args.keywords,
+        'concurrency': args.concurrency,
+        'latency': args.latency,
+        'latency_jitter': args.latency_jitter,
+        'error_rate': args.error_rate,
+        'rate_limit': args.rate_limit,
+        'with_llm': args.with_llm,
+        'llm_latency': args.llm_latency,
+        'seed': args.seed,
+        'log_level': args.log_level
+    }
+
+    # A fresh interpreter per volume keeps peak RSS and warm caches from leaking between runs
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for volume in args.tweets:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_once, (volume, options))
+        print(
+            f"{volume:>9} tweets: {result['wall_seconds']:8.3f}s  {result['tweets_per_second']:>10} tweets/s  "
+            f"peak RSS {result['peak_rss_mb']} MB",
+            file=sys.stderr
+        )
+        results.append(result)
+
+    report = {
+        'benchmark': 'flow_offline',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'options': options,
+        'results': results
+    }
+    document = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(document)
+    else:
+        print(document)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Synthetic search results at load-test scale
+
+Generates users and tweets with heavy-tailed follower counts and posting
+rates, timestamps spread over the activity window, retweets and duplicate
+rows (the same tweet returned by overlapping query shards). The result uses
+the same layout as TwitterSearchClient.search, so it can go straight into
+filter_store, build_output_document or the exporters.
+
+Usage:
+    python -m benchmarks.synthetic_data --users 1000000 --tweets 10000000 --filter
+    python -m benchmarks.synthetic_data --crawl-state .cache/synthetic_state.sqlite
+"""
+
+import sys
+import json
+import time
+import argparse
+from typing import Dict, Any
+
+import numpy as np
+
+from tools import TweetStore, CrawlState, filter_store
+from tools.tweet_store import METRIC_COLUMNS
+
+# Author ids are spread out like real user ids instead of being 0..n
+_FIRST_USER_ID = 10_000_000
+_USER_ID_STRIDE = 7919
+_FIRST_TWEET_ID = 1_700_000_000_000_000_000
+
+_TEMPLATES = (
+    '$SPY looking heavy into the close, watching 500 support',
+    'Fed minutes out tomorrow, positioning light into the print',
+    '$QQQ calls paying today, trimming into strength',
+    'Earnings season setup: guidance matters more than the beat',
+    'Bitcoin reclaiming the range high, $BTC momentum building',
+    'Gold and oil both bid, risk-off tone across commodities',
+    'Options flow: big put buying in regional banks',
+    'CPI hotter than expected, yields spiking across the curve',
+    'Bullish divergence on the daily, not chasing here',
+    'Forex: USD strength continues, EUR/USD breaking support',
+)
+
+
+def sample_followers(rng: np.random.Generator, users: int) -> np.ndarray:
+    """Lognormal follower counts: median around 700, a long tail into the millions"""
+    return np.minimum(rng.lognormal(mean=6.5, sigma=2.2, size=users), 200_000_000).astype(np.int64)
+
+
+def sample_activity(rng: np.random.Generator, users: int) -> np.ndarray:
+    """Pareto posting weights: most accounts post once or twice, a few post hundreds of times"""
+    weights = rng.pareto(1.2, size=users) + 1.0
+    return weights / weights.sum()
+
+
+def generate_search_results(
+    users: int = 100_000,
+    tweets: int = 1_000_000,
+    duplicate_rate: float = 0.03,
+    retweet_rate: float = 0.1,
+    window_days: int = 14,
+    seed: int = 0,
+    now: float = None
+) -> Dict[str, Any]:
+    """
+    Generate synthetic search results
+
+    Args:
+        users: Size of the author population
+        tweets: Unique tweets to generate
+        duplicate_rate: Extra rows, as a fraction of tweets, repeating an already returned tweet
+        retweet_rate: Fraction of tweets that are retweets ("RT @user: ...")
+        window_days: Timestamps are spread uniformly over this many days before `now`
+        seed: Random seed
+        now: Reference epoch time (defaults to the current time)
+
+    Returns:
+        Dict in the TwitterSearchClient.search layout (tweet_store, users, totals, ...)
+    """
+    rng = np.random.default_rng(seed)
+    now = now or time.time()
+
+    followers = sample_followers(rng, users)
+    verified = rng.random(users) < np.clip(followers / 1_000_000, 0.001, 0.9)
+    user_ids = _FIRST_USER_ID + np.arange(users, dtype=np.int64) * _USER_ID_STRIDE
+
+    authors = rng.choice(users, size=tweets, p=sample_activity(rng, users))
+    created_at = (now - rng.uniform(0, window_days * 86400, size=tweets)).astype(np.int64)
+    # Newest first, as search pages are returned
+    order = np.argsort(-created_at, kind='stable')
+    authors = authors[order]
+    created_at = created_at[order]
+    tweet_ids = _FIRST_TWEET_ID + np.arange(tweets, dtype=np.int64)[::-1]
+
+    # Reuse a small set of text objects so millions of rows don't mean millions of strings
+    retweet_texts = [f'RT @user{index}: {template}' for index, template in enumerate(_TEMPLATES)]
+    texts_by_kind = list(_TEMPLATES) + retweet_texts
+    text_index = rng.integers(0, len(_TEMPLATES), size=tweets)
+    text_index[rng.random(tweets) < retweet_rate] += len(_TEMPLATES)
+
+    like_count = np.minimum(rng.pareto(1.5, size=tweets) * followers[authors] / 500, 2_000_000_000)
+    metrics = {
+        'like_count': like_count,
+        'retweet_count': like_count / 8,
+        'reply_count': like_count / 20,
+        'quote_count': like_count / 100
+    }
+
+    # Duplicate rows: the same tweet seen again by another query shard
+    duplicates = rng.integers(0, tweets, size=int(tweets * duplicate_rate))
+    rows = np.sort(np.concatenate([np.arange(tweets), duplicates]), kind='stable')
+
+    tweet_store = TweetStore.from_columns(
+        tweet_ids[rows],
+        user_ids[authors[rows]],
+        created_at[rows],
+        [texts_by_kind[index] for index in text_index[rows].tolist()],
+        {name: metrics[name][rows] for name in METRIC_COLUMNS}
+    )
+
+    active = np.unique(authors)
+    user_index = {
+        user_id: {
+            'user_id': user_id,
+            'username': f'user{index}',
+            'name': f'Synthetic User {index}',
+            'followers_count': followers_count,
+            'verified': is_verified,
+            'profile_url': f'https://twitter.com/user{index}'
+        }
+        for index, user_id, followers_count, is_verified in zip(
+            active.tolist(), user_ids[active].tolist(), followers[active].tolist(), verified[active].tolist()
+        )
+    }
+
+    return {
+        'tweet_store': tweet_store,
+        'users': user_index,
+        'total_users_found': len(user_index),
+        'total_tweets_found': len(rows),
+        'prefilter': {'min_followers': None, 'pruned_authors': 0, 'pruned_tweets': 0},
+        'search_queries': [],
+        'failed_queries': [],
+        'newest_ids': {},
+        'rate_limit': {},
+        'response_cache': {},
+        'synthetic': {
+            'users': users,
+            'tweets': tweets,
+            'duplicate_rows': len(duplicates),
+            'retweet_rate': retweet_rate,
+            'window_days': window_days,
+            'seed': seed
+        }
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic search results for load testing")
+    parser.add_argument("--users", type=int, default=100_000, help="Author population size")
+    parser.add_argument("--tweets", type=int, default=1_000_000, help="Unique tweets to generate")
+    parser.add_argument("--duplicate-rate", type=float, default=0.03, help="Duplicate rows as a fraction of tweets")
+    parser.add_argument("--retweet-rate", type=float, default=0.1, help="Fraction of tweets that are retweets")
+    parser.add_argument("--window-days", type=int, default=14, help="Days the timestamps are spread over")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--crawl-state", type=str, help="Also write the results into a crawl state SQLite file")
+    parser.add_argument("--filter", action="store_true", help="Time filter_store over the generated data")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    search_results = generate_search_results(
+        args.users, args.tweets, args.duplicate_rate, args.retweet_rate, args.window_days, args.seed
+    )
+    tweet_store = search_results['tweet_store']
+    summary: Dict[str, Any] = {
+        **search_results['synthetic'],
+        'generation_seconds': round(time.perf_counter() - started, 3),
+        'unique_tweets': len(tweet_store),
+        'active_users': search_results['total_users_found'],
+        'tweet_store_bytes': tweet_store.memory_bytes()
+    }
+
+    if args.filter:
+        started = time.perf_counter()
+        filtered = filter_store(tweet_store, search_results['users'])
+        summary['filter_seconds'] = round(time.perf_counter() - started, 3)
+        summary['filter_statistics'] = filtered['filter_statistics']
+
+    if args.crawl_state:
+        started = time.perf_counter()
+        CrawlState(args.crawl_state).merge_search_results(tweet_store, search_results['users'])
+        summary['crawl_state'] = args.crawl_state
+        summary['crawl_state_seconds'] = round(time.perf_counter() - started, 3)
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,20 @@
-from .twitter_financial_flow import TwitterFinancialFlow, validate_environment, validate_api_access
+from .base_flow import BaseFinancialFlow, FlowState, validate_environment, validate_api_access
+from .output import build_output_document
 
-__all__ = ['TwitterFinancialFlow', 'validate_environment', 'validate_api_access']
+
+def __getattr__(name):
+    # Importing the CrewAI flow loads crewai and litellm, so only do it when it is asked for
+    if name == 'TwitterFinancialFlow':
+        from .twitter_financial_flow import TwitterFinancialFlow
+        return TwitterFinancialFlow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    'TwitterFinancialFlow',
+    'BaseFinancialFlow',
+    'FlowState',
+    'validate_environment',
+    'validate_api_access',
+    'build_output_document'
+]
@@ -0,0 +1,542 @@
+import os
+import json
+import time
+import random
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, List, Union, Optional, Callable
+from pydantic import BaseModel, Field
+from loguru import logger
+
+from tools import TwitterSearchClient, ShardedCrawler, CrawlState, TweetStore, filter_store
+from tools.activity_counters import ActivityCounters
+from tools.filter_engine import filter_activity
+from tools.filter_spec import FilterSpec
+from .output import (
+    build_output_document,
+    default_output_path,
+    write_sidecar,
+    write_parquet_dataset,
+    NDJSONWriter,
+    NDJSONStream
+)
+from .streaming_pipeline import StreamingPipeline
+from .profiling import StageProfiler, profiled_stage
+
+# Used when keywords are neither generated by the keyword agent nor passed in
+DEFAULT_KEYWORDS = (
+    'stocks trading SPY QQQ NYSE NASDAQ #StockMarket #Trading #Investing bullish bearish '
+    'options calls puts earnings Fed "interest rates" Bitcoin BTC ETH crypto forex gold oil'
+)
+
+
+class FlowState(BaseModel):
+    """State management for the Twitter Financial Flow"""
+    keywords: str = ""
+    raw_search_results: Dict[str, Any] = Field(default_factory=dict)
+    filtered_results: Dict[str, Any] = Field(default_factory=dict)
+    final_json: Union[str, Dict[str, Any]] = ""
+    processing_start_time: float = Field(default_factory=time.time)
+    statistics: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BaseFinancialFlow:
+    """
+    Search, filter and output steps of the flow, run directly without CrewAI
+
+    Nothing here imports crewai or litellm, so a run with fixed keywords
+    starts quickly. TwitterFinancialFlow layers the agents on top of these steps.
+    """
+
+    def __init__(self, incremental: bool = False, backfill_timelines: bool = False, keywords: str = None,
+                 profile_dir: str = None, max_results: int = 100, crawl_workers: int = 0,
+                 filter_spec: FilterSpec = None):
+        """
+        Args:
+            incremental: Only fetch tweets newer than the stored per-query checkpoints
+                and merge them into the locally stored 2-week history
+            backfill_timelines: Fetch the 2-week timeline of every author above the
+                follower threshold instead of counting only keyword-matched tweets
+            keywords: Search keywords to use instead of generating them
+            profile_dir: Write per-stage cProfile and tracemalloc dumps to this directory
+            max_results: Maximum number of tweets to fetch per run, split across query shards
+            crawl_workers: Search with this many worker processes per bearer token
+                (TWITTER_BEARER_TOKENS) instead of in-process threads; 0 disables
+            filter_spec: Criteria users must meet (default: 5000+ followers, 5+ tweets in 2 weeks)
+        """
+        self.incremental = incremental
+        self.backfill_timelines = backfill_timelines
+        self.keywords = keywords
+        self.profile_dir = profile_dir
+        self.max_results = max_results
+        self.crawl_workers = crawl_workers
+        self.filter_spec = filter_spec or FilterSpec()
+        # Seeded from the stored history on the first incremental run, then updated with new tweets only
+        self.activity_counters: Optional[ActivityCounters] = None
+        self.setup_tools()
+        self.begin_run()
+
+    def setup_tools(self):
+        """Initialize the Twitter client and crawl state"""
+        try:
+            client_options = {
+                'max_concurrency': int(os.getenv('TWITTER_SEARCH_CONCURRENCY', '4')),
+                'cache_path': os.getenv('TWITTER_CACHE_PATH', '.cache/twitter_responses.sqlite') or None,
+                'cache_ttl_seconds': int(os.getenv('TWITTER_CACHE_TTL', '900')),
+                'profile_cache_path': os.getenv('USER_PROFILE_CACHE_PATH', '.cache/user_profiles.sqlite') or None,
+                'profile_ttl_seconds': int(os.getenv('USER_PROFILE_TTL', '86400'))
+            }
+            self.twitter_client = TwitterSearchClient(**client_options)
+            self.sharded_crawler = (
+                ShardedCrawler(
+                    store_dir=os.getenv('CRAWL_SHARD_DIR', '.cache/shards'),
+                    workers_per_token=self.crawl_workers,
+                    client_options=client_options,
+                    request_metrics=self.twitter_client.request_metrics
+                )
+                if self.crawl_workers else None
+            )
+            self.crawl_state = (
+                CrawlState(os.getenv('CRAWL_STATE_PATH', '.cache/crawl_state.sqlite'))
+                if self.incremental else None
+            )
+            logger.info("Twitter tools initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize Twitter tools: {e}")
+            raise
+
+    def begin_run(self) -> None:
+        """Start a fresh profiler and zero the per-run API and response cache counters"""
+        self.twitter_client.request_metrics.reset()
+        if self.twitter_client.response_cache:
+            self.twitter_client.response_cache.reset_stats()
+        self.profiler = StageProfiler(self.profile_dir, self.twitter_client.request_metrics.total_calls)
+
+    def run_statistics(self) -> Dict[str, Any]:
+        """Stage timings and API request metrics of the current run"""
+        run_statistics = {
+            "profile": self.profiler.summary(),
+            "api_requests": self.twitter_client.request_metrics.summary()
+        }
+        if self.twitter_client.profile_cache:
+            run_statistics["user_profiles"] = self.twitter_client.profile_cache.stats()
+        return run_statistics
+
+    def finish_run(self, state: FlowState) -> None:
+        """Add the run statistics to the state and, for native output, to the output document"""
+        run_statistics = self.run_statistics()
+        state.statistics.update(run_statistics)
+        if isinstance(state.final_json, dict) and "statistics" in state.final_json:
+            state.final_json["statistics"].update(run_statistics)
+
+        for name, stage in run_statistics["profile"]["stages"].items():
+            logger.info(
+                f"Stage {name}: {stage['wall_seconds']:.2f}s wall, {stage['cpu_seconds']:.2f}s CPU, "
+                f"{stage['api_calls']} API calls"
+            )
+
+    @profiled_stage("generate_keywords")
+    def generate_keywords(self) -> FlowState:
+        """Step 1: Use the configured keywords"""
+        keywords = self.keywords or DEFAULT_KEYWORDS
+        logger.info(f"Using keywords: {keywords}")
+        return FlowState(keywords=keywords, processing_start_time=self.profiler.started_at)
+
+    @profiled_stage("search_users")
+    def search_users(self, state: FlowState) -> FlowState:
+        """Step 2: Search for Twitter users using the keywords"""
+        logger.info("Starting user search...")
+
+        try:
+            # Validate keywords
+            if not state.keywords:
+                raise ValueError("No keywords generated for search")
+
+            since_ids = self.crawl_state.since_ids() if self.crawl_state else None
+            backlog = self.crawl_state.backlog() if self.crawl_state else None
+            searcher = self.sharded_crawler or self.twitter_client
+            search_results = searcher.search(
+                state.keywords,
+                max_results=self.max_results,
+                since_ids=since_ids,
+                min_followers=self.filter_spec.min_followers,
+                backlog=backlog,
+                filter_spec=self.filter_spec
+            )
+            if 'error' in search_results:
+                raise RuntimeError(search_results['error'])
+
+            if self.backfill_timelines:
+                self.backfill_search_results(search_results)
+
+            if self.crawl_state:
+                self.merge_crawl_history(search_results)
+
+            logger.info(f"Search completed. Found {search_results['total_users_found']} users.")
+
+            state.raw_search_results = search_results
+            return state
+
+        except Exception as e:
+            logger.error(f"Error in user search: {e}")
+            state.raw_search_results = {"error": str(e)}
+            return state
+
+    def backfill_search_results(self, search_results: Dict[str, Any]) -> None:
+        """Add the 2-week timelines of follower-qualified authors to the search results"""
+        search_results['timeline_backfill'] = self.twitter_client.backfill_timelines(
+            search_results['tweet_store'],
+            search_results['users'],
+            min_followers=self.filter_spec.min_followers or 0
+        )
+        search_results['total_tweets_found'] += search_results['timeline_backfill']['tweets_added']
+
+    def merge_crawl_history(self, search_results: Dict[str, Any]) -> None:
+        """
+        Fold newly fetched tweets into the stored history and filter over the full window
+
+        The first run seeds the activity counters from the stored history; later
+        runs only count the tweets that were not stored yet, so the history is
+        never rescanned. search_results keeps this run's tweets for the output.
+        """
+        tweet_store = search_results['tweet_store']
+        new_rows = self.crawl_state.unseen_rows(tweet_store) if self.activity_counters is not None else None
+        new_tweets = self.crawl_state.merge_search_results(tweet_store, search_results['users'])
+        self.crawl_state.update_checkpoints(search_results.get('newest_ids', {}))
+        self.crawl_state.update_backlog(search_results.get('backlog', {}))
+        self.crawl_state.prune()
+
+        if self.activity_counters is None:
+            history, _ = self.crawl_state.load_search_results()
+            self.activity_counters = ActivityCounters.from_store(history)
+        else:
+            self.activity_counters.add(
+                tweet_store.column('author_ids')[new_rows], tweet_store.column('created_at')[new_rows]
+            )
+            self.activity_counters.advance()
+            self.activity_counters.compact()
+
+        user_ids, _ = self.activity_counters.window_counts()
+        users = self.crawl_state.load_users(user_ids.tolist())
+        if self.twitter_client.profile_cache:
+            # Profiles stored with older tweets may be out of date; refresh the ones that matter
+            search_results['profile_refresh'] = self.twitter_client.refresh_profiles(users, self.filter_spec.min_followers)
+        # The history only holds authors above the follower threshold; count this run's pruned ones as run_flow does
+        prefilter = search_results.get('prefilter', {})
+        search_results.update(
+            users=users,
+            total_users_found=len(user_ids) + prefilter.get('pruned_authors', 0),
+            total_tweets_found=self.activity_counters.total() + prefilter.get('pruned_tweets', 0),
+            new_tweets_fetched=new_tweets
+        )
+        logger.info(f"Incremental crawl added {new_tweets} new tweets; history covers {len(user_ids)} users")
+
+    def filter_search_results(self, search_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Filter this run's results, or the whole history through the activity counters in incremental runs"""
+        if self.activity_counters is not None:
+            if not self.filter_spec.uses_engagement:
+                return filter_activity(self.activity_counters, search_results['users'], filter_spec=self.filter_spec)
+            # Engagement needs per-tweet metrics, which only the stored history has
+            history, _ = self.crawl_state.load_search_results()
+            return filter_store(history, search_results['users'], filter_spec=self.filter_spec)
+        return filter_store(search_results['tweet_store'], search_results['users'], filter_spec=self.filter_spec)
+
+    @profiled_stage("filter_users")
+    def filter_users(self, state: FlowState) -> FlowState:
+        """Step 3: Filter users based on the filter spec (default: 5000+ followers, 5+ tweets in 2 weeks)"""
+        logger.info("Starting user filtering...")
+
+        try:
+            if 'error' in state.raw_search_results:
+                raise RuntimeError(state.raw_search_results['error'])
+
+            filtered_results = self.filter_search_results(state.raw_search_results)
+
+            logger.info(f"User filtering completed. {filtered_results['total_filtered']} users passed.")
+
+            state.filtered_results = filtered_results
+            return state
+
+        except Exception as e:
+            logger.error(f"Error in user filtering: {e}")
+            state.filtered_results = {"error": str(e)}
+            return state
+
+    def start_statistics(self, state: FlowState) -> float:
+        """Reset state.statistics for the formatting step. Returns the processing time so far."""
+        processing_time = time.time() - state.processing_start_time
+        state.statistics = {
+            "processing_time_seconds": processing_time,
+            "timestamp": datetime.now().isoformat(),
+            "keywords_used": state.keywords,
+            "status": "completed"
+        }
+        return processing_time
+
+    @profiled_stage("format_to_json")
+    def format_to_json(self, state: FlowState) -> FlowState:
+        """Step 4: Format results to JSON with statistics"""
+        logger.info("Starting JSON formatting...")
+
+        try:
+            processing_time = self.start_statistics(state)
+
+            state.final_json = build_output_document(
+                state.keywords,
+                state.raw_search_results,
+                state.filtered_results,
+                processing_time,
+                state.statistics["timestamp"]
+            )
+            state.statistics.update(state.final_json["statistics"])
+            state.statistics["response_cache"] = state.raw_search_results.get("response_cache", {})
+            state.statistics["rate_limit"] = state.raw_search_results.get("rate_limit", {})
+
+            logger.info(f"JSON formatting completed in {processing_time:.2f} seconds")
+            return state
+
+        except Exception as e:
+            logger.error(f"Error in JSON formatting: {e}")
+            state.final_json = json.dumps({"error": str(e)})
+            return state
+
+    def save_results(self, state: FlowState, output_file: str = None, output_format: str = 'json',
+                     codec: str = None, stream: NDJSONStream = None) -> str:
+        """
+        Save the final results to file
+
+        Args:
+            state: Final flow state
+            output_file: Output path (default: timestamped name for the format)
+            output_format: 'json' for one document, 'ndjson' for one user per line
+                plus a .meta.json sidecar with metadata and statistics, 'parquet' for
+                users/tweets tables in a dataset directory partitioned by run
+            codec: Optional 'gzip' or 'zstd' compression for NDJSON output
+            stream: NDJSON output the users were already streamed to while the run went on;
+                it is finished with the final users and statistics instead of writing output_file
+        """
+        try:
+            if not output_file:
+                output_file = default_output_path(output_format, codec)
+
+            # Native output is already structured; LLM output must be valid JSON
+            try:
+                if isinstance(state.final_json, str):
+                    json_data = json.loads(state.final_json)
+                else:
+                    json_data = state.final_json
+            except json.JSONDecodeError:
+                # If parsing fails, create a structured output
+                json_data = {
+                    "metadata": {
+                        "timestamp": state.statistics.get("timestamp", datetime.now().isoformat()),
+                        "processing_time_seconds": state.statistics.get("processing_time_seconds", 0),
+                        "search_keywords": state.keywords,
+                        "status": "completed_with_parsing_issues"
+                    },
+                    "raw_output": state.final_json,
+                    "statistics": state.statistics
+                }
+
+            # Save to file
+            if output_format == 'parquet':
+                paths = write_parquet_dataset(
+                    output_file,
+                    json_data,
+                    state.filtered_results.get('filtered_users', []),
+                    state.raw_search_results.get('tweet_store', TweetStore())
+                )
+                logger.info(f"Parquet tables saved to {paths['users']} and {paths['tweets']}")
+            elif stream is not None:
+                metadata_file = stream.finish(json_data)
+                logger.info(f"Run metadata saved to {metadata_file}")
+            elif output_format == 'ndjson':
+                with NDJSONWriter(output_file, codec) as writer:
+                    writer.write_all(json_data.get('users', []))
+                metadata_file = write_sidecar(output_file, json_data)
+                logger.info(f"Run metadata saved to {metadata_file}")
+            else:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(json_data, f, indent=2, ensure_ascii=False)
+
+            logger.info(f"Results saved to {output_file}")
+            return output_file
+
+        except Exception as e:
+            logger.error(f"Error saving results: {e}")
+            raise
+
+    def run_steps(self) -> FlowState:
+        """Run the four steps in order and return the final state"""
+        state = self.generate_keywords()
+        state = self.search_users(state)
+        state = self.filter_users(state)
+        return self.format_to_json(state)
+
+    def run_flow(self, output_file: str = None, output_format: str = 'json', codec: str = None) -> str:
+        """Execute the complete flow with guardrails"""
+        try:
+            logger.info("Starting Twitter Financial Flow...")
+
+            # Execute the flow
+            self.begin_run()
+            final_state = self.run_steps()
+            self.finish_run(final_state)
+
+            # Save results
+            output_path = self.save_results(final_state, output_file, output_format, codec)
+
+            # Log completion statistics
+            logger.info("Flow completed successfully!")
+            logger.info(f"Processing time: {final_state.statistics.get('processing_time_seconds', 0):.2f} seconds")
+            logger.info(f"Output saved to: {output_path}")
+
+            return output_path
+
+        except Exception as e:
+            logger.error(f"Flow execution failed: {e}")
+            raise
+
+    def run_streaming(self, output_file: str = None, output_format: str = 'json', codec: str = None,
+                      on_record: Optional[Callable[[Dict[str, Any]], None]] = None) -> str:
+        """
+        Execute the flow with search, filtering and output overlapping
+
+        Keywords are generated as usual, then StreamingPipeline consumes search
+        pages as they arrive instead of waiting for the whole search to finish.
+        With NDJSON output each user line is written the moment the user
+        qualifies, and on_record gets the same records. Timeline backfill and
+        incremental merges run once the search is done, followed by the final
+        filter; users that only qualify then are appended, and the sidecar
+        carries the final statistics plus corrections for streamed lines whose
+        counts changed, so the output adds up to what run_flow writes.
+        """
+        stream = None
+        try:
+            logger.info("Starting streaming Twitter Financial Flow...")
+
+            self.begin_run()
+            state = self.generate_keywords()
+            if not state.keywords:
+                raise ValueError("No keywords generated for search")
+
+            if output_format == 'ndjson':
+                output_file = output_file or default_output_path(output_format, codec)
+                stream = NDJSONStream(output_file, codec)
+
+                def emit(record: Dict[str, Any]) -> None:
+                    stream.write(record)
+                    if on_record:
+                        on_record(record)
+            else:
+                emit = on_record
+
+            with self.profiler.stage("streaming_search"):
+                since_ids = self.crawl_state.since_ids() if self.crawl_state else None
+                backlog = self.crawl_state.backlog() if self.crawl_state else None
+                pipeline = StreamingPipeline(self.twitter_client, filter_spec=self.filter_spec, on_record=emit)
+                search_results, filtered_results = asyncio.run(
+                    pipeline.run(state.keywords, self.max_results, since_ids, backlog)
+                )
+
+                if self.backfill_timelines:
+                    self.backfill_search_results(search_results)
+                if self.crawl_state:
+                    self.merge_crawl_history(search_results)
+                if self.backfill_timelines or self.crawl_state:
+                    filtered_results = self.filter_search_results(search_results)
+
+            state.raw_search_results = search_results
+            state.filtered_results = filtered_results
+            final_state = self.format_to_json(state)
+            self.finish_run(final_state)
+
+            output_path = self.save_results(final_state, output_file, output_format, codec, stream)
+
+            logger.info("Streaming flow completed successfully!")
+            logger.info(f"Processing time: {final_state.statistics.get('processing_time_seconds', 0):.2f} seconds")
+            logger.info(f"Output saved to: {output_path}")
+
+            return output_path
+
+        except Exception as e:
+            logger.error(f"Streaming flow execution failed: {e}")
+            if stream:
+                stream.close()
+            raise
+
+    def run_scheduled(self, interval_seconds: float, jitter_seconds: float = 0, max_runs: int = None,
+                      streaming: bool = False, output_file: str = None, output_format: str = 'json',
+                      codec: str = None) -> List[str]:
+        """
+        Rerun the flow on a fixed interval, reusing this instance's client, caches and agents
+
+        Each run waits interval_seconds plus a random 0..jitter_seconds after the previous
+        one finished, so several daemons sharing a token don't fire in lockstep. A failed
+        run is logged and the schedule continues. Without output_file every run writes
+        its own timestamped output.
+
+        Args:
+            interval_seconds: Delay between the end of one run and the start of the next
+            jitter_seconds: Upper bound of the random delay added to each interval
+            max_runs: Stop after this many runs (default: run until interrupted)
+            streaming: Use run_streaming instead of run_flow
+
+        Returns:
+            Output paths of the successful runs
+        """
+        if not self.crawl_state:
+            logger.warning("Scheduled runs without incremental state refetch the full search window every time")
+
+        run = self.run_streaming if streaming else self.run_flow
+        output_paths = []
+        runs = 0
+        while max_runs is None or runs < max_runs:
+            runs += 1
+            logger.info(f"Scheduled run {runs} starting")
+            try:
+                output_paths.append(run(output_file, output_format, codec))
+            except Exception as e:
+                logger.error(f"Scheduled run {runs} failed: {e}")
+
+            if max_runs is not None and runs >= max_runs:
+                break
+            delay = interval_seconds + random.uniform(0, jitter_seconds)
+            logger.info(f"Next run in {delay:.0f} seconds")
+            time.sleep(delay)
+
+        return output_paths
+
+
+# Guardrails and validation functions
+def validate_environment():
+    """Validate required environment variables"""
+    required_vars = ['TWITTER_BEARER_TOKEN']
+    missing_vars = []
+
+    for var in required_vars:
+        if not os.getenv(var):
+            missing_vars.append(var)
+
+    if missing_vars:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
+
+    logger.info("Environment validation passed")
+
+
+def validate_api_access(twitter_client: TwitterSearchClient = None):
+    """
+    Validate API access before running flow
+
+    Pass the flow's twitter_client to check it instead of building a separate client.
+    """
+    try:
+        # Test Twitter API access
+        twitter_client = twitter_client or TwitterSearchClient()
+        if twitter_client.client is None:
+            raise RuntimeError("Twitter client was not initialized")
+        logger.info("Twitter API access validated")
+        return True
+    except Exception as e:
+        logger.error(f"API validation failed: {e}")
+        return False
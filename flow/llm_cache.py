@@ -0,0 +1,81 @@
+import threading
+from typing import Any, Callable, Dict
+
+import litellm
+from loguru import logger
+
+from tools import ResponseCache
+
+
+class CachedCompletion:
+    """
+    Content-addressed cache in front of litellm.completion
+
+    Completions are keyed on model, messages and tools, so an unchanged task
+    prompt is answered from disk instead of calling the LLM again.
+    """
+
+    def __init__(self, completion: Callable[..., Any], cache: ResponseCache, default_model: str = None):
+        self.completion = completion
+        self.cache = cache
+        self.default_model = default_model
+        self._lock = threading.Lock()
+        self.reset_usage()
+
+    def reset_usage(self) -> None:
+        """Zero the token and cost counters reported by usage()"""
+        self._usage = {'calls': 0, 'cache_hits': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0}
+
+    def _record_usage(self, response: Any, cache_hit: bool) -> None:
+        with self._lock:
+            self._usage['calls'] += 1
+            if cache_hit:
+                self._usage['cache_hits'] += 1
+                return
+            usage = getattr(response, 'usage', None)
+            if usage:
+                self._usage['prompt_tokens'] += getattr(usage, 'prompt_tokens', 0) or 0
+                self._usage['completion_tokens'] += getattr(usage, 'completion_tokens', 0) or 0
+            try:
+                self._usage['cost_usd'] += litellm.completion_cost(completion_response=response) or 0.0
+            except Exception:
+                # Models missing from litellm's price map have no known cost
+                pass
+
+    def __call__(self, *args, **kwargs):
+        # Streaming responses can't be replayed from a stored completion
+        if kwargs.get('stream'):
+            return self.completion(*args, **kwargs)
+
+        model = kwargs.get('model', args[0] if args else self.default_model)
+        messages = kwargs.get('messages', args[1] if len(args) > 1 else None)
+        key_params: Dict[str, Any] = {
+            'messages': messages,
+            'tools': kwargs.get('tools'),
+            'functions': kwargs.get('functions')
+        }
+
+        cached = self.cache.get(f"llm:{model}", key_params)
+        if cached is not None:
+            logger.debug(f"LLM cache hit for {model}")
+            response = litellm.ModelResponse(**cached)
+            self._record_usage(response, cache_hit=True)
+            return response
+
+        response = self.completion(*args, **kwargs)
+        self._record_usage(response, cache_hit=False)
+        try:
+            self.cache.set(f"llm:{model}", key_params, response.model_dump())
+        except Exception as e:
+            logger.warning(f"Could not cache LLM response: {e}")
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+    def usage(self) -> Dict[str, Any]:
+        """Completions served, cache hits, tokens and estimated cost since the last reset_usage()"""
+        with self._lock:
+            usage = dict(self._usage)
+        usage['cost_usd'] = round(usage['cost_usd'], 6)
+        return usage
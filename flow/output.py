@@ -0,0 +1,288 @@
+import io
+import os
+import gzip
+import json
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tools import TweetStore
+
+OUTPUT_FORMATS = ('json', 'ndjson', 'parquet')
+CODECS = ('gzip', 'zstd')
+_CODEC_EXTENSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def user_record(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a filtered user into its output record"""
+    return {
+        'url': user['profile_url'],
+        'username': user['username'],
+        'followers': user['followers_count'],
+        'avg_posts_per_week': user['avg_posts_per_week'],
+        'verified': user['verified'],
+        'recent_tweets_count': user['recent_tweets_count'],
+        'total_tweets_found': user['total_tweets_found']
+    }
+
+
+def build_output_document(
+    keywords: str,
+    search_results: Dict[str, Any],
+    filtered_results: Dict[str, Any],
+    processing_time: float,
+    timestamp: str = None
+) -> Dict[str, Any]:
+    """
+    Build the output JSON structure from structured search and filter results
+
+    Mirrors the schema described in tasks/formatting_tasks.py without an LLM call.
+    """
+    users = [user_record(user) for user in filtered_results.get('filtered_users', [])]
+
+    total_found = search_results.get('total_users_found', 0)
+    total_filtered = len(users)
+
+    statistics = {
+        'total_users_found': total_found,
+        'total_users_filtered': total_filtered,
+        'total_tweets_found': search_results.get('total_tweets_found', 0),
+        'filter_success_rate': round(total_filtered / total_found, 3) if total_found else 0.0,
+        'avg_followers_filtered_users': (
+            round(sum(user['followers'] for user in users) / total_filtered, 1) if users else 0.0
+        ),
+        'avg_posts_per_week_filtered_users': (
+            round(sum(user['avg_posts_per_week'] for user in users) / total_filtered, 2) if users else 0.0
+        )
+    }
+    if 'filter_statistics' in filtered_results:
+        statistics['filter_breakdown'] = filtered_results['filter_statistics']
+    if search_results.get('prefilter', {}).get('min_followers') is not None:
+        statistics['search_prefilter'] = search_results['prefilter']
+
+    return {
+        'metadata': {
+            'timestamp': timestamp or datetime.now().isoformat(),
+            'processing_time_seconds': round(processing_time, 3),
+            'search_keywords': keywords,
+            'search_queries': search_results.get('search_queries', []),
+            'filter_criteria': filtered_results.get('filter_criteria', {}),
+            'status': 'completed'
+        },
+        'statistics': statistics,
+        'users': users
+    }
+
+
+def _run_timestamp() -> str:
+    # Down to the millisecond, so back-to-back scheduled runs don't share a name
+    return datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+
+
+def default_output_path(output_format: str = 'json', codec: Optional[str] = None) -> str:
+    """Timestamped output filename for the given format and compression codec"""
+    if output_format == 'parquet':
+        # Parquet runs accumulate as partitions of one dataset directory
+        return "twitter_financial_users_dataset"
+    return f"twitter_financial_users_{_run_timestamp()}.{output_format}{_CODEC_EXTENSIONS[codec]}"
+
+
+def sidecar_path(output_file: str) -> str:
+    """Path of the metadata/statistics file written next to an NDJSON output"""
+    for extension in ('.ndjson.gz', '.ndjson.zst', '.ndjson'):
+        if output_file.endswith(extension):
+            return output_file[:-len(extension)] + '.meta.json'
+    return output_file + '.meta.json'
+
+
+class NDJSONWriter:
+    """
+    Write one JSON user record per line, optionally gzip or zstd compressed
+
+    Uncompressed output is flushed after every record so consumers can tail
+    the file while the run is still going.
+    """
+
+    def __init__(self, path: str, codec: Optional[str] = None):
+        if codec not in _CODEC_EXTENSIONS:
+            raise ValueError(f"Unsupported codec: {codec}. Use one of: {', '.join(CODECS)}")
+
+        self.path = path
+        self.codec = codec
+        self.records_written = 0
+
+        if codec == 'gzip':
+            self._file = gzip.open(path, 'wt', encoding='utf-8')
+        elif codec == 'zstd':
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ImportError("zstd output requires the 'zstandard' package: pip install zstandard") from e
+            self._raw = open(path, 'wb')
+            self._file = io.TextIOWrapper(
+                zstandard.ZstdCompressor().stream_writer(self._raw), encoding='utf-8'
+            )
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str))
+        self._file.write('\n')
+        self.records_written += 1
+        if self.codec is None:
+            self._file.flush()
+
+    def write_all(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.write(record)
+
+    def close(self) -> None:
+        self._file.close()
+        if self.codec == 'zstd' and not self._raw.closed:
+            self._raw.close()
+
+    def __enter__(self) -> 'NDJSONWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class NDJSONStream:
+    """
+    NDJSON output written while a streaming run is still going
+
+    Each user line is written the moment the user qualifies, with counts as
+    of that moment. finish() appends the users that only qualified once the
+    run was complete and writes the sidecar; its 'stream' block carries the
+    final records of streamed users whose counts changed ('corrections') and
+    the urls of streamed users that no longer pass ('retracted').
+    """
+
+    def __init__(self, path: str, codec: Optional[str] = None):
+        self.path = path
+        self._writer = NDJSONWriter(path, codec)
+        # url -> the streamed record's other values, to spot records the final result changed
+        self._streamed: Dict[str, tuple] = {}
+
+    @staticmethod
+    def _values(record: Dict[str, Any]) -> tuple:
+        return tuple(value for key, value in record.items() if key != 'url')
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._writer.write(record)
+        self._streamed[record['url']] = self._values(record)
+
+    def finish(self, document: Dict[str, Any]) -> str:
+        """Write the users not streamed yet, close the file and write the sidecar. Returns the sidecar path."""
+        records_streamed = len(self._streamed)
+        corrections = []
+        for record in document.get('users', []):
+            streamed = self._streamed.pop(record['url'], None)
+            if streamed is None:
+                self._writer.write(record)
+            elif streamed != self._values(record):
+                corrections.append(record)
+        retracted = list(self._streamed)
+        self._streamed = {}
+        self.close()
+
+        return write_sidecar(self.path, {
+            **document,
+            'stream': {
+                'records_streamed': records_streamed,
+                'records_written': self._writer.records_written,
+                'corrections': corrections,
+                'retracted': retracted
+            }
+        })
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def write_sidecar(output_file: str, document: Dict[str, Any]) -> str:
+    """Write the document's metadata and statistics (everything but the users) next to an NDJSON file"""
+    path = sidecar_path(output_file)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({key: value for key, value in document.items() if key != 'users'}, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet output requires the 'pyarrow' package: pip install pyarrow") from e
+    return pyarrow
+
+
+def write_parquet_dataset(
+    dataset_dir: str,
+    document: Dict[str, Any],
+    filtered_users: List[Dict[str, Any]],
+    tweet_store: 'TweetStore',
+    run_id: str = None
+) -> Dict[str, str]:
+    """
+    Export a run as Parquet users and tweets tables, partitioned by run
+
+    Layout (hive-style, so all runs load as one dataset with a `run` column):
+        <dataset_dir>/users/run=<run_id>/part-0.parquet
+        <dataset_dir>/tweets/run=<run_id>/part-0.parquet
+        <dataset_dir>/metadata/run=<run_id>.json
+
+    Tweet id/metric columns are handed to Arrow straight from the TweetStore buffers.
+    """
+    pa = _import_pyarrow()
+    run_id = run_id or _run_timestamp()
+
+    users_table = pa.table({
+        'user_id': pa.array([user['user_id'] for user in filtered_users], pa.int64()),
+        'username': pa.array([user['username'] for user in filtered_users], pa.string()),
+        'name': pa.array([user['name'] for user in filtered_users], pa.string()),
+        'url': pa.array([user['profile_url'] for user in filtered_users], pa.string()),
+        'followers': pa.array([user['followers_count'] for user in filtered_users], pa.int64()),
+        'verified': pa.array([user['verified'] for user in filtered_users], pa.bool_()),
+        'recent_tweets_count': pa.array([user['recent_tweets_count'] for user in filtered_users], pa.int32()),
+        'avg_posts_per_week': pa.array([user['avg_posts_per_week'] for user in filtered_users], pa.float64()),
+        'total_tweets_found': pa.array([user['total_tweets_found'] for user in filtered_users], pa.int32())
+    })
+
+    tweet_columns = {
+        'tweet_id': pa.array(tweet_store.column('tweet_ids')),
+        'author_id': pa.array(tweet_store.column('author_ids')),
+        'created_at': pa.array(tweet_store.column('created_at')).cast(pa.timestamp('s', tz='UTC')),
+        'text': pa.array(tweet_store.texts, pa.string())
+    }
+    for name in tweet_store.metrics:
+        tweet_columns[name] = pa.array(tweet_store.column(name))
+    tweets_table = pa.table(tweet_columns)
+
+    paths = {}
+    for table_name, table in (('users', users_table), ('tweets', tweets_table)):
+        partition_dir = os.path.join(dataset_dir, table_name, f"run={run_id}")
+        os.makedirs(partition_dir, exist_ok=True)
+        paths[table_name] = os.path.join(partition_dir, 'part-0.parquet')
+        pa.parquet.write_table(table, paths[table_name], compression='zstd')
+
+    metadata_dir = os.path.join(dataset_dir, 'metadata')
+    os.makedirs(metadata_dir, exist_ok=True)
+    paths['metadata'] = os.path.join(metadata_dir, f"run={run_id}.json")
+    with open(paths['metadata'], 'w', encoding='utf-8') as f:
+        json.dump({key: value for key, value in document.items() if key != 'users'}, f, indent=2, ensure_ascii=False)
+
+    return paths
+
+
+def load_parquet_table(dataset_dir: str, table: str = 'users', columns: List[str] = None, run_id: str = None):
+    """
+    Load the users or tweets table of a Parquet export as a pandas DataFrame
+
+    Only the requested columns are read from disk; pass run_id to load a single run.
+    """
+    pa = _import_pyarrow()
+    path = os.path.join(dataset_dir, table)
+    filters = [('run', '=', run_id)] if run_id else None
+    return pa.parquet.read_table(path, columns=columns, filters=filters, partitioning='hive').to_pandas()
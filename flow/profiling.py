@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import cProfile
+import functools
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class StageProfiler:
+    """
+    Wall time, CPU time, API calls and peak RSS per flow stage
+
+    With profile_dir set, every stage also writes a cProfile dump
+    (<run>_<stage>.prof, readable with pstats or snakeviz) and a tracemalloc
+    snapshot (<run>_<stage>.tracemalloc). cProfile only sees the thread that
+    runs the stage, so time spent in search worker threads shows up as waits.
+    """
+
+    def __init__(self, profile_dir: str = None, api_calls: Callable[[], int] = None):
+        """
+        Args:
+            profile_dir: Directory for per-stage cProfile and tracemalloc dumps (disabled if unset)
+            api_calls: Returns the number of API calls made so far, for per-stage call counts
+        """
+        self.profile_dir = profile_dir
+        self.api_calls = api_calls
+        self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.started_at = time.time()
+        self._started_cpu = time.process_time()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._active = set()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name: str):
+        # A step that delegates to its base implementation is timed once, by the outer call
+        if name in self._active:
+            yield
+            return
+
+        self._active.add(name)
+        profiler = None
+        started_tracing = False
+        if self.profile_dir:
+            profiler = cProfile.Profile()
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            profiler.enable()
+
+        calls_before = self.api_calls() if self.api_calls else 0
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            stats = {
+                'wall_seconds': round(time.perf_counter() - wall_start, 3),
+                'cpu_seconds': round(time.process_time() - cpu_start, 3),
+                'api_calls': (self.api_calls() - calls_before) if self.api_calls else 0,
+                'peak_rss_mb': peak_rss_mb()
+            }
+            if profiler:
+                profiler.disable()
+                prefix = os.path.join(self.profile_dir, f"{self.run_id}_{name}")
+                profiler.dump_stats(f"{prefix}.prof")
+                stats['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+                tracemalloc.take_snapshot().dump(f"{prefix}.tracemalloc")
+                if started_tracing:
+                    tracemalloc.stop()
+            self.stages[name] = stats
+            self._active.discard(name)
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-stage timings plus run totals"""
+        return {
+            'stages': dict(self.stages),
+            'total_wall_seconds': round(time.time() - self.started_at, 3),
+            'total_cpu_seconds': round(time.process_time() - self._started_cpu, 3),
+            'peak_rss_mb': peak_rss_mb()
+        }
+
+
+def profiled_stage(name: str):
+    """Time a flow step method under `name` with the instance's StageProfiler"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.profiler.stage(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
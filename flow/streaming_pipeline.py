@@ -0,0 +1,192 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from loguru import logger
+
+from tools import TwitterSearchClient, TweetStore, build_query_shards, filter_store
+from tools.filter_spec import FilterSpec
+from tools.twitter_client import AuthorPrefilter, ShardCursor, plan_shard_cursors, checkpoint_updates
+from .output import user_record
+
+# Sentinel a producer puts on the page queue when its shard is exhausted
+_SHARD_DONE = object()
+
+
+class StreamingPipeline:
+    """
+    Search, aggregation and output as overlapping asyncio stages
+
+    Each query shard pages through the API in a worker thread and feeds a
+    bounded page queue; a single aggregator folds pages into the TweetStore
+    and per-author window counts as they arrive and pushes a user record to
+    a bounded output queue the moment that user qualifies. Full queues block
+    the upstream stage, so fetching never runs far ahead of processing.
+    """
+
+    def __init__(
+        self,
+        search_client: TwitterSearchClient,
+        filter_spec: Optional[FilterSpec] = None,
+        queue_size: int = 8,
+        on_record: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        """
+        Args:
+            search_client: Client providing the API access and page iteration
+            filter_spec: Criteria users must meet (default: FilterSpec())
+            queue_size: Capacity of the page and record queues
+            on_record: Called with each output record as soon as its user qualifies
+                (e.g. NDJSONStream.write). Counts in these records are as of
+                qualification; the final filter result returned by run() has the
+                complete counts. Specs with upper activity bounds or engagement
+                ranges can't be decided early, so nothing is emitted for them.
+        """
+        self.search_client = search_client
+        self.filter_spec = filter_spec or FilterSpec()
+        self.queue_size = queue_size
+        self.on_record = on_record
+
+    async def _produce(self, cursor: ShardCursor, limit: int,
+                       pages: asyncio.Queue, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            iterator = self.search_client._iter_pages(cursor.query, limit, cursor.since_id, cursor.until_id)
+            try:
+                while True:
+                    page = await asyncio.to_thread(next, iterator, None)
+                    if page is None:
+                        break
+                    await pages.put((cursor, page))
+            except Exception as e:
+                logger.warning(f"Query shard failed: {e}")
+                await pages.put((cursor, e))
+            finally:
+                await pages.put((cursor, _SHARD_DONE))
+
+    async def _aggregate(self, shard_count: int, pages: asyncio.Queue, records: asyncio.Queue,
+                         state: Dict[str, Any]) -> None:
+        spec = self.filter_spec
+        since = (datetime.now(timezone.utc) - timedelta(days=spec.window_days)).timestamp()
+        min_recent = max(spec.min_tweets or 0, (spec.min_posts_per_week or 0) * spec.window_weeks)
+        tweet_store: TweetStore = state['tweet_store']
+        users = state['users']
+        prefilter: AuthorPrefilter = state['prefilter']
+        recent_counts: Dict[int, int] = {}
+        total_counts: Dict[int, int] = {}
+        emitted = set()
+        remaining = shard_count
+
+        while remaining:
+            cursor, page = await pages.get()
+            if page is _SHARD_DONE:
+                remaining -= 1
+                continue
+            if isinstance(page, Exception):
+                cursor.failed = True
+                continue
+
+            tweets, page_users = page
+            cursor.observe(tweets)
+            for tweet in prefilter.filter_page(tweets, page_users, users):
+                if not tweet_store.append_tweet(tweet):
+                    continue
+
+                author_id = int(tweet['author_id'])
+                total_counts[author_id] = total_counts.get(author_id, 0) + 1
+                if tweet_store.created_at[-1] >= since:
+                    recent_counts[author_id] = recent_counts.get(author_id, 0) + 1
+
+                # Emit each user once, as soon as every criterion is met
+                if (
+                    spec.streamable
+                    and author_id not in emitted
+                    and author_id in users
+                    and recent_counts.get(author_id, 0) >= min_recent
+                    and spec.accepts_profile(users[author_id])
+                ):
+                    emitted.add(author_id)
+                    info = users[author_id]
+                    await records.put(user_record({
+                        **info,
+                        'recent_tweets_count': recent_counts[author_id],
+                        'avg_posts_per_week': round(recent_counts[author_id] / spec.window_weeks, 2),
+                        'total_tweets_found': total_counts[author_id]
+                    }))
+
+        await records.put(None)
+
+    async def _emit(self, records: asyncio.Queue, state: Dict[str, Any]) -> None:
+        while True:
+            record = await records.get()
+            if record is None:
+                return
+            state['records_emitted'] += 1
+            if self.on_record:
+                self.on_record(record)
+
+    async def run(
+        self,
+        keywords: str,
+        max_results: int = 100,
+        since_ids: Optional[Dict[str, str]] = None,
+        backlog: Optional[Dict[str, List[List[Optional[str]]]]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Run all stages concurrently
+
+        Args:
+            keywords: Space-separated keywords to search for
+            max_results: Maximum number of tweets to fetch, split across query shards
+            since_ids: Per-query checkpoints; only tweets newer than these ids are fetched
+            backlog: Per-query [since_id, until_id] gaps earlier runs left unfetched
+
+        Returns:
+            (search results, filter results) in the same shape as the batch flow steps
+        """
+        queries = build_query_shards(keywords, self.search_client.max_query_length, self.filter_spec)
+        if not queries:
+            raise ValueError("No usable keywords to search for")
+
+        per_query_limit = -(-max_results // len(queries))
+        cursors = plan_shard_cursors(queries, since_ids, backlog)
+
+        state: Dict[str, Any] = {
+            'tweet_store': TweetStore(),
+            'users': {},
+            'prefilter': AuthorPrefilter(self.filter_spec.min_followers),
+            'records_emitted': 0
+        }
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        records: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        semaphore = asyncio.Semaphore(self.search_client.max_concurrency)
+
+        await asyncio.gather(
+            *(self._produce(cursor, per_query_limit, pages, semaphore) for cursor in cursors),
+            self._aggregate(len(cursors), pages, records, state),
+            self._emit(records, state)
+        )
+
+        if all(cursor.failed for cursor in cursors):
+            raise RuntimeError("All search query shards failed")
+        newest_ids, remaining_backlog = checkpoint_updates(cursors, per_query_limit)
+
+        tweet_store = state['tweet_store']
+        author_ids = set(tweet_store.author_ids)
+        pruned = state['prefilter'].counts(tweet_store, state['users'])
+        search_results = {
+            'tweet_store': tweet_store,
+            'users': {user_id: info for user_id, info in state['users'].items() if user_id in author_ids},
+            'total_users_found': len(author_ids) + pruned['pruned_authors'],
+            'total_tweets_found': len(tweet_store) + pruned['pruned_tweets'],
+            'prefilter': pruned,
+            'search_queries': queries,
+            'failed_queries': sorted({cursor.query for cursor in cursors if cursor.failed}),
+            'newest_ids': newest_ids,
+            'backlog': remaining_backlog,
+            'records_streamed': state['records_emitted'],
+            'rate_limit': self.search_client.rate_limiter.quota(),
+            'response_cache': self.search_client.response_cache.stats() if self.search_client.response_cache else {}
+        }
+
+        filtered_results = filter_store(tweet_store, search_results['users'], filter_spec=self.filter_spec)
+        return search_results, filtered_results
@@ -1,11 +1,7 @@
 import os
 import json
-import time
-from datetime import datetime
-from typing import Dict, Any, List
 from crewai import Crew, Flow
 from crewai.flow.flow import listen, start
-from pydantic import BaseModel, Field
 from loguru import logger
 import litellm
 
@@ -16,26 +12,39 @@ from tasks import (
     create_user_filtering_task,
     create_json_formatting_task
 )
-from tools import TwitterSearchTool, UserFilterTool
+from tools import TwitterSearchTool, UserFilterTool, ResponseCache, FilterSpec
+from .base_flow import BaseFinancialFlow, FlowState
+from .llm_cache import CachedCompletion
+from .profiling import profiled_stage
 
 
-class FlowState(BaseModel):
-    """State management for the Twitter Financial Flow"""
-    keywords: str = ""
-    raw_search_results: Dict[str, Any] = Field(default_factory=dict)
-    filtered_results: Dict[str, Any] = Field(default_factory=dict)
-    final_json: str = ""
-    processing_start_time: float = Field(default_factory=time.time)
-    statistics: Dict[str, Any] = Field(default_factory=dict)
-
-
-class TwitterFinancialFlow(Flow[FlowState]):
+class TwitterFinancialFlow(BaseFinancialFlow, Flow[FlowState]):
     """CrewAI Flow for finding Twitter users posting about US financial markets"""
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, use_llm_crews: bool = False, incremental: bool = False, backfill_timelines: bool = False,
+                 keywords: str = None, profile_dir: str = None, max_results: int = 100,
+                 crawl_workers: int = 0, filter_spec: FilterSpec = None):
+        """
+        Args:
+            use_llm_crews: Route search and filtering through CrewAI agents instead
+                of calling the tools directly on structured data
+            incremental: Only fetch tweets newer than the stored per-query checkpoints
+                and merge them into the locally stored 2-week history
+            backfill_timelines: Fetch the 2-week timeline of every author above the
+                follower threshold instead of counting only keyword-matched tweets
+            keywords: Search keywords to use instead of running the keyword agent
+            profile_dir: Write per-stage cProfile and tracemalloc dumps to this directory
+            max_results: Maximum number of tweets to fetch per run, split across query shards
+            crawl_workers: Search with this many worker processes per bearer token
+                (TWITTER_BEARER_TOKENS) instead of in-process threads; 0 disables
+            filter_spec: Criteria users must meet (default: 5000+ followers, 5+ tweets in 2 weeks)
+        """
+        self.use_llm_crews = use_llm_crews
+        Flow.__init__(self)
+        BaseFinancialFlow.__init__(
+            self, incremental, backfill_timelines, keywords, profile_dir, max_results, crawl_workers, filter_spec
+        )
         self.setup_llm()
-        self.setup_tools()
         self.setup_agents()
         
     def setup_llm(self):
@@ -44,6 +53,19 @@ class TwitterFinancialFlow(Flow[FlowState]):
             # Use OpenAI GPT-4 as default, but can be configured via environment
             model = os.getenv('LITELLM_MODEL', 'gpt-4')
             self.llm = litellm.completion
+            
+            # Serve repeated prompts (e.g. the static keyword task) from a local cache
+            cache_path = os.getenv('LLM_CACHE_PATH', '.cache/llm_responses.sqlite')
+            if cache_path:
+                self.llm = CachedCompletion(
+                    litellm.completion,
+                    ResponseCache(
+                        cache_path,
+                        ttl_seconds=int(os.getenv('LLM_CACHE_TTL', '86400')),
+                        max_bytes=int(os.getenv('LLM_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+                    ),
+                    default_model=model
+                )
             logger.info(f"LiteLLM initialized with model: {model}")
         except Exception as e:
             logger.error(f"Failed to initialize LiteLLM: {e}")
@@ -51,13 +73,10 @@ class TwitterFinancialFlow(Flow[FlowState]):
     
     def setup_tools(self):
         """Initialize Twitter tools"""
-        try:
-            self.twitter_search_tool = TwitterSearchTool()
-            self.user_filter_tool = UserFilterTool()
-            logger.info("Twitter tools initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Twitter tools: {e}")
-            raise
+        super().setup_tools()
+        # The agents' tools share the flow's client, caches and rate limiter
+        self.twitter_search_tool = TwitterSearchTool(search_client=self.twitter_client)
+        self.user_filter_tool = UserFilterTool(filter_spec=self.filter_spec)
     
     def setup_agents(self):
         """Initialize CrewAI agents"""
@@ -70,9 +89,25 @@ class TwitterFinancialFlow(Flow[FlowState]):
             logger.error(f"Failed to initialize agents: {e}")
             raise
 
+    def begin_run(self) -> None:
+        super().begin_run()
+        if isinstance(getattr(self, 'llm', None), CachedCompletion):
+            self.llm.reset_usage()
+    
+    def run_statistics(self):
+        """Stage timings, API request metrics and LLM token usage of the current run"""
+        run_statistics = super().run_statistics()
+        if isinstance(self.llm, CachedCompletion):
+            run_statistics["llm_usage"] = self.llm.usage()
+        return run_statistics
+    
     @start()
+    @profiled_stage("generate_keywords")
     def generate_keywords(self) -> FlowState:
         """Step 1: Generate financial market keywords"""
+        if self.keywords:
+            return super().generate_keywords()
+        
         logger.info("Starting keyword generation...")
         
         try:
@@ -94,7 +129,7 @@ class TwitterFinancialFlow(Flow[FlowState]):
             
             return FlowState(
                 keywords=keywords,
-                processing_start_time=time.time()
+                processing_start_time=self.profiler.started_at
             )
             
         except Exception as e:
@@ -102,8 +137,12 @@ class TwitterFinancialFlow(Flow[FlowState]):
             raise
 
     @listen(generate_keywords)
+    @profiled_stage("search_users")
     def search_users(self, state: FlowState) -> FlowState:
         """Step 2: Search for Twitter users using generated keywords"""
+        if not self.use_llm_crews:
+            return super().search_users(state)
+        
         logger.info("Starting user search...")
         
         try:
@@ -144,15 +183,20 @@ class TwitterFinancialFlow(Flow[FlowState]):
             return state
 
     @listen(search_users)
+    @profiled_stage("filter_users")
     def filter_users(self, state: FlowState) -> FlowState:
-        """Step 3: Filter users based on criteria (5000+ followers, 5+ tweets in 2 weeks)"""
+        """Step 3: Filter users based on the filter spec (default: 5000+ followers, 5+ tweets in 2 weeks)"""
+        if not self.use_llm_crews:
+            return super().filter_users(state)
+        
         logger.info("Starting user filtering...")
         
         try:
             # Create filtering task
             filter_task = create_user_filtering_task(
                 self.search_agent,
-                [self.user_filter_tool]
+                [self.user_filter_tool],
+                self.filter_spec
             )
             
             # Create crew for filtering
@@ -184,13 +228,20 @@ class TwitterFinancialFlow(Flow[FlowState]):
             return state
 
     @listen(filter_users)
+    @profiled_stage("format_to_json")
     def format_to_json(self, state: FlowState) -> FlowState:
         """Step 4: Format results to JSON with statistics"""
+        if not self.use_llm_crews:
+            state = super().format_to_json(state)
+            if isinstance(self.llm, CachedCompletion):
+                state.statistics["llm_cache"] = self.llm.stats()
+            return state
+        
         logger.info("Starting JSON formatting...")
         
         try:
-            # Calculate processing time
-            processing_time = time.time() - state.processing_start_time
+            processing_time = self.start_statistics(state)
+            timestamp = state.statistics["timestamp"]
             
             # Create formatting task
             format_task = create_json_formatting_task(self.formatter_agent)
@@ -208,7 +259,7 @@ class TwitterFinancialFlow(Flow[FlowState]):
                 "search_results": state.raw_search_results,
                 "filtered_results": state.filtered_results,
                 "processing_time": processing_time,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": timestamp
             }
             
             # Execute formatting
@@ -220,14 +271,6 @@ class TwitterFinancialFlow(Flow[FlowState]):
             else:
                 final_json = str(result)
             
-            # Update statistics
-            state.statistics = {
-                "processing_time_seconds": processing_time,
-                "timestamp": datetime.now().isoformat(),
-                "keywords_used": state.keywords,
-                "status": "completed"
-            }
-            
             state.final_json = final_json
             
             logger.info(f"JSON formatting completed in {processing_time:.2f} seconds")
@@ -238,89 +281,6 @@ class TwitterFinancialFlow(Flow[FlowState]):
             state.final_json = json.dumps({"error": str(e)})
             return state
 
-    def save_results(self, state: FlowState, output_file: str = None) -> str:
-        """Save the final JSON results to file"""
-        try:
-            if not output_file:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_file = f"twitter_financial_users_{timestamp}.json"
-            
-            # Ensure the final_json is valid JSON
-            try:
-                if isinstance(state.final_json, str):
-                    json_data = json.loads(state.final_json)
-                else:
-                    json_data = state.final_json
-            except json.JSONDecodeError:
-                # If parsing fails, create a structured output
-                json_data = {
-                    "metadata": {
-                        "timestamp": state.statistics.get("timestamp", datetime.now().isoformat()),
-                        "processing_time_seconds": state.statistics.get("processing_time_seconds", 0),
-                        "search_keywords": state.keywords,
-                        "status": "completed_with_parsing_issues"
-                    },
-                    "raw_output": state.final_json,
-                    "statistics": state.statistics
-                }
-            
-            # Save to file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f"Results saved to {output_file}")
-            return output_file
-            
-        except Exception as e:
-            logger.error(f"Error saving results: {e}")
-            raise
-
-    def run_flow(self, output_file: str = None) -> str:
-        """Execute the complete flow with guardrails"""
-        try:
-            logger.info("Starting Twitter Financial Flow...")
-            
-            # Execute the flow
-            final_state = self.kickoff()
-            
-            # Save results
-            output_path = self.save_results(final_state, output_file)
-            
-            # Log completion statistics
-            logger.info("Flow completed successfully!")
-            logger.info(f"Processing time: {final_state.statistics.get('processing_time_seconds', 0):.2f} seconds")
-            logger.info(f"Output saved to: {output_path}")
-            
-            return output_path
-            
-        except Exception as e:
-            logger.error(f"Flow execution failed: {e}")
-            raise
-
-
-# Guardrails and validation functions
-def validate_environment():
-    """Validate required environment variables"""
-    required_vars = ['TWITTER_BEARER_TOKEN']
-    missing_vars = []
-    
-    for var in required_vars:
-        if not os.getenv(var):
-            missing_vars.append(var)
-    
-    if missing_vars:
-        raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
-    
-    logger.info("Environment validation passed")
-
-
-def validate_api_access():
-    """Validate API access before running flow"""
-    try:
-        # Test Twitter API access
-        twitter_tool = TwitterSearchTool()
-        logger.info("Twitter API access validated")
-        return True
-    except Exception as e:
-        logger.error(f"API validation failed: {e}")
-        return False
+    def run_steps(self) -> FlowState:
+        """Run the steps as a CrewAI flow"""
+        return self.kickoff()
@@ -3,43 +3,102 @@
 CrowdWisdomTrading AI Agent - Twitter Financial Markets User Finder
 
 This script uses CrewAI to find Twitter/X creators posting about US financial markets.
-It filters users with 5000+ followers who posted 5+ tweets in the last 2 weeks.
+By default it keeps users with 5000+ followers who posted 5+ tweets in the last 2 weeks;
+--filter-spec and --filter change the criteria.
 
 Usage:
     python main.py [--output filename.json]
+    python main.py --daemon --interval 900
+    python main.py --no-llm --keywords "SPY QQQ earnings"
+    python main.py --filter-spec filters.yaml --filter verified=true
 
 Requirements:
     - Twitter API Bearer Token (set in .env file)
     - OpenAI API Key or other LLM provider (set in .env file)
 """
 
+import time
+
+# Taken first so --startup-report covers every import below
+PROCESS_START = time.perf_counter()
+
 import os
 import sys
 import argparse
-from datetime import datetime
-from dotenv import load_dotenv
+from contextlib import contextmanager
 from loguru import logger
 
-# Configure logging
-logger.remove()
-logger.add(
-    sys.stdout,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-    level="INFO"
-)
-logger.add(
-    "logs/twitter_financial_flow_{time:YYYY-MM-DD}.log",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-    level="DEBUG",
-    rotation="1 day",
-    retention="7 days"
-)
+# Modules worth naming in the startup report when they end up loaded
+HEAVY_MODULES = ('crewai', 'crewai_tools', 'litellm', 'tweepy', 'numpy', 'pyarrow', 'pandas')
+
+
+class StartupTimer:
+    """Wall time and number of newly imported modules per startup phase"""
+    
+    def __init__(self):
+        self.phases = []
+    
+    @contextmanager
+    def phase(self, name: str):
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start, len(sys.modules) - modules_before))
+    
+    def report(self):
+        logger.info("Startup timing (use python -X importtime for per-module detail):")
+        for name, seconds, modules in self.phases:
+            logger.info(f"  {name:<24} {seconds * 1000:8.1f} ms  {modules:5d} modules imported")
+        logger.info(f"  {'total since start':<24} {(time.perf_counter() - PROCESS_START) * 1000:8.1f} ms  {len(sys.modules):5d} modules loaded")
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        logger.info(f"  heavy packages loaded: {', '.join(loaded) or 'none'}")
+
 
-from flow import TwitterFinancialFlow, validate_environment, validate_api_access
+def parse_filter_overrides(assignments):
+    """Turn --filter KEY=VALUE arguments into FilterSpec fields; values are parsed as JSON when possible"""
+    import json
+    overrides = {}
+    for assignment in assignments:
+        key, separator, value = assignment.partition("=")
+        if not separator or not key:
+            raise ValueError(f"--filter expects KEY=VALUE, got {assignment!r}")
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+        if key == "languages" and isinstance(value, str):
+            value = [language.strip() for language in value.split(",") if language.strip()]
+        overrides[key.replace("-", "_")] = value
+    return overrides
+
+
+def configure_logging(verbose: bool = False):
+    """Log to stdout and a daily rotated file, or only to stdout at DEBUG level when verbose"""
+    logger.remove()
+    if verbose:
+        logger.add(sys.stdout, level="DEBUG")
+        return
+    
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+    os.makedirs("logs", exist_ok=True)
+    logger.add(
+        "logs/twitter_financial_flow_{time:YYYY-MM-DD}.log",
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+        level="DEBUG",
+        rotation="1 day",
+        retention="7 days"
+    )
 
 
 def main():
     """Main execution function"""
+    timer = StartupTimer()
     parser = argparse.ArgumentParser(
         description="Find Twitter users posting about US financial markets using CrewAI"
     )
@@ -47,7 +106,19 @@ def main():
         "--output", 
         "-o", 
         type=str, 
-        help="Output JSON filename (default: auto-generated with timestamp)"
+        help="Output filename (default: auto-generated with timestamp)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "ndjson", "parquet"],
+        default="json",
+        help="Output format: one JSON document, one user per line plus a .meta.json sidecar, "
+             "or users/tweets Parquet tables partitioned by run (--output is then a directory)"
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["gzip", "zstd"],
+        help="Compress NDJSON output (zstd requires the zstandard package)"
     )
     parser.add_argument(
         "--verbose", 
@@ -55,32 +126,195 @@ def main():
         action="store_true", 
         help="Enable verbose logging"
     )
+    parser.add_argument(
+        "--llm-crews",
+        action="store_true",
+        help="Run search and filtering through CrewAI agents instead of calling the tools directly"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only fetch tweets newer than the previous run and merge them into the stored history"
+    )
+    parser.add_argument(
+        "--backfill-timelines",
+        action="store_true",
+        help="Measure 2-week activity from the full timelines of authors above the follower threshold"
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Overlap search, filtering and output instead of running the steps one after another"
+    )
+    parser.add_argument(
+        "--no-llm",
+        action="store_true",
+        help="Skip the keyword agent and use --keywords or the built-in list; never imports crewai or litellm"
+    )
+    parser.add_argument(
+        "--keywords",
+        type=str,
+        help="Search keywords to use instead of generating them with the keyword agent"
+    )
+    parser.add_argument(
+        "--max-results",
+        type=int,
+        default=100,
+        help="Maximum number of tweets to fetch per run, split across query shards (default: 100)"
+    )
+    parser.add_argument(
+        "--filter-spec",
+        type=str,
+        metavar="PATH",
+        help="YAML or JSON file with the filter criteria (followers, tweets, posts per week, engagement, "
+             "verified, languages, window_days)"
+    )
+    parser.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Override one filter criterion, e.g. --filter min_followers=10000 --filter languages=en,es (repeatable)"
+    )
+    parser.add_argument(
+        "--crawl-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Search with N worker processes per bearer token in TWITTER_BEARER_TOKENS (default: 0, in-process)"
+    )
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="Log time spent in each startup phase before the first run"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="profiles",
+        metavar="DIR",
+        help="Write a cProfile dump and tracemalloc snapshot per flow stage to DIR (default: profiles)"
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and rerun the flow every --interval seconds with incremental state"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        help="Seconds between scheduled runs (implies --daemon; default: 900)"
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        help="Maximum random delay added to each interval (default: 10%% of the interval)"
+    )
+    parser.add_argument(
+        "--max-runs",
+        type=int,
+        help="Stop the daemon after this many runs"
+    )
     
-    args = parser.parse_args()
+    with timer.phase("parse arguments"):
+        args = parser.parse_args()
     
-    if args.verbose:
-        logger.remove()
-        logger.add(sys.stdout, level="DEBUG")
+    if args.compression and args.format != "ndjson":
+        parser.error("--compression requires --format ndjson")
+    if args.no_llm and args.llm_crews:
+        parser.error("--no-llm cannot be combined with --llm-crews")
+    
+    daemon = args.daemon or args.interval is not None
+    interval = args.interval if args.interval is not None else 900
+    if daemon and interval <= 0:
+        parser.error("--interval must be positive")
+    if args.crawl_workers < 0:
+        parser.error("--crawl-workers cannot be negative")
+    if args.crawl_workers and args.streaming:
+        parser.error("--crawl-workers cannot be combined with --streaming")
+    
+    with timer.phase("configure logging"):
+        configure_logging(args.verbose)
+    
+    with timer.phase("load filter spec"):
+        from tools.filter_spec import FilterSpec
+        try:
+            filter_overrides = parse_filter_overrides(args.filter)
+            if args.filter_spec:
+                filter_spec = FilterSpec.from_file(args.filter_spec, **filter_overrides)
+            else:
+                filter_spec = FilterSpec(**filter_overrides)
+        except (OSError, ValueError, ImportError) as e:
+            parser.error(f"Invalid filter criteria: {e}")
     
     try:
         # Load environment variables
+        from dotenv import load_dotenv
         load_dotenv()
         logger.info("Environment variables loaded")
         
+        # Imported here so --help and argument errors don't pay for the flow's dependencies
+        with timer.phase("import flow"):
+            from flow import BaseFinancialFlow, validate_environment, validate_api_access
+            if not args.no_llm:
+                from flow import TwitterFinancialFlow
+        
         # Validate environment and API access
         logger.info("Validating environment and API access...")
         validate_environment()
         
-        if not validate_api_access():
+        # Initialize the flow; API validation reuses its client
+        logger.info("Initializing Twitter Financial Flow...")
+        with timer.phase("initialize flow"):
+            if args.no_llm:
+                flow = BaseFinancialFlow(
+                    incremental=args.incremental or daemon,
+                    backfill_timelines=args.backfill_timelines,
+                    keywords=args.keywords,
+                    profile_dir=args.profile,
+                    max_results=args.max_results,
+                    crawl_workers=args.crawl_workers,
+                    filter_spec=filter_spec
+                )
+            else:
+                flow = TwitterFinancialFlow(
+                    use_llm_crews=args.llm_crews,
+                    incremental=args.incremental or daemon,
+                    backfill_timelines=args.backfill_timelines,
+                    keywords=args.keywords,
+                    profile_dir=args.profile,
+                    max_results=args.max_results,
+                    crawl_workers=args.crawl_workers,
+                    filter_spec=filter_spec
+                )
+        
+        with timer.phase("validate API access"):
+            api_ok = validate_api_access(flow.twitter_client)
+        if not api_ok:
             logger.error("API validation failed. Please check your credentials.")
             sys.exit(1)
         
-        # Initialize and run the flow
-        logger.info("Initializing Twitter Financial Flow...")
-        flow = TwitterFinancialFlow()
+        if args.startup_report:
+            timer.report()
         
         # Execute the complete workflow
-        output_file = flow.run_flow(args.output)
+        if daemon:
+            logger.info(f"Running as daemon every {interval:.0f} seconds")
+            output_paths = flow.run_scheduled(
+                interval,
+                jitter_seconds=args.jitter if args.jitter is not None else interval * 0.1,
+                max_runs=args.max_runs,
+                streaming=args.streaming,
+                output_file=args.output,
+                output_format=args.format,
+                codec=args.compression
+            )
+            logger.success(f"✅ Daemon stopped after {len(output_paths)} successful runs")
+            return 0
+        elif args.streaming:
+            output_file = flow.run_streaming(args.output, args.format, args.compression)
+        else:
+            output_file = flow.run_flow(args.output, args.format, args.compression)
         
         # Success message
         logger.success(f"✅ Flow completed successfully!")
@@ -100,9 +334,6 @@ def main():
 
 
 if __name__ == "__main__":
-    # Create logs directory if it doesn't exist
-    os.makedirs("logs", exist_ok=True)
-    
     # Run main function
     exit_code = main()
     sys.exit(exit_code)
@@ -1,6 +1,8 @@
 from crewai import Task
 from textwrap import dedent
 
+from tools.filter_spec import FilterSpec
+
 
 def create_user_search_task(agent, tools):
     """Create task for searching Twitter users"""
@@ -32,19 +34,20 @@ def create_user_search_task(agent, tools):
     )
 
 
-def create_user_filtering_task(agent, tools):
-    """Create task for filtering users based on criteria"""
+def create_user_filtering_task(agent, tools, filter_spec=None):
+    """Create task for filtering users based on the criteria in filter_spec"""
+    filter_spec = filter_spec or FilterSpec()
+    steps = filter_spec.describe() + ["Calculate average posts per week for each user"]
+    criteria = "\n".join(f"{number}. {step}" for number, step in enumerate(steps, 1))
     return Task(
         description=dedent("""
             Filter the discovered users based on the specified criteria:
             
-            1. Minimum 5,000 followers
-            2. Posted at least 5 tweets in the last 2 weeks
-            3. Calculate average posts per week for each user
+            {criteria}
             
             Apply these filters to identify high-quality financial content creators
             who have both reach (followers) and activity (recent posts).
-        """),
+        """).format(criteria=criteria),
         expected_output=dedent("""
             Filtered user data containing:
             - Users meeting all criteria
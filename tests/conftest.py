@@ -0,0 +1,106 @@
+import os
+import re
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_twitter import FakeTwitterSession
+from tools.twitter_client import TwitterSearchClient
+
+
+class OverlappingSession(FakeTwitterSession):
+    """Serves every query shard the same tweets, as shards with overlapping keywords do"""
+
+    def request(self, method, url, params=None, **kwargs):
+        if url.endswith('/2/tweets/search/recent'):
+            self._next_tweet = int((params or {}).get('next_token', 0))
+        return super().request(method, url, params=params, **kwargs)
+
+
+class LanguageSession(FakeTwitterSession):
+    """Honours lang: operators in search queries, like the real endpoint"""
+
+    def request(self, method, url, params=None, **kwargs):
+        response = super().request(method, url, params=params, **kwargs)
+        languages = re.findall(r'lang:(\w+)', str((params or {}).get('query', '')))
+        if languages and url.endswith('/2/tweets/search/recent') and response.status_code == 200:
+            body = response.json()
+            body['data'] = [tweet for tweet in body.get('data', []) if tweet['lang'] in languages]
+            authors = {tweet['author_id'] for tweet in body['data']}
+            users = body.get('includes', {}).get('users', [])
+            body['includes'] = {'users': [user for user in users if user['id'] in authors]}
+            response._content = json.dumps(body).encode()
+        return response
+
+
+@pytest.fixture
+def language_session():
+    return LanguageSession(tweets=1000, users=50, seed=8)
+
+
+@pytest.fixture
+def overlapping_session():
+    return OverlappingSession(tweets=200, users=30, seed=2)
+
+
+@pytest.fixture
+def fake_session():
+    return FakeTwitterSession(tweets=500, seed=1)
+
+
+@pytest.fixture
+def search_client(fake_session):
+    """A TwitterSearchClient answering from the fake API, without any on-disk caches"""
+    return TwitterSearchClient(session=fake_session, bearer_token='test-token')
+
+
+@pytest.fixture
+def flow_environment(monkeypatch, tmp_path):
+    """Environment for a BaseFinancialFlow with every cache and state file kept in tmp_path"""
+    monkeypatch.setenv('TWITTER_BEARER_TOKEN', 'test-token')
+    monkeypatch.setenv('TWITTER_CACHE_PATH', '')
+    monkeypatch.setenv('USER_PROFILE_CACHE_PATH', '')
+    monkeypatch.setenv('CRAWL_STATE_PATH', str(tmp_path / 'crawl_state.sqlite'))
+    monkeypatch.setenv('CRAWL_SHARD_DIR', str(tmp_path / 'shards'))
+    return tmp_path
+
+
+class IdRangeSession(FakeTwitterSession):
+    """
+    Serves search newest first and honours since_id, until_id and next_token, like the real endpoint
+
+    Only the oldest `visible_tweets` tweets exist so far; raise it to simulate new tweets being posted.
+    """
+
+    visible_tweets = None
+
+    def request(self, method, url, params=None, **kwargs):
+        if not url.endswith('/2/tweets/search/recent'):
+            return super().request(method, url, params=params, **kwargs)
+        params = params or {}
+        since_id = int(params.get('since_id', 0))
+        until_id = int(params.get('until_id', 2 ** 63 - 1))
+        visible = min(self.tweets, self.visible_tweets or self.tweets)
+        rows = [row for row in reversed(range(visible)) if since_id < int(self._tweet(row)['id']) < until_id]
+        start = int(params.get('next_token', 0))
+        end = start + int(params.get('max_results', 100))
+        meta = {'result_count': len(rows[start:end])}
+        if end < len(rows):
+            meta['next_token'] = str(end)
+        authors = sorted({int(self.tweet_authors[row]) for row in rows[start:end]})
+        body = {
+            'data': [self._tweet(row) for row in rows[start:end]],
+            'includes': {'users': [self._user(author) for author in authors]},
+            'meta': meta
+        }
+        with self._lock:
+            self.requests_served += 1
+        return self._response(200, body, url)
+
+
+@pytest.fixture
+def id_range_session():
+    return IdRangeSession(tweets=300, seed=6)
@@ -0,0 +1,85 @@
+import numpy as np
+
+from tools.activity_counters import ActivityCounters
+from tools.tweet_store import TweetStore
+
+HOUR = 3600
+DAY = 24 * HOUR
+# Hour-aligned so bucket edges are easy to reason about
+NOW = 1_750_000_000 // HOUR * HOUR
+
+
+def test_add_counts_tweets_per_user_and_window():
+    counters = ActivityCounters(window_days=14, now=NOW)
+    added = counters.add([1, 1, 2, 1], [NOW - 10, NOW - 2 * DAY, NOW - 3 * HOUR, NOW - 20 * DAY])
+
+    assert added == 3
+    assert counters.count(1) == 2
+    assert counters.count(1, days=1) == 1
+    assert counters.count(2) == 1
+    assert counters.count(3) == 0
+    assert counters.total() == 3
+    assert counters.avg_posts_per_week(1) == 1.0
+
+
+def test_advance_rotates_buckets_out_of_the_window():
+    counters = ActivityCounters(window_days=2, now=NOW)
+    counters.add([1, 1, 2], [NOW - DAY - HOUR, NOW - HOUR, NOW])
+
+    counters.advance(NOW + DAY)
+    assert counters.count(1) == 1
+    assert counters.count(2) == 1
+
+    counters.advance(NOW + 2 * DAY)
+    assert counters.count(1) == 0
+    assert counters.total() == 0
+    # Moving backwards is a no-op
+    counters.advance(NOW)
+    assert counters.total() == 0
+
+
+def test_newer_tweets_move_the_window_end():
+    counters = ActivityCounters(window_days=1, now=NOW)
+    counters.add([1], [NOW - 12 * HOUR])
+    counters.add([2], [NOW + DAY])
+
+    assert counters.count(1) == 0
+    assert counters.count(2) == 1
+
+
+def test_window_counts_and_compact_drop_inactive_users():
+    counters = ActivityCounters(window_days=2, now=NOW)
+    counters.add([1, 2, 2, 3], [NOW - DAY - HOUR, NOW, NOW - HOUR, NOW - HOUR])
+    counters.advance(NOW + DAY)
+
+    user_ids, counts = counters.window_counts()
+    assert dict(zip(user_ids.tolist(), counts.tolist())) == {2: 2, 3: 1}
+    _, recent = counters.window_counts(days=1 / 24)
+    assert recent.tolist() == [0, 0]
+
+    assert counters.compact() == 1
+    assert len(counters) == 2
+    assert counters.count(1) == 0
+    assert counters.count(2) == 2
+    assert counters.compact() == 0
+
+    # Rows are re-used correctly after compaction
+    counters.add([1, 3], [NOW + DAY, NOW + DAY])
+    assert counters.count(1) == 1
+    assert counters.count(3) == 2
+
+
+def test_from_store_matches_a_full_rescan():
+    rng = np.random.default_rng(0)
+    tweet_store = TweetStore.from_columns(
+        tweet_ids=np.arange(1000),
+        author_ids=rng.integers(1, 50, size=1000),
+        created_at=NOW - rng.integers(0, 20 * DAY, size=1000),
+        texts=[''] * 1000
+    )
+    counters = ActivityCounters.from_store(tweet_store, window_days=14, now=NOW)
+
+    user_ids, counts = counters.window_counts()
+    since = NOW // HOUR * HOUR - 14 * DAY + HOUR
+    expected_ids, expected_counts = tweet_store.author_counts(since=since)
+    assert dict(zip(user_ids.tolist(), counts.tolist())) == dict(zip(expected_ids.tolist(), expected_counts.tolist()))
@@ -0,0 +1,115 @@
+import json
+import asyncio
+
+import pytest
+
+from benchmarks.fake_twitter import FakeTwitterSession
+from flow import BaseFinancialFlow
+from flow.streaming_pipeline import StreamingPipeline
+from tools.crawl_state import CrawlState
+from tools.filter_spec import FilterSpec
+from tools.twitter_client import ShardCursor, TwitterSearchClient, checkpoint_updates, plan_shard_cursors
+
+
+def _tweets(*tweet_ids):
+    return [{'id': str(tweet_id)} for tweet_id in tweet_ids]
+
+
+def test_plan_adds_a_cursor_per_backlog_gap():
+    cursors = plan_shard_cursors(['a', 'b'], {'a': '100'}, {'a': [[None, '50']], 'c': [['1', '2']]})
+
+    assert [(cursor.query, cursor.since_id, cursor.until_id) for cursor in cursors] == [
+        ('a', '100', None), ('b', None, None), ('a', None, '50')
+    ]
+
+
+def test_complete_ranges_advance_the_checkpoint_and_leave_no_gap():
+    cursor = ShardCursor('a', since_id='100')
+    cursor.observe(_tweets(130, 120))
+    cursor.observe(_tweets(110))
+
+    assert checkpoint_updates([cursor, ShardCursor('b')], limit=10) == ({'a': '130'}, {'a': [], 'b': []})
+
+
+def test_truncated_ranges_advance_the_checkpoint_and_keep_a_gap():
+    main = ShardCursor('a', since_id='100')
+    main.observe(_tweets(300, 290))
+    gap = ShardCursor('a', since_id=None, until_id='60')
+    gap.observe(_tweets(59, 58))
+
+    newest_ids, backlog = checkpoint_updates([main, gap], limit=2)
+
+    assert newest_ids == {'a': '300'}
+    assert backlog == {'a': [['100', '290'], [None, '58']]}
+
+
+def test_failed_ranges_keep_their_checkpoint_and_gap():
+    main = ShardCursor('a', since_id='100')
+    main.observe(_tweets(300))
+    main.failed = True
+    gap = ShardCursor('a', since_id='10', until_id='60')
+    gap.failed = True
+
+    assert checkpoint_updates([main, gap], limit=50) == ({}, {'a': [['10', '60']]})
+
+
+def _threaded_search(client, since_ids, backlog):
+    return client.search_shards(['SPY'], 50, since_ids, backlog=backlog)
+
+
+def _streaming_search(client, since_ids, backlog):
+    search_results, _ = asyncio.run(StreamingPipeline(client, FilterSpec(min_followers=0)).run('SPY', 50, since_ids, backlog))
+    return search_results
+
+
+@pytest.mark.parametrize('search', [_threaded_search, _streaming_search])
+def test_incremental_runs_fetch_what_the_limit_left_behind(tmp_path, search, id_range_session):
+    session = id_range_session
+    session.visible_tweets = 200
+    client = TwitterSearchClient(session=session, bearer_token='test-token')
+    crawl_state = CrawlState(str(tmp_path / 'crawl_state.sqlite'))
+
+    def run():
+        search_results = search(client, crawl_state.since_ids(), crawl_state.backlog())
+        crawl_state.merge_search_results(search_results['tweet_store'], search_results['users'])
+        crawl_state.update_checkpoints(search_results['newest_ids'])
+        crawl_state.update_backlog(search_results['backlog'])
+        return search_results
+
+    first = run()
+    newest = max(first['tweet_store'].tweet_ids)
+    assert len(first['tweet_store']) == 50
+    assert first['newest_ids'] == {first['search_queries'][0]: str(newest)}
+    assert list(first['backlog'].values()) == [[[None, str(min(first['tweet_store'].tweet_ids))]]]
+
+    # New tweets arrive between runs; each run fetches 50 of them plus 50 from every open gap
+    session.visible_tweets = 260
+    for _ in range(10):
+        if not any(crawl_state.backlog().values()) and len(crawl_state.load_search_results()[0]) == 260:
+            break
+        run()
+
+    tweet_store, _ = crawl_state.load_search_results()
+    assert sorted(tweet_store.tweet_ids) == sorted(int(session._tweet(row)['id']) for row in range(260))
+    assert not any(crawl_state.backlog().values())
+    crawl_state.close()
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_incremental_runs_report_the_same_totals_as_plain_runs(flow_environment, streaming):
+    def statistics(incremental):
+        flow = BaseFinancialFlow(
+            keywords='SPY QQQ earnings', max_results=300, incremental=incremental,
+            filter_spec=FilterSpec(min_followers=1000, min_tweets=2)
+        )
+        flow.twitter_client.client.session = FakeTwitterSession(tweets=300, users=40, seed=7)
+        output_file = str(flow_environment / f'{"incremental" if incremental else "plain"}.json')
+        path = flow.run_streaming(output_file) if streaming else flow.run_flow(output_file)
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['statistics']
+
+    plain, incremental = statistics(False), statistics(True)
+
+    assert incremental['search_prefilter']['pruned_tweets'] > 0
+    for key in ('total_users_found', 'total_tweets_found', 'total_users_filtered', 'filter_success_rate', 'search_prefilter'):
+        assert incremental[key] == plain[key]
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from tools.crawl_state import CrawlState, CHECKPOINT_MAX_AGE_SECONDS
+from tools.tweet_store import TweetStore
+
+
+@pytest.fixture
+def crawl_state(tmp_path):
+    state = CrawlState(str(tmp_path / 'crawl_state.sqlite'))
+    yield state
+    state.close()
+
+
+def _store(tweet_ids, author_id=1):
+    now = int(time.time())
+    return TweetStore.from_columns(
+        tweet_ids=tweet_ids,
+        author_ids=[author_id] * len(tweet_ids),
+        created_at=[now] * len(tweet_ids),
+        texts=[f'tweet {tweet_id}' for tweet_id in tweet_ids]
+    )
+
+
+def test_unseen_rows_of_an_empty_history_are_all_rows(crawl_state):
+    assert crawl_state.unseen_rows(_store([10, 11, 12])).tolist() == [0, 1, 2]
+    assert crawl_state.unseen_rows(TweetStore()).tolist() == []
+
+
+def test_unseen_rows_skips_stored_tweets(crawl_state):
+    crawl_state.merge_search_results(_store([10, 12]), {1: {'followers_count': 1}})
+
+    assert crawl_state.unseen_rows(_store([9, 10, 11, 12, 13])).tolist() == [0, 2, 4]
+    assert crawl_state.unseen_rows(_store([10, 12])).tolist() == []
+
+
+def test_unseen_rows_spans_select_batches(crawl_state):
+    crawl_state.merge_search_results(_store(list(range(0, 1200, 2))), {1: {'followers_count': 1}})
+
+    unseen = crawl_state.unseen_rows(_store(list(range(1200))))
+    assert unseen.tolist() == list(range(1, 1200, 2))
+
+
+def test_update_checkpoints_keeps_the_newest_id(crawl_state):
+    crawl_state.update_checkpoints({'a': '100', 'b': '5'})
+    crawl_state.update_checkpoints({'a': '90', 'b': '7'})
+
+    assert crawl_state.since_ids() == {'a': '100', 'b': '7'}
+
+
+def test_checkpoints_and_gaps_expire_with_the_search_window(crawl_state, monkeypatch):
+    crawl_state.update_checkpoints({'a': '100'})
+    crawl_state.update_backlog({'a': [[None, '50']]})
+    later = time.time() + CHECKPOINT_MAX_AGE_SECONDS + 60
+    monkeypatch.setattr(time, 'time', lambda: later)
+
+    assert crawl_state.since_ids() == {}
+    assert crawl_state.backlog() == {}
+    crawl_state.prune()
+    monkeypatch.undo()
+    assert crawl_state.backlog() == {}
+
+
+def test_update_backlog_replaces_the_gaps_of_the_given_queries(crawl_state):
+    crawl_state.update_backlog({'a': [[None, '50'], ['60', '80']], 'b': [['1', '9']]})
+    assert crawl_state.backlog() == {'a': [['60', '80'], [None, '50']], 'b': [['1', '9']]}
+
+    crawl_state.update_backlog({'a': [[None, '40']]})
+    assert crawl_state.backlog() == {'a': [[None, '40']], 'b': [['1', '9']]}
+
+    crawl_state.update_backlog({'b': []})
+    assert crawl_state.backlog() == {'a': [[None, '40']]}
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from tools.filter_spec import FilterSpec
+
+
+def _columns(followers, recent_tweets, languages=None, verified=None):
+    size = len(followers)
+    return {
+        'has_info': np.ones(size, dtype=bool),
+        'followers': np.asarray(followers),
+        'verified': np.asarray(verified if verified is not None else [False] * size),
+        'language': np.asarray(languages if languages is not None else ['en'] * size, dtype=object),
+        'recent_tweets': np.asarray(recent_tweets),
+        'posts_per_week': np.asarray(recent_tweets) / 2,
+        'engagement': np.zeros(size)
+    }
+
+
+def test_pipeline_runs_cheap_predicates_first():
+    spec = FilterSpec(min_followers=100, min_tweets=5, min_engagement=1.0, languages=['en'], verified=True)
+    names = [predicate.name for predicate in spec.pipeline().predicates]
+
+    assert names[0] == 'user_info'
+    assert names.index('verified') < names.index('language') < names.index('tweets') < names.index('engagement')
+    assert names.index('followers') < names.index('language')
+    assert spec.describe()[-1].startswith('At least 1.0 engagements')
+
+
+def test_evaluate_short_circuits_and_counts_each_predicate():
+    spec = FilterSpec(min_followers=100, min_tweets=5)
+    mask, statistics = spec.pipeline().evaluate(4, _columns([50, 150, 200, 300], [10, 1, 5, 9]))
+
+    assert mask.tolist() == [False, False, True, True]
+    assert statistics['passed'] == 2
+    assert statistics['failed_followers'] == 1
+    assert statistics['failed_tweets'] == 1
+    # Activity is only tested for the users that passed the follower check
+    assert statistics['predicates']['tweets'] == {'evaluated': 3, 'passed': 2, 'failed': 1}
+
+
+def test_missing_profiles_fail_before_everything_else():
+    spec = FilterSpec(min_followers=0, min_tweets=0)
+    columns = _columns([10, 10], [1, 1])
+    columns['has_info'] = np.array([True, False])
+
+    mask, statistics = spec.pipeline().evaluate(2, columns)
+
+    assert mask.tolist() == [True, False]
+    assert statistics['missing_user_info'] == 1
+    assert statistics['predicates']['followers']['evaluated'] == 1
+
+
+def test_lazy_columns_are_only_built_when_needed():
+    spec = FilterSpec(min_followers=1000, min_engagement=1.0)
+    calls = []
+
+    def engagement():
+        calls.append(True)
+        return np.ones(2)
+
+    columns = _columns([1, 2], [10, 10])
+    columns['engagement'] = engagement
+    mask, statistics = spec.pipeline().evaluate(2, columns)
+
+    assert not mask.any()
+    assert calls == []
+    assert statistics['predicates']['engagement'] == {'evaluated': 0, 'passed': 0, 'failed': 0}
+
+
+def test_equally_cheap_predicates_reorder_by_observed_pass_rate():
+    spec = FilterSpec(min_followers=100, min_tweets=None, verified=True)
+    pipeline = spec.pipeline()
+    assert [predicate.name for predicate in pipeline.predicates] == ['user_info', 'verified', 'followers']
+
+    # Everyone is verified but few have enough followers
+    pipeline.evaluate(4, _columns([1, 2, 3, 500], [0] * 4, verified=[True] * 4))
+
+    assert [predicate.name for predicate in pipeline.predicates] == ['user_info', 'followers', 'verified']
+    mask, statistics = pipeline.evaluate(4, _columns([1, 2, 3, 500], [0] * 4, verified=[True] * 4))
+    assert mask.tolist() == [False, False, False, True]
+    assert statistics['predicates']['verified']['evaluated'] == 1
+
+
+def test_languages_and_ranges():
+    spec = FilterSpec(min_followers=None, max_followers=1000, min_tweets=2, max_tweets=8, languages=['en', 'de'])
+    mask, _ = spec.pipeline().evaluate(5, _columns(
+        [10, 10, 5000, 10, 10], [2, 9, 5, 5, 5], languages=['en', 'en', 'en', 'es', 'de']
+    ))
+
+    assert mask.tolist() == [True, False, False, False, True]
+    assert spec.accepts_profile({'followers_count': 10, 'lang': 'de'})
+    assert not spec.accepts_profile({'followers_count': 10})
+
+
+def test_invalid_specs_are_rejected():
+    with pytest.raises(ValidationError):
+        FilterSpec(min_followers=10, max_followers=5)
+    with pytest.raises(ValidationError):
+        FilterSpec(min_follower=10)
+
+
+def test_from_file_with_overrides(tmp_path):
+    pytest.importorskip('yaml')
+    path = tmp_path / 'spec.yaml'
+    path.write_text('min_followers: 1000\nlanguages: [en]\nwindow_days: 7\n')
+
+    spec = FilterSpec.from_file(str(path), min_tweets=3)
+
+    assert spec.criteria() == {'min_followers': 1000, 'min_tweets': 3, 'languages': ['en'], 'window_days': 7}
+    assert spec.window_weeks == 1
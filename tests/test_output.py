@@ -0,0 +1,109 @@
+import gzip
+import json
+
+import pytest
+
+from benchmarks.fake_twitter import FakeTwitterSession
+from flow import BaseFinancialFlow
+from flow.output import NDJSONWriter, default_output_path, sidecar_path, write_sidecar
+from tools.filter_spec import FilterSpec
+
+
+def _read_lines(path, codec=None):
+    opener = gzip.open if codec == 'gzip' else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize('codec', [None, 'gzip'])
+def test_ndjson_writer_writes_one_record_per_line(tmp_path, codec):
+    path = str(tmp_path / default_output_path('ndjson', codec))
+    records = [{'username': 'a', 'followers': 1}, {'username': 'é', 'followers': 2}]
+
+    with NDJSONWriter(path, codec) as writer:
+        writer.write_all(records)
+        assert writer.records_written == 2
+
+    assert _read_lines(path, codec) == records
+
+
+def test_ndjson_writer_rejects_unknown_codecs(tmp_path):
+    with pytest.raises(ValueError):
+        NDJSONWriter(str(tmp_path / 'out.ndjson.bz2'), 'bzip2')
+
+
+def test_sidecar_holds_everything_but_the_users(tmp_path):
+    output_file = str(tmp_path / 'run.ndjson.gz')
+    document = {'metadata': {'search_keywords': 'SPY'}, 'users': [{'username': 'a'}], 'statistics': {'total_users_found': 1}}
+
+    path = write_sidecar(output_file, document)
+
+    assert path == sidecar_path(output_file) == str(tmp_path / 'run.meta.json')
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {'metadata': {'search_keywords': 'SPY'}, 'statistics': {'total_users_found': 1}}
+
+
+def _flow():
+    flow = BaseFinancialFlow(
+        keywords='SPY QQQ earnings', max_results=400, filter_spec=FilterSpec(min_followers=1000, min_tweets=3)
+    )
+    flow.twitter_client.client.session = FakeTwitterSession(tweets=400, users=40, seed=3)
+    return flow
+
+
+def _apply_stream_block(lines, stream):
+    """What a consumer tailing the file ends up with once the sidecar arrives"""
+    users = {line['url']: line for line in lines if line['url'] not in stream['retracted']}
+    users.update((record['url'], record) for record in stream['corrections'])
+    return sorted(users.values(), key=lambda user: user['username'])
+
+
+def test_streaming_ndjson_lines_are_written_while_the_run_goes_on(flow_environment):
+    output_file = str(flow_environment / 'stream.ndjson')
+    tailed = []
+
+    def on_record(record):
+        # The line is flushed before the next stage sees the record
+        tailed.append(_read_lines(output_file)[-1] == record)
+
+    _flow().run_streaming(output_file, 'ndjson', on_record=on_record)
+
+    assert tailed and all(tailed)
+
+
+def test_streaming_ndjson_output_adds_up_to_the_batch_run(flow_environment):
+    output_file = _flow().run_streaming(str(flow_environment / 'stream.ndjson'), 'ndjson')
+    with open(_flow().run_flow(str(flow_environment / 'batch.json')), encoding='utf-8') as f:
+        batch = json.load(f)
+
+    lines = _read_lines(output_file)
+    with open(sidecar_path(output_file), encoding='utf-8') as f:
+        sidecar = json.load(f)
+    stream = sidecar['stream']
+    assert stream['records_streamed'] > 0
+    assert stream['records_written'] == len(lines)
+    assert _apply_stream_block(lines, stream) == sorted(batch['users'], key=lambda user: user['username'])
+    assert sidecar['statistics']['total_users_filtered'] == len(batch['users'])
+    assert sidecar['statistics']['total_tweets_found'] == batch['statistics']['total_tweets_found']
+
+
+def test_streaming_ndjson_appends_users_that_qualify_after_the_search(flow_environment):
+    flow = _flow()
+    flow.backfill_timelines = True
+    output_file = flow.run_streaming(str(flow_environment / 'backfill.ndjson.gz'), 'ndjson', 'gzip')
+
+    lines = _read_lines(output_file, 'gzip')
+    with open(sidecar_path(output_file), encoding='utf-8') as f:
+        sidecar = json.load(f)
+    assert len(lines) == sidecar['stream']['records_written'] > sidecar['stream']['records_streamed']
+    assert len(_apply_stream_block(lines, sidecar['stream'])) == sidecar['statistics']['total_users_filtered']
+
+
+@pytest.mark.parametrize('output_format', ['json', 'ndjson'])
+def test_back_to_back_scheduled_runs_write_separate_files(flow_environment, monkeypatch, output_format):
+    monkeypatch.chdir(flow_environment)
+
+    output_paths = _flow().run_scheduled(0.01, max_runs=2, output_format=output_format)
+
+    assert len(set(output_paths)) == 2
+    assert all((flow_environment / path).exists() for path in output_paths)
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from tools.profile_cache import UserProfileCache
+
+
+def _profile(user_id, followers_count):
+    return {'user_id': user_id, 'username': f'user{user_id}', 'followers_count': followers_count}
+
+
+class RecordingLookup:
+    """Stand-in for TwitterSearchClient.lookup_users that serves fixed follower counts"""
+
+    def __init__(self, followers):
+        self.followers = followers
+        self.calls = []
+
+    def __call__(self, user_ids):
+        user_ids = list(user_ids)
+        self.calls.append(user_ids)
+        return {user_id: _profile(user_id, self.followers[user_id]) for user_id in user_ids}
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'profiles.sqlite')
+
+
+def test_refresh_looks_up_missing_profiles_and_records_them(cache_path):
+    cache = UserProfileCache(cache_path)
+    lookup = RecordingLookup({1: 100, 2: 200})
+    users = {1: _profile(1, 1), 2: _profile(2, 2)}
+
+    assert cache.refresh(users, lookup) == {'cached': 0, 'refreshed': 2}
+    assert lookup.calls == [[1, 2]]
+    assert users[1]['followers_count'] == 100
+    assert cache.get(2)['followers_count'] == 200
+
+    # Fresh entries are served from the cache, also after a reload from disk
+    users = {1: _profile(1, 1), 2: _profile(2, 2)}
+    assert UserProfileCache(cache_path).refresh(users, lookup) == {'cached': 2, 'refreshed': 0}
+    assert len(lookup.calls) == 1
+    assert users[2]['followers_count'] == 200
+
+
+def test_refresh_looks_up_profiles_past_the_ttl(cache_path):
+    cache = UserProfileCache(cache_path, ttl_seconds=3600)
+    cache.record({1: _profile(1, 100)}, seen_at=time.time() - 7200)
+    cache.record({2: _profile(2, 200)})
+    lookup = RecordingLookup({1: 150, 2: 250})
+    users = {1: _profile(1, 100), 2: _profile(2, 200)}
+
+    assert cache.refresh(users, lookup) == {'cached': 1, 'refreshed': 1}
+    assert lookup.calls == [[1]]
+    assert users == {1: _profile(1, 150), 2: _profile(2, 200)}
+    assert cache.stats() == {'entries': 2, 'hits': 1, 'refreshed': 1}
+
+
+def test_refresh_uses_the_boundary_ttl_near_the_threshold(cache_path):
+    cache = UserProfileCache(cache_path, ttl_seconds=86400, boundary_ttl_seconds=600, boundary_margin=0.1)
+    seen_at = time.time() - 1200
+    # 4,700 is within 10% of 5,000; 1,000 and 20,000 are not
+    cache.record({1: _profile(1, 4700), 2: _profile(2, 1000), 3: _profile(3, 20000)}, seen_at=seen_at)
+    lookup = RecordingLookup({1: 5100})
+    users = {user_id: cache.get(user_id) for user_id in (1, 2, 3)}
+
+    assert cache.refresh(users, lookup, min_followers=5000) == {'cached': 2, 'refreshed': 1}
+    assert lookup.calls == [[1]]
+    assert users[1]['followers_count'] == 5100
+    # Without a threshold only the regular TTL applies
+    assert not cache.needs_refresh(2)
+
+
+def test_refresh_picks_up_profiles_recorded_by_other_processes(cache_path):
+    cache = UserProfileCache(cache_path)
+    UserProfileCache(cache_path).record({1: _profile(1, 300)})
+    lookup = RecordingLookup({})
+    users = {1: _profile(1, 1)}
+
+    assert cache.refresh(users, lookup) == {'cached': 1, 'refreshed': 0}
+    assert lookup.calls == []
+    assert users[1]['followers_count'] == 300
+
+
+def test_refresh_keeps_the_language_the_lookup_does_not_return(cache_path):
+    cache = UserProfileCache(cache_path, boundary_ttl_seconds=0)
+    cache.record({1: {**_profile(1, 4900), 'lang': 'en'}, 2: {**_profile(2, 50000), 'lang': 'es'}})
+    lookup = RecordingLookup({1: 5200})
+    # Profiles stored without a language (e.g. loaded from older crawl history)
+    users = {1: _profile(1, 4900), 2: _profile(2, 50000)}
+
+    cache.refresh(users, lookup, min_followers=5000)
+
+    assert lookup.calls == [[1]]
+    assert users[1] == {**_profile(1, 5200), 'lang': 'en'}
+    assert users[2]['lang'] == 'es'
+    assert cache.get(1)['lang'] == 'en'
+    assert UserProfileCache(cache_path).get(1) == {**_profile(1, 5200), 'lang': 'en'}
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from flow import BaseFinancialFlow
+from tools.filter_spec import FilterSpec
+from tools.query_builder import build_query_shards
+
+
+def test_queries_search_every_language_without_a_language_criterion():
+    assert build_query_shards('SPY QQQ') == ['(SPY OR QQQ) -is:retweet']
+    assert build_query_shards('SPY', filter_spec=FilterSpec()) == ['(SPY) -is:retweet']
+
+
+def test_queries_are_limited_to_the_spec_languages():
+    assert build_query_shards('SPY', filter_spec=FilterSpec(languages=['es'])) == ['(SPY) -is:retweet lang:es']
+    assert build_query_shards('SPY', filter_spec=FilterSpec(languages=['en', 'es'])) == [
+        '(SPY) -is:retweet (lang:en OR lang:es)'
+    ]
+
+
+def test_the_language_operator_counts_against_the_query_length():
+    shards = build_query_shards('alpha beta gamma delta', 60, FilterSpec(languages=['en', 'es', 'de']))
+
+    assert len(shards) > 1
+    assert all(len(shard) <= 60 for shard in shards)
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_a_non_english_language_filter_finds_its_authors(flow_environment, language_session, streaming):
+    flow = BaseFinancialFlow(
+        keywords='SPY QQQ earnings', max_results=1000,
+        filter_spec=FilterSpec(min_followers=0, min_tweets=1, languages=['es'])
+    )
+    flow.twitter_client.client.session = language_session
+    output_file = str(flow_environment / 'es.json')
+
+    with open(flow.run_streaming(output_file) if streaming else flow.run_flow(output_file), encoding='utf-8') as f:
+        output = json.load(f)
+
+    assert all(query.endswith('lang:es') for query in output['metadata']['search_queries'])
+    assert output['users']
+    assert output['statistics']['filter_breakdown']['failed_language'] == 0
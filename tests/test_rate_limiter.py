@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from tools.rate_limiter import RateLimitScheduler
+
+
+def _headers(limit, remaining, reset):
+    return {'x-rate-limit-limit': str(limit), 'x-rate-limit-remaining': str(remaining), 'x-rate-limit-reset': str(reset)}
+
+
+@pytest.mark.parametrize('quota_share', [1.0, 0.5])
+def test_exhausted_quota_blocks_until_the_reset(quota_share):
+    scheduler = RateLimitScheduler(quota_share=quota_share)
+    reset = int(time.time()) + 1
+    scheduler.record_response('search_recent_tweets', _headers(450, 0, reset))
+
+    bucket = scheduler.bucket('search_recent_tweets').snapshot()
+    assert bucket['remaining'] == 0
+    assert bucket['reset_at'] == reset
+
+    scheduler.acquire('search_recent_tweets')
+    assert time.time() >= reset
+    assert scheduler.total_wait_seconds > 0
+
+
+def test_quota_share_scales_the_reported_quota():
+    scheduler = RateLimitScheduler(quota_share=0.25)
+    scheduler.record_response('search_recent_tweets', _headers(450, 200, int(time.time()) + 900))
+
+    bucket = scheduler.bucket('search_recent_tweets').snapshot()
+    assert bucket['limit'] == 112
+    assert bucket['remaining'] == 50
+    assert bucket['reset_at'] is None
+
+
+def test_a_small_share_keeps_at_least_one_request_per_window():
+    scheduler = RateLimitScheduler(quota_share=0.1)
+    scheduler.record_response('get_users', _headers(5, 5, int(time.time()) + 900))
+
+    assert scheduler.bucket('get_users').capacity == 1
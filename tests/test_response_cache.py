@@ -0,0 +1,35 @@
+from benchmarks.fake_twitter import FakeTwitterSession
+from flow import BaseFinancialFlow
+from tools.filter_spec import FilterSpec
+from tools.response_cache import ResponseCache
+
+
+def test_reset_stats_zeroes_the_counters_but_keeps_the_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    cache.set('/2/users', {'ids': '1'}, {'data': []})
+    cache.get('/2/users', {'ids': '1'})
+    cache.get('/2/users', {'ids': '2'})
+
+    cache.reset_stats()
+
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'entries': 1, 'size_bytes': cache.stats()['size_bytes']}
+    assert cache.get('/2/users', {'ids': '1'}) == {'data': []}
+
+
+def test_each_run_reports_its_own_cache_statistics(flow_environment, monkeypatch):
+    monkeypatch.setenv('TWITTER_CACHE_PATH', str(flow_environment / 'responses.sqlite'))
+    flow = BaseFinancialFlow(keywords='SPY QQQ earnings', max_results=300, filter_spec=FilterSpec(min_followers=1000))
+    flow.twitter_client.client.session = FakeTwitterSession(tweets=300, users=40, seed=9)
+
+    runs = []
+    for _ in range(2):
+        flow.begin_run()
+        state = flow.run_steps()
+        flow.finish_run(state)
+        runs.append(state.statistics)
+
+    first, second = (statistics['response_cache'] for statistics in runs)
+    assert first['hits'] == 0 and first['misses'] > 0
+    # The rerun is served entirely from the cache, and its counts don't include the first run's misses
+    assert second == {**second, 'hits': first['misses'], 'misses': 0, 'hit_rate': 1.0}
+    assert runs[1]['api_requests']['total_calls'] == 0
@@ -0,0 +1,98 @@
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from benchmarks.fake_twitter import FakeTwitterSession
+from flow import BaseFinancialFlow
+from tools import sharded_crawl, twitter_client
+from tools.request_metrics import RequestMetrics
+
+
+class ForkPoolExecutor(ProcessPoolExecutor):
+    """Forked workers inherit the patched fake API; spawned ones would start from scratch"""
+
+    def __init__(self, max_workers=None, mp_context=None):
+        super().__init__(max_workers, mp_context=multiprocessing.get_context('fork'))
+
+
+@pytest.fixture
+def sharded_environment(flow_environment, monkeypatch):
+    session = FakeTwitterSession(tweets=2000, seed=4)
+    monkeypatch.setenv('TWITTER_BEARER_TOKENS', 'token-a,token-b')
+    monkeypatch.setattr(twitter_client, 'shared_session', lambda: session)
+    monkeypatch.setattr(sharded_crawl, 'ProcessPoolExecutor', ForkPoolExecutor)
+    return flow_environment
+
+
+def test_request_metrics_merge_adds_samples():
+    worker, parent = RequestMetrics(), RequestMetrics()
+    worker.record('search_recent_tweets', 0.2, size=100)
+    worker.record('search_recent_tweets', 0.4, size=50, error=True)
+    parent.record('get_users', 0.1, size=10)
+
+    parent.merge(worker.snapshot())
+
+    summary = parent.summary()
+    assert summary['total_calls'] == 3
+    assert summary['total_bytes_downloaded'] == 160
+    assert summary['endpoints']['search_recent_tweets']['errors'] == 1
+
+
+def test_sharded_run_reports_worker_api_statistics(sharded_environment):
+    flow = BaseFinancialFlow(
+        keywords=' '.join(f'ticker{index}' for index in range(200)), max_results=2000, crawl_workers=2
+    )
+
+    with open(flow.run_flow(str(sharded_environment / 'run.json')), encoding='utf-8') as f:
+        statistics = json.load(f)['statistics']
+
+    search_calls = statistics['api_requests']['endpoints']['search_recent_tweets']['calls']
+    assert search_calls > 0
+    assert statistics['profile']['stages']['search_users']['api_calls'] >= search_calls
+    assert flow.twitter_client.request_metrics.total_calls() == statistics['api_requests']['total_calls']
+
+
+def test_sharded_search_merges_worker_quotas(sharded_environment):
+    metrics = RequestMetrics()
+    crawler = sharded_crawl.ShardedCrawler(
+        store_dir=str(sharded_environment / 'shards'), workers_per_token=2, request_metrics=metrics
+    )
+
+    search_results = crawler.search(' '.join(f'ticker{index}' for index in range(200)), max_results=2000)
+
+    assert len(search_results['workers']) == 4
+    search_quota = search_results['rate_limit']['endpoints']['search_recent_tweets']
+    assert search_quota['requests_made'] == metrics.summary()['endpoints']['search_recent_tweets']['calls']
+    assert search_quota['requests_made'] == sum(
+        worker['api_requests']['endpoints']['search_recent_tweets']['calls'] for worker in search_results['workers']
+    )
+    assert search_results['rate_limit']['rate_limited_responses'] == 0
+
+
+def test_sharded_search_counts_pruned_ids_once_across_workers(flow_environment, overlapping_session, monkeypatch):
+    monkeypatch.setenv('TWITTER_BEARER_TOKENS', 'token-a,token-b')
+    monkeypatch.setattr(twitter_client, 'shared_session', lambda: overlapping_session)
+    monkeypatch.setattr(sharded_crawl, 'ProcessPoolExecutor', ForkPoolExecutor)
+    min_followers = int(np.median(overlapping_session.followers))
+    # One shard per keyword, fetched one at a time in each worker so its copy of the page cursor isn't raced
+    crawler = sharded_crawl.ShardedCrawler(
+        store_dir=str(flow_environment / 'shards'), max_query_length=30, client_options={'max_concurrency': 1}
+    )
+
+    search_results = crawler.search('SPY QQQ earnings', max_results=600, min_followers=min_followers)
+
+    assert len(search_results['workers']) == 2
+    pruned_rows = [
+        row for row in range(overlapping_session.tweets)
+        if overlapping_session.followers[overlapping_session.tweet_authors[row]] < min_followers
+    ]
+    assert search_results['prefilter'] == {
+        'min_followers': min_followers,
+        'pruned_authors': len({int(overlapping_session.tweet_authors[row]) for row in pruned_rows}),
+        'pruned_tweets': len(pruned_rows)
+    }
+    assert search_results['total_tweets_found'] == overlapping_session.tweets
+    assert 'pruned_tweet_ids' not in search_results
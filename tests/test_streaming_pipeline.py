@@ -0,0 +1,54 @@
+import json
+import asyncio
+
+import numpy as np
+
+from benchmarks.fake_twitter import FakeTwitterSession
+from flow import BaseFinancialFlow
+from flow.streaming_pipeline import StreamingPipeline
+from tools.filter_spec import FilterSpec
+from tools.twitter_client import TwitterSearchClient
+
+
+def _run(output_file, streaming, **options):
+    flow = BaseFinancialFlow(
+        keywords='SPY QQQ earnings', max_results=300,
+        filter_spec=FilterSpec(min_followers=1000, min_tweets=8), **options
+    )
+    flow.twitter_client.client.session = FakeTwitterSession(tweets=300, users=60, seed=5)
+    path = flow.run_streaming(output_file) if streaming else flow.run_flow(output_file)
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_streaming_run_backfills_timelines(flow_environment):
+    streamed = _run(str(flow_environment / 'stream.json'), streaming=True, backfill_timelines=True)
+    batch = _run(str(flow_environment / 'batch.json'), streaming=False, backfill_timelines=True)
+    without_backfill = _run(str(flow_environment / 'plain.json'), streaming=True)
+
+    assert streamed['statistics']['total_tweets_found'] > without_backfill['statistics']['total_tweets_found']
+    assert len(streamed['users']) > len(without_backfill['users'])
+    assert streamed['users'] == batch['users']
+    assert streamed['statistics']['total_tweets_found'] == batch['statistics']['total_tweets_found']
+
+
+def test_pruned_tweets_and_authors_are_counted_once(overlapping_session):
+    # One shard per keyword, fetched one at a time so the shared page cursor isn't raced
+    client = TwitterSearchClient(
+        max_concurrency=1, max_query_length=30, session=overlapping_session, bearer_token='test-token'
+    )
+    min_followers = int(np.median(overlapping_session.followers))
+    pipeline = StreamingPipeline(client, filter_spec=FilterSpec(min_followers=min_followers))
+
+    search_results, _ = asyncio.run(pipeline.run('SPY QQQ earnings', max_results=600))
+
+    assert len(search_results['search_queries']) > 1
+    pruned_rows = [
+        row for row in range(overlapping_session.tweets)
+        if overlapping_session.followers[overlapping_session.tweet_authors[row]] < min_followers
+    ]
+    assert search_results['prefilter']['pruned_tweets'] == len(pruned_rows)
+    assert search_results['prefilter']['pruned_authors'] == len(
+        {int(overlapping_session.tweet_authors[row]) for row in pruned_rows}
+    )
+    assert search_results['total_tweets_found'] == overlapping_session.tweets
@@ -0,0 +1,71 @@
+import numpy as np
+
+from tools import tweet_store as tweet_store_module
+from tools.tweet_store import IdIndex, TweetStore
+
+
+def _append(store, tweet_id, author_id=1):
+    return store.append(tweet_id, author_id, 1_700_000_000, f'tweet {tweet_id}', {'like_count': 2})
+
+
+def test_append_skips_duplicate_ids_across_index_merges(monkeypatch):
+    monkeypatch.setattr(tweet_store_module, '_MIN_RECENT_IDS', 4)
+    store = TweetStore()
+
+    added = [_append(store, tweet_id) for tweet_id in [5, 3, 9, 1, 7, 3, 5, 2, 8, 9, 4, 6, 1]]
+
+    assert added == [True] * 5 + [False, False] + [True, True] + [False] + [True, True] + [False]
+    assert sorted(store.tweet_ids) == list(range(1, 10))
+    assert all(tweet_id in store for tweet_id in range(1, 10))
+    assert 0 not in store and 10 not in store
+    assert list(store._ids._sorted_ids) == sorted(store._ids._sorted_ids)
+
+
+def test_from_columns_keeps_the_first_row_per_id():
+    store = TweetStore.from_columns(
+        tweet_ids=[3, 1, 3, 2], author_ids=[10, 11, 12, 13], created_at=[0, 1, 2, 3],
+        texts=['a', 'b', 'c', 'd'], metrics={'like_count': [1, 2, 3, 4]}
+    )
+
+    assert list(store.tweet_ids) == [3, 1, 2]
+    assert list(store.author_ids) == [10, 11, 13]
+    assert store.texts == ['a', 'b', 'd']
+    assert store.column('like_count').tolist() == [1, 2, 4]
+    assert not _append(store, 1)
+    assert _append(store, 4)
+
+
+def test_extend_merges_and_deduplicates():
+    first, second = TweetStore(), TweetStore()
+    for tweet_id in (1, 2, 3):
+        _append(first, tweet_id)
+    for tweet_id in (3, 4):
+        _append(second, tweet_id, author_id=2)
+
+    assert first.extend(second) == 1
+    assert list(first.tweet_ids) == [1, 2, 3, 4]
+    assert first.column('like_count').tolist() == [2] * 4
+
+
+def test_memory_bytes_counts_the_duplicate_id_index():
+    store = TweetStore.from_columns(
+        tweet_ids=np.arange(1000), author_ids=np.ones(1000), created_at=np.zeros(1000), texts=[''] * 1000
+    )
+    columns_bytes = 1000 * (3 * 8 + 4 * 4)
+
+    assert store.memory_bytes() == columns_bytes + 1000 * 8
+    _append(store, 5000)
+    assert store.memory_bytes() > columns_bytes + 1001 * 8
+
+
+def test_id_index_counts_each_id_once_across_merges(monkeypatch):
+    monkeypatch.setattr(tweet_store_module, '_MIN_RECENT_IDS', 2)
+    index = IdIndex()
+
+    added = [index.add(item_id) for item_id in [4, 2, 4, 8, 6, 2, 1]]
+
+    assert added == [True, True, False, True, True, False, True]
+    assert len(index) == 5
+    assert sorted(index) == [1, 2, 4, 6, 8]
+    assert index.count_in([1, 3, 8, 8]) == 3
+    assert index.memory_bytes() < 5 * tweet_store_module._SET_ENTRY_BYTES
@@ -0,0 +1,93 @@
+import numpy as np
+
+from tools.filter_engine import filter_store
+from tools.filter_spec import FilterSpec
+from tools.tweet_store import TweetStore
+from tools.twitter_client import TwitterSearchClient
+
+
+def _stale_profile(user_id, followers_count):
+    return {
+        'user_id': user_id,
+        'username': f'user{user_id}',
+        'name': f'User {user_id}',
+        'followers_count': followers_count,
+        'verified': False,
+        'profile_url': f'https://twitter.com/user{user_id}'
+    }
+
+
+def test_backfill_timelines_fetches_qualified_candidates(search_client, fake_session):
+    user_ids = [int(index) + 1 for index in fake_session.followers.argsort()[-3:]]
+    users = {user_id: _stale_profile(user_id, 0) for user_id in user_ids}
+    min_followers = int(fake_session.followers.min())
+    for user_id in user_ids:
+        users[user_id]['followers_count'] = min_followers
+    tweet_store = TweetStore()
+
+    summary = search_client.backfill_timelines(tweet_store, users, min_followers)
+
+    assert summary['candidates'] == 3
+    assert summary['profiles_refreshed'] == 3
+    assert summary['tweets_added'] == len(tweet_store) == 3 * fake_session.timeline_tweets
+
+
+def test_backfill_timelines_with_no_candidates_left_after_refresh(search_client, fake_session):
+    # Search expansions claimed the threshold, but the fresh lookup shows everyone below it
+    min_followers = int(fake_session.followers.max()) + 1
+    users = {user_id: _stale_profile(user_id, min_followers) for user_id in (1, 2, 3)}
+    tweet_store = TweetStore()
+
+    summary = search_client.backfill_timelines(tweet_store, users, min_followers)
+
+    assert summary == {
+        'candidates': 0, 'timelines_fetched': 0, 'failed_users': [], 'tweets_added': 0, 'profiles_refreshed': 3
+    }
+    assert len(tweet_store) == 0
+    assert all(users[user_id]['followers_count'] < min_followers for user_id in users)
+
+
+def test_refresh_profiles_keeps_languages_for_the_filter(search_client):
+    spec = FilterSpec(min_followers=0, languages=['en'])
+    users = {user_id: {**_stale_profile(user_id, 0), 'lang': 'en'} for user_id in (1, 2)}
+
+    assert search_client.refresh_profiles(users) == {'cached': 0, 'refreshed': 2}
+
+    assert all(users[user_id]['followers_count'] > 0 for user_id in users)
+    assert all(users[user_id]['lang'] == 'en' for user_id in users)
+    assert all(spec.accepts_profile(info) for info in users.values())
+
+
+def test_backfill_timelines_keeps_languages_with_a_profile_cache(fake_session, tmp_path):
+    client = TwitterSearchClient(
+        session=fake_session, bearer_token='test-token', profile_cache_path=str(tmp_path / 'profiles.sqlite')
+    )
+    spec = FilterSpec(min_followers=0, min_tweets=1, languages=['en'])
+    users = {user_id: {**_stale_profile(user_id, 1), 'lang': 'en'} for user_id in (1, 2)}
+    tweet_store = TweetStore()
+
+    client.backfill_timelines(tweet_store, users, min_followers=0)
+
+    assert all(users[user_id]['lang'] == 'en' for user_id in users)
+    assert client.profile_cache.get(1)['lang'] == 'en'
+    assert filter_store(tweet_store, users, filter_spec=spec)['total_filtered'] == 2
+
+
+def test_search_shards_counts_pruned_tweets_and_authors_once(overlapping_session):
+    # One shard at a time, so the shared page cursor isn't raced
+    client = TwitterSearchClient(max_concurrency=1, session=overlapping_session, bearer_token='test-token')
+    min_followers = int(np.median(overlapping_session.followers))
+
+    search_results = client.search_shards(['SPY', 'QQQ', 'earnings'], 200, min_followers=min_followers)
+
+    pruned_rows = [
+        row for row in range(overlapping_session.tweets)
+        if overlapping_session.followers[overlapping_session.tweet_authors[row]] < min_followers
+    ]
+    assert search_results['prefilter'] == {
+        'min_followers': min_followers,
+        'pruned_authors': len({int(overlapping_session.tweet_authors[row]) for row in pruned_rows}),
+        'pruned_tweets': len(pruned_rows)
+    }
+    assert search_results['total_tweets_found'] == overlapping_session.tweets
+    assert search_results['total_users_found'] == len(set(overlapping_session.tweet_authors.tolist()))
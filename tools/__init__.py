@@ -0,0 +1,48 @@
+from .twitter_client import TwitterSearchClient
+from .filter_engine import filter_users, filter_store, filter_activity
+from .filter_spec import FilterSpec, FilterPipeline
+from .query_builder import build_query_shards
+from .http_session import create_session, shared_session
+from .rate_limiter import RateLimitScheduler, ScheduledClient
+from .request_metrics import RequestMetrics
+from .response_cache import ResponseCache
+from .profile_cache import UserProfileCache
+from .crawl_state import CrawlState
+from .tweet_store import TweetStore
+from .activity_counters import ActivityCounters
+from .sharded_crawl import ShardedCrawler, bearer_token_pool
+
+# The CrewAI tool wrappers pull in crewai_tools, so they are only imported when first used
+_CREWAI_TOOLS = ('TwitterSearchTool', 'UserFilterTool')
+
+
+def __getattr__(name):
+    if name in _CREWAI_TOOLS:
+        from . import twitter_tools
+        return getattr(twitter_tools, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    'TwitterSearchTool',
+    'UserFilterTool',
+    'TwitterSearchClient',
+    'filter_users',
+    'filter_store',
+    'filter_activity',
+    'FilterSpec',
+    'FilterPipeline',
+    'build_query_shards',
+    'RateLimitScheduler',
+    'ScheduledClient',
+    'create_session',
+    'shared_session',
+    'RequestMetrics',
+    'ResponseCache',
+    'UserProfileCache',
+    'CrawlState',
+    'TweetStore',
+    'ActivityCounters',
+    'ShardedCrawler',
+    'bearer_token_pool'
+]
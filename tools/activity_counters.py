@@ -0,0 +1,164 @@
+import time
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .tweet_store import TweetStore
+
+# Bucket counts are uint16; nobody posts 65k tweets in an hour
+_MAX_BUCKET_COUNT = np.iinfo(np.uint16).max
+
+
+class ActivityCounters:
+    """
+    Per-user tweet counts in time buckets over a sliding window
+
+    Each user owns a ring buffer of `window_days * 24` hourly buckets plus a
+    running window total. New tweets increment their bucket; moving the
+    clock forward rotates buckets out of the window and subtracts them from
+    the totals, so "tweets in the window" is an O(1) read per user and
+    history is never rescanned. The window edge is hour-aligned rather than
+    exact to the second.
+    """
+
+    def __init__(self, window_days: int = 14, bucket_seconds: int = 3600, now: float = None):
+        """
+        Args:
+            window_days: Length of the sliding window
+            bucket_seconds: Width of one bucket
+            now: Epoch time the window ends at (defaults to the current time)
+        """
+        self.window_days = window_days
+        self.bucket_seconds = bucket_seconds
+        self.buckets = window_days * 86400 // bucket_seconds
+        # Absolute index (epoch // bucket_seconds) of the newest bucket
+        self._head = int(now or time.time()) // bucket_seconds
+
+        self._rows: Dict[int, int] = {}
+        self._user_ids = np.zeros(0, dtype=np.int64)
+        self._counts = np.zeros((0, self.buckets), dtype=np.uint16)
+        self._totals = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_store(cls, tweet_store: 'TweetStore', window_days: int = 14, now: float = None) -> 'ActivityCounters':
+        """Seed counters from the tweets already collected in a TweetStore"""
+        counters = cls(window_days, now=now)
+        counters.add(tweet_store.column('author_ids'), tweet_store.column('created_at'))
+        return counters
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _row_indexes(self, author_ids: np.ndarray) -> np.ndarray:
+        """Rows of the given authors, allocating rows for authors seen for the first time"""
+        unique_ids, inverse = np.unique(author_ids, return_inverse=True)
+        new_ids = [user_id for user_id in unique_ids.tolist() if user_id not in self._rows]
+        if new_ids:
+            size = len(self._rows)
+            needed = size + len(new_ids)
+            if needed > len(self._totals):
+                capacity = max(needed, 2 * len(self._totals), 64)
+                self._user_ids = np.resize(self._user_ids, capacity)
+                self._totals = np.concatenate([self._totals[:size], np.zeros(capacity - size, dtype=np.int64)])
+                counts = np.zeros((capacity, self.buckets), dtype=np.uint16)
+                counts[:size] = self._counts[:size]
+                self._counts = counts
+            self._user_ids[size:needed] = new_ids
+            self._rows.update(zip(new_ids, range(size, needed)))
+        unique_rows = np.fromiter((self._rows[user_id] for user_id in unique_ids.tolist()), dtype=np.int64, count=len(unique_ids))
+        return unique_rows[inverse.ravel()]
+
+    def advance(self, now: float = None) -> None:
+        """Move the window end to `now`, dropping the buckets that fall out of it"""
+        head = int(now or time.time()) // self.bucket_seconds
+        if head <= self._head:
+            return
+        size = len(self._rows)
+        steps = min(head - self._head, self.buckets)
+        columns = (self._head + 1 + np.arange(steps)) % self.buckets
+        self._totals[:size] -= self._counts[:size, columns].sum(axis=1, dtype=np.int64)
+        self._counts[:size, columns] = 0
+        self._head = head
+
+    def add(self, author_ids: np.ndarray, timestamps: np.ndarray) -> int:
+        """
+        Count tweets by author id and epoch timestamp
+
+        Tweets newer than the window end move it forward; tweets older than
+        the window are ignored. Callers pass each tweet once.
+
+        Returns:
+            Number of tweets counted
+        """
+        author_ids = np.asarray(author_ids, dtype=np.int64)
+        bucket_index = np.asarray(timestamps, dtype=np.int64) // self.bucket_seconds
+        if not len(bucket_index):
+            return 0
+        if bucket_index.max() > self._head:
+            self.advance(float(bucket_index.max() * self.bucket_seconds))
+
+        in_window = bucket_index > self._head - self.buckets
+        if not in_window.any():
+            return 0
+        rows = self._row_indexes(author_ids[in_window])
+        columns = bucket_index[in_window] % self.buckets
+
+        # Several tweets can land in the same cell; count them per cell, then clip to the bucket type
+        cells, per_cell = np.unique(rows * self.buckets + columns, return_counts=True)
+        cell_rows, cell_columns = np.divmod(cells, self.buckets)
+        current = self._counts[cell_rows, cell_columns].astype(np.int64)
+        updated = np.minimum(current + per_cell, _MAX_BUCKET_COUNT)
+        self._counts[cell_rows, cell_columns] = updated
+        np.add.at(self._totals, cell_rows, updated - current)
+        return int(in_window.sum())
+
+    def count(self, user_id: int, days: Optional[float] = None) -> int:
+        """Tweets by a user in the last `days` days (default: the whole window)"""
+        row = self._rows.get(user_id)
+        if row is None:
+            return 0
+        if days is None or days >= self.window_days:
+            return int(self._totals[row])
+        return int(self._counts[row, self._recent_columns(days)].sum())
+
+    def avg_posts_per_week(self, user_id: int) -> float:
+        return self.count(user_id) / (self.window_days / 7)
+
+    def _recent_columns(self, days: float) -> np.ndarray:
+        steps = max(1, min(self.buckets, int(days * 86400 // self.bucket_seconds)))
+        return (self._head - np.arange(steps)) % self.buckets
+
+    def window_counts(self, days: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tweets per user in the last `days` days (default: the whole window)
+
+        Returns:
+            (user ids, counts) for every user that still has tweets in the window
+        """
+        size = len(self._rows)
+        if days is None or days >= self.window_days:
+            counts = self._totals[:size]
+        else:
+            counts = self._counts[:size, self._recent_columns(days)].sum(axis=1, dtype=np.int64)
+        active = self._totals[:size] > 0
+        return self._user_ids[:size][active], counts[active]
+
+    def total(self) -> int:
+        """Tweets counted in the whole window across all users"""
+        return int(self._totals[:len(self._rows)].sum())
+
+    def compact(self) -> int:
+        """Release the rows of users whose tweets have all left the window. Returns the number dropped."""
+        size = len(self._rows)
+        active = np.flatnonzero(self._totals[:size] > 0)
+        dropped = size - len(active)
+        if dropped:
+            self._user_ids = self._user_ids[active]
+            self._counts = self._counts[active]
+            self._totals = self._totals[active]
+            self._rows = dict(zip(self._user_ids.tolist(), range(len(active))))
+        return dropped
+
+    def memory_bytes(self) -> int:
+        return self._counts.nbytes + self._totals.nbytes + self._user_ids.nbytes
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .tweet_store import TweetStore, METRIC_COLUMNS
+
+# Recent search only reaches back 7 days, so older checkpoints can't be used as since_id
+CHECKPOINT_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+# SQLite's default limit on bound parameters is 999; stay well below it
+_SELECT_BATCH_SIZE = 500
+
+
+class CrawlState:
+    """
+    Local store for incremental crawls
+
+    Keeps the newest tweet id seen per query shard (used as since_id on the
+    next run), the id ranges a run had to leave unfetched because it hit the
+    per-query limit (fetched on later runs), and the merged per-user tweet
+    history those runs produced. The sharded crawl's per-run store also
+    collects the ids the follower pre-filter dropped, so they can be counted
+    once across workers.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        # Sharded crawl workers write to the same file; wait for their locks instead of failing
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                query TEXT PRIMARY KEY,
+                newest_id TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS backlog (
+                query TEXT NOT NULL,
+                since_id TEXT,
+                until_id TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS backlog_by_query ON backlog (query);
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER PRIMARY KEY,
+                user_info TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tweets (
+                id INTEGER PRIMARY KEY,
+                author_id INTEGER NOT NULL,
+                created_at INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                retweet_count INTEGER NOT NULL,
+                reply_count INTEGER NOT NULL,
+                like_count INTEGER NOT NULL,
+                quote_count INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS tweets_by_created_at ON tweets (created_at);
+            CREATE TABLE IF NOT EXISTS pruned_authors (user_id INTEGER PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS pruned_tweets (id INTEGER PRIMARY KEY);
+        """)
+        self._conn.commit()
+
+    def since_ids(self) -> Dict[str, str]:
+        """Newest tweet id per query shard, for checkpoints still inside the recent-search window"""
+        cutoff = time.time() - CHECKPOINT_MAX_AGE_SECONDS
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT query, newest_id FROM checkpoints WHERE updated_at >= ?", (cutoff,)
+            ).fetchall()
+        return dict(rows)
+
+    def update_checkpoints(self, newest_ids: Dict[str, str]) -> None:
+        now = time.time()
+        with self._lock:
+            for query, newest_id in newest_ids.items():
+                row = self._conn.execute(
+                    "SELECT newest_id FROM checkpoints WHERE query = ?", (query,)
+                ).fetchone()
+                if row is not None and int(row[0]) >= int(newest_id):
+                    newest_id = row[0]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)", (query, newest_id, now)
+                )
+            self._conn.commit()
+
+    def backlog(self) -> Dict[str, List[List[Optional[str]]]]:
+        """Unfetched [since_id, until_id] ranges per query shard, for gaps still inside the recent-search window"""
+        cutoff = time.time() - CHECKPOINT_MAX_AGE_SECONDS
+        backlog: Dict[str, List[List[Optional[str]]]] = {}
+        with self._lock:
+            for query, since_id, until_id in self._conn.execute(
+                "SELECT query, since_id, until_id FROM backlog WHERE updated_at >= ? "
+                "ORDER BY query, CAST(until_id AS INTEGER) DESC",
+                (cutoff,)
+            ):
+                backlog.setdefault(query, []).append([since_id, until_id])
+        return backlog
+
+    def update_backlog(self, backlog: Dict[str, List[List[Optional[str]]]]) -> None:
+        """Replace the stored gaps of each query in `backlog`; queries not in it keep theirs"""
+        now = time.time()
+        with self._lock:
+            for query, gaps in backlog.items():
+                self._conn.execute("DELETE FROM backlog WHERE query = ?", (query,))
+                self._conn.executemany(
+                    "INSERT INTO backlog VALUES (?, ?, ?, ?)",
+                    ((query, since_id, until_id, now) for since_id, until_id in gaps)
+                )
+            self._conn.commit()
+
+    def unseen_rows(self, tweet_store: TweetStore) -> np.ndarray:
+        """Row indexes of the tweets in `tweet_store` that are not stored yet"""
+        tweet_ids = tweet_store.column('tweet_ids')
+        stored = set()
+        with self._lock:
+            for start in range(0, len(tweet_ids), _SELECT_BATCH_SIZE):
+                batch = tweet_ids[start:start + _SELECT_BATCH_SIZE].tolist()
+                stored.update(row[0] for row in self._conn.execute(
+                    f"SELECT id FROM tweets WHERE id IN ({','.join('?' * len(batch))})", batch
+                ))
+        if not stored:
+            return np.arange(len(tweet_ids))
+        return np.flatnonzero(~np.isin(tweet_ids, np.fromiter(stored, dtype=np.int64, count=len(stored))))
+
+    def load_users(self, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Stored user_info for the given user ids"""
+        users = {}
+        with self._lock:
+            for start in range(0, len(user_ids), _SELECT_BATCH_SIZE):
+                batch = user_ids[start:start + _SELECT_BATCH_SIZE]
+                for user_id, info in self._conn.execute(
+                    f"SELECT user_id, user_info FROM users WHERE user_id IN ({','.join('?' * len(batch))})", batch
+                ):
+                    users[user_id] = json.loads(info)
+        return users
+
+    def merge_search_results(self, tweet_store: TweetStore, users: Dict[int, Dict[str, Any]]) -> int:
+        """Merge freshly fetched users and tweets into the stored history. Returns new tweets added."""
+        now = time.time()
+        rows = zip(
+            tweet_store.tweet_ids, tweet_store.author_ids, tweet_store.created_at, tweet_store.texts,
+            *(tweet_store.metrics[name] for name in METRIC_COLUMNS)
+        )
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO users VALUES (?, ?, ?)",
+                ((user_id, json.dumps(info), now) for user_id, info in users.items())
+            )
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO tweets VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            added = self._conn.total_changes - before
+            self._conn.commit()
+        return added
+
+    def merge_pruned(self, author_ids: Iterable[int], tweet_ids: Iterable[int]) -> None:
+        """Record the ids of authors and tweets the follower pre-filter dropped"""
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO pruned_authors VALUES (?)", ((user_id,) for user_id in author_ids))
+            self._conn.executemany("INSERT OR IGNORE INTO pruned_tweets VALUES (?)", ((tweet_id,) for tweet_id in tweet_ids))
+            self._conn.commit()
+
+    def pruned_counts(self) -> Tuple[int, int]:
+        """Distinct pruned authors and tweets, leaving out those another worker stored after all"""
+        with self._lock:
+            authors = self._conn.execute(
+                "SELECT COUNT(*) FROM pruned_authors WHERE user_id NOT IN (SELECT user_id FROM users)"
+            ).fetchone()[0]
+            tweets = self._conn.execute(
+                "SELECT COUNT(*) FROM pruned_tweets WHERE id NOT IN (SELECT id FROM tweets)"
+            ).fetchone()[0]
+        return authors, tweets
+
+    def load_search_results(self, window_days: int = 14) -> Tuple[TweetStore, Dict[int, Dict[str, Any]]]:
+        """Rebuild the tweet store and user index from the stored history, limited to the activity window"""
+        since = int((datetime.now(timezone.utc) - timedelta(days=window_days)).timestamp())
+        tweet_store = TweetStore()
+        with self._lock:
+            for row in self._conn.execute(
+                "SELECT id, author_id, created_at, text, retweet_count, reply_count, like_count, quote_count "
+                "FROM tweets WHERE created_at >= ? ORDER BY created_at", (since,)
+            ):
+                tweet_store.append(row[0], row[1], row[2], row[3], dict(zip(METRIC_COLUMNS, row[4:])))
+            stored_users = self._conn.execute("SELECT user_id, user_info FROM users").fetchall()
+
+        # Users whose tweets all aged out of the window carry no activity
+        author_ids = set(tweet_store.author_ids)
+        users = {user_id: json.loads(info) for user_id, info in stored_users if user_id in author_ids}
+        return tweet_store, users
+
+    def prune(self, window_days: int = 14) -> int:
+        """Drop tweets older than the activity window, and gaps search can no longer reach. Returns tweets removed."""
+        cutoff = int((datetime.now(timezone.utc) - timedelta(days=window_days)).timestamp())
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM tweets WHERE created_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM backlog WHERE updated_at < ?", (time.time() - CHECKPOINT_MAX_AGE_SECONDS,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,238 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Callable, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from .filter_spec import FilterSpec
+
+if TYPE_CHECKING:
+    from .tweet_store import TweetStore
+    from .activity_counters import ActivityCounters
+
+DEFAULT_MIN_FOLLOWERS = 5000
+DEFAULT_MIN_TWEETS_2WEEKS = 5
+
+
+def resolve_spec(
+    filter_spec: Optional[FilterSpec],
+    min_followers: int = DEFAULT_MIN_FOLLOWERS,
+    min_tweets_2weeks: int = DEFAULT_MIN_TWEETS_2WEEKS
+) -> FilterSpec:
+    """The given spec, or one with just the classic follower and 2-week activity thresholds"""
+    if filter_spec is not None:
+        return filter_spec
+    return FilterSpec(min_followers=min_followers, min_tweets=min_tweets_2weeks)
+
+
+def to_utc(value) -> Optional[datetime]:
+    """Normalize a tweet timestamp (datetime or ISO string) to an aware UTC datetime"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _filter_indexed(
+    user_ids: List[Any],
+    user_infos: List[Optional[Dict[str, Any]]],
+    tweet_user_index: np.ndarray,
+    tweet_timestamps: np.ndarray,
+    tweet_engagement: Callable[[], np.ndarray],
+    filter_spec: FilterSpec,
+    now: Optional[datetime]
+) -> Dict[str, Any]:
+    """Count window activity of users laid out by index and build the filter result"""
+    now = to_utc(now) if now else datetime.now(timezone.utc)
+    since = (now - timedelta(days=filter_spec.window_days)).timestamp()
+
+    in_window = tweet_timestamps >= since
+    recent_counts = np.bincount(tweet_user_index[in_window], minlength=len(user_ids))
+
+    def engagement() -> np.ndarray:
+        # Mean engagement per tweet in the window; only computed when the spec filters on it
+        totals = np.bincount(
+            tweet_user_index[in_window], weights=tweet_engagement()[in_window], minlength=len(user_ids)
+        )
+        return totals / np.maximum(recent_counts, 1)
+
+    return _filter_counts(
+        user_ids,
+        user_infos,
+        recent_counts,
+        np.bincount(tweet_user_index, minlength=len(user_ids)),
+        filter_spec,
+        engagement
+    )
+
+
+def _filter_counts(
+    user_ids: List[Any],
+    user_infos: List[Optional[Dict[str, Any]]],
+    recent_counts: np.ndarray,
+    total_counts: np.ndarray,
+    filter_spec: FilterSpec,
+    engagement: Optional[Callable[[], np.ndarray]] = None
+) -> Dict[str, Any]:
+    """Run the compiled filter pipeline over per-user columns and build the filter result"""
+    size = len(user_ids)
+    avg_posts_per_week = recent_counts / filter_spec.window_weeks
+    columns = {
+        'has_info': np.fromiter((info is not None for info in user_infos), dtype=bool, count=size),
+        'followers': np.fromiter(
+            (info['followers_count'] if info else -1 for info in user_infos), dtype=np.int64, count=size
+        ),
+        'verified': lambda: np.fromiter(
+            (bool(info and info.get('verified')) for info in user_infos), dtype=bool, count=size
+        ),
+        'language': lambda: np.array([info.get('lang') if info else None for info in user_infos], dtype=object),
+        'recent_tweets': recent_counts,
+        'posts_per_week': avg_posts_per_week,
+        'engagement': engagement
+    }
+    mask, filter_statistics = filter_spec.pipeline().evaluate(size, columns)
+
+    filtered_users = []
+    for index in np.flatnonzero(mask).tolist():
+        user_info = user_infos[index]
+        filtered_users.append({
+            'user_id': user_ids[index],
+            'username': user_info['username'],
+            'name': user_info['name'],
+            'followers_count': user_info['followers_count'],
+            'profile_url': user_info['profile_url'],
+            'verified': user_info['verified'],
+            'recent_tweets_count': int(recent_counts[index]),
+            'avg_posts_per_week': round(float(avg_posts_per_week[index]), 2),
+            'total_tweets_found': int(total_counts[index])
+        })
+
+    return {
+        'filtered_users': filtered_users,
+        'total_filtered': len(filtered_users),
+        'filter_criteria': filter_spec.criteria(),
+        'filter_statistics': filter_statistics
+    }
+
+
+def _tweet_engagement(tweet: Dict[str, Any]) -> int:
+    """Likes + retweets + replies + quotes of a tweet"""
+    # tweet_store imports this module, so its column names are looked up late
+    from .tweet_store import METRIC_COLUMNS
+    metrics = tweet.get('public_metrics', {})
+    return sum(metrics.get(name, 0) for name in METRIC_COLUMNS)
+
+
+def filter_users(
+    users_data: Dict[Any, Any],
+    min_followers: int = DEFAULT_MIN_FOLLOWERS,
+    min_tweets_2weeks: int = DEFAULT_MIN_TWEETS_2WEEKS,
+    now: Optional[datetime] = None,
+    filter_spec: Optional[FilterSpec] = None
+) -> Dict[str, Any]:
+    """
+    Filter structured search results without going through an LLM
+
+    Args:
+        users_data: Mapping of author id to {'tweets': [...], 'user_info': {...}}
+        min_followers: Minimum follower count
+        min_tweets_2weeks: Minimum tweets in last 2 weeks
+        now: Reference time for the activity window (defaults to current UTC time)
+        filter_spec: Full filter criteria; replaces min_followers and min_tweets_2weeks
+    """
+    user_ids = list(users_data)
+    user_infos = [users_data[user_id].get('user_info') or None for user_id in user_ids]
+
+    tweet_user_index = []
+    tweet_timestamps = []
+    tweets = []
+    for index, user_id in enumerate(user_ids):
+        for tweet in users_data[user_id].get('tweets', []):
+            tweet_user_index.append(index)
+            tweet_timestamps.append(to_utc(tweet['created_at']).timestamp())
+            tweets.append(tweet)
+
+    return _filter_indexed(
+        user_ids,
+        user_infos,
+        np.array(tweet_user_index, dtype=np.int64),
+        np.array(tweet_timestamps, dtype=np.float64),
+        lambda: np.fromiter((_tweet_engagement(tweet) for tweet in tweets), dtype=np.float64, count=len(tweets)),
+        resolve_spec(filter_spec, min_followers, min_tweets_2weeks),
+        now
+    )
+
+
+def filter_store(
+    tweet_store: 'TweetStore',
+    users: Dict[int, Dict[str, Any]],
+    min_followers: int = DEFAULT_MIN_FOLLOWERS,
+    min_tweets_2weeks: int = DEFAULT_MIN_TWEETS_2WEEKS,
+    now: Optional[datetime] = None,
+    filter_spec: Optional[FilterSpec] = None
+) -> Dict[str, Any]:
+    """
+    Filter a columnar TweetStore, counting window activity per author in one vectorized pass
+
+    Args:
+        tweet_store: Tweets collected by the search
+        users: Mapping of author id to user_info
+        min_followers: Minimum follower count
+        min_tweets_2weeks: Minimum tweets in last 2 weeks
+        now: Reference time for the activity window (defaults to current UTC time)
+        filter_spec: Full filter criteria; replaces min_followers and min_tweets_2weeks
+    """
+    author_ids, tweet_user_index = np.unique(tweet_store.column('author_ids'), return_inverse=True)
+    user_ids = author_ids.tolist()
+
+    return _filter_indexed(
+        user_ids,
+        [users.get(user_id) for user_id in user_ids],
+        tweet_user_index.ravel(),
+        tweet_store.column('created_at'),
+        lambda: sum(tweet_store.column(name).astype(np.float64) for name in tweet_store.metrics),
+        resolve_spec(filter_spec, min_followers, min_tweets_2weeks),
+        now
+    )
+
+
+def filter_activity(
+    activity: 'ActivityCounters',
+    users: Dict[int, Dict[str, Any]],
+    min_followers: int = DEFAULT_MIN_FOLLOWERS,
+    min_tweets_2weeks: int = DEFAULT_MIN_TWEETS_2WEEKS,
+    now: Optional[datetime] = None,
+    filter_spec: Optional[FilterSpec] = None
+) -> Dict[str, Any]:
+    """
+    Filter users by their sliding-window ActivityCounters instead of rescanning tweets
+
+    The counters only hold tweet counts, so specs with engagement ranges
+    need filter_store over the tweets instead.
+
+    Args:
+        activity: Hourly activity counters kept up to date across runs
+        users: Mapping of author id to user_info
+        min_followers: Minimum follower count
+        min_tweets_2weeks: Minimum tweets in last 2 weeks
+        now: Reference time for the activity window (defaults to current UTC time)
+        filter_spec: Full filter criteria; replaces min_followers and min_tweets_2weeks
+    """
+    filter_spec = resolve_spec(filter_spec, min_followers, min_tweets_2weeks)
+    if filter_spec.uses_engagement:
+        raise ValueError("Activity counters carry no engagement metrics; use filter_store for engagement ranges")
+
+    activity.advance((to_utc(now) if now else datetime.now(timezone.utc)).timestamp())
+    user_ids, recent_counts = activity.window_counts(days=filter_spec.window_days)
+    _, total_counts = activity.window_counts()
+    user_ids = user_ids.tolist()
+
+    return _filter_counts(
+        user_ids,
+        [users.get(user_id) for user_id in user_ids],
+        recent_counts,
+        total_counts,
+        filter_spec
+    )
@@ -0,0 +1,228 @@
+import os
+import json
+from typing import Dict, Any, List, Callable, Optional, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
+
+# Recent search, the crawl history and the activity counters all cover 14 days
+MAX_WINDOW_DAYS = 14
+
+# Relative cost of computing each predicate's column; cheaper predicates run first
+_PROFILE_COST = 0
+_LANGUAGE_COST = 1
+_ACTIVITY_COST = 2
+_ENGAGEMENT_COST = 3
+
+
+class FilterSpec(BaseModel):
+    """
+    Criteria a user must meet to be included in the output
+
+    Loaded from YAML/JSON (from_file) or built from CLI overrides, then
+    compiled once into a FilterPipeline. Unset bounds are not checked.
+    """
+    # A misspelled criterion should fail loudly, not be ignored
+    model_config = ConfigDict(extra='forbid')
+
+    min_followers: Optional[int] = Field(5000, ge=0)
+    max_followers: Optional[int] = Field(None, ge=0)
+    min_tweets: Optional[int] = Field(5, ge=0, description="Tweets inside the activity window")
+    max_tweets: Optional[int] = Field(None, ge=0)
+    min_posts_per_week: Optional[float] = Field(None, ge=0)
+    max_posts_per_week: Optional[float] = Field(None, ge=0)
+    min_engagement: Optional[float] = Field(None, ge=0, description="Mean likes + retweets + replies + quotes per tweet")
+    max_engagement: Optional[float] = Field(None, ge=0)
+    verified: Optional[bool] = None
+    languages: Optional[List[str]] = None
+    window_days: int = Field(MAX_WINDOW_DAYS, ge=1, le=MAX_WINDOW_DAYS)
+
+    _pipeline: Optional['FilterPipeline'] = PrivateAttr(None)
+
+    @model_validator(mode='after')
+    def _check_ranges(self) -> 'FilterSpec':
+        for field in ('followers', 'tweets', 'posts_per_week', 'engagement'):
+            low, high = getattr(self, f'min_{field}'), getattr(self, f'max_{field}')
+            if low is not None and high is not None and low > high:
+                raise ValueError(f"min_{field} ({low}) is greater than max_{field} ({high})")
+        return self
+
+    @classmethod
+    def from_file(cls, path: str, **overrides: Any) -> 'FilterSpec':
+        """Load a spec from a .json or .yaml/.yml file; keyword overrides win over the file"""
+        with open(path, encoding='utf-8') as f:
+            if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+                try:
+                    import yaml
+                except ImportError as e:
+                    raise ImportError("YAML filter specs require PyYAML: pip install pyyaml") from e
+                values = yaml.safe_load(f) or {}
+            else:
+                values = json.load(f)
+        return cls(**{**values, **overrides})
+
+    @property
+    def window_weeks(self) -> float:
+        return self.window_days / 7
+
+    @property
+    def uses_engagement(self) -> bool:
+        """Whether evaluating the spec needs per-tweet metrics, not just tweet counts"""
+        return self.min_engagement is not None or self.max_engagement is not None
+
+    @property
+    def streamable(self) -> bool:
+        """Whether a user that passes stays passing as more of their tweets arrive"""
+        return (
+            not self.uses_engagement
+            and self.max_tweets is None
+            and self.max_posts_per_week is None
+        )
+
+    def criteria(self) -> Dict[str, Any]:
+        """The set criteria, for the output metadata"""
+        return self.model_dump(exclude_none=True)
+
+    def describe(self) -> List[str]:
+        """One human-readable line per criterion, in the order the pipeline evaluates them"""
+        return [predicate.description for predicate in self.pipeline().predicates if predicate.name != 'user_info']
+
+    def accepts_profile(self, user_info: Dict[str, Any]) -> bool:
+        """Check the profile-only criteria (followers, verified, language) for a single user"""
+        followers = user_info['followers_count']
+        return (
+            (self.min_followers is None or followers >= self.min_followers)
+            and (self.max_followers is None or followers <= self.max_followers)
+            and (self.verified is None or bool(user_info.get('verified')) == self.verified)
+            and (self.languages is None or user_info.get('lang') in self.languages)
+        )
+
+    def pipeline(self) -> 'FilterPipeline':
+        """The compiled predicate pipeline, built on first use"""
+        if self._pipeline is None:
+            self._pipeline = FilterPipeline(self)
+        return self._pipeline
+
+
+def _range_test(low: Optional[float], high: Optional[float]) -> Callable[[np.ndarray], np.ndarray]:
+    if high is None:
+        return lambda values: values >= low
+    if low is None:
+        return lambda values: values <= high
+    return lambda values: (values >= low) & (values <= high)
+
+
+def _range_description(label: str, low: Optional[float], high: Optional[float]) -> str:
+    if high is None:
+        return f"At least {low:,} {label}"
+    if low is None:
+        return f"At most {high:,} {label}"
+    return f"Between {low:,} and {high:,} {label}"
+
+
+class Predicate:
+    """One compiled criterion: a vectorized test over a single per-user column"""
+
+    def __init__(self, name: str, column: str, cost: int, test: Callable[[np.ndarray], np.ndarray], description: str):
+        self.name = name
+        self.column = column
+        self.cost = cost
+        self.test = test
+        self.description = description
+        self.evaluated = 0
+        self.passed = 0
+
+    @property
+    def pass_rate(self) -> float:
+        return self.passed / self.evaluated if self.evaluated else 1.0
+
+
+class FilterPipeline:
+    """
+    A FilterSpec compiled into an ordered list of vectorized predicates
+
+    Each predicate only sees the users that passed the ones before it.
+    Predicates run cheapest first; among equally cheap ones the most
+    selective so far (lowest pass rate over previous evaluations) runs
+    first, so repeated runs in a daemon settle into the fastest order.
+    """
+
+    def __init__(self, spec: FilterSpec):
+        self.spec = spec
+        self.predicates: List[Predicate] = []
+
+        # Users without profile data can't be judged on anything else
+        self.predicates.append(Predicate(
+            'user_info', 'has_info', _PROFILE_COST - 1, lambda values: values, "Profile data available"
+        ))
+        if spec.verified is not None:
+            self.predicates.append(Predicate(
+                'verified', 'verified', _PROFILE_COST, lambda values: values == spec.verified,
+                "Verified accounts only" if spec.verified else "Unverified accounts only"
+            ))
+        ranges = (
+            ('followers', 'followers', _PROFILE_COST, 'followers'),
+            ('tweets', 'recent_tweets', _ACTIVITY_COST, f'tweets in the last {spec.window_days} days'),
+            ('posts_per_week', 'posts_per_week', _ACTIVITY_COST, 'posts per week on average'),
+            ('engagement', 'engagement', _ENGAGEMENT_COST, 'engagements (likes, retweets, replies, quotes) per tweet')
+        )
+        for name, column, cost, label in ranges:
+            low, high = getattr(spec, f'min_{name}'), getattr(spec, f'max_{name}')
+            if low is not None or high is not None:
+                self.predicates.append(Predicate(
+                    name, column, cost, _range_test(low, high), _range_description(label, low, high)
+                ))
+        if spec.languages:
+            languages = np.array(spec.languages, dtype=object)
+            self.predicates.append(Predicate(
+                'language', 'language', _LANGUAGE_COST, lambda values: np.isin(values, languages),
+                f"Tweets written in: {', '.join(spec.languages)}"
+            ))
+        self._reorder()
+
+    def _reorder(self) -> None:
+        self.predicates.sort(key=lambda predicate: (predicate.cost, predicate.pass_rate))
+
+    def evaluate(self, size: int, columns: Dict[str, Union[np.ndarray, Callable[[], np.ndarray]]]) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Run the predicates over `size` users
+
+        Args:
+            size: Number of users
+            columns: Per-user arrays by column name; a callable is only invoked
+                if a predicate needs that column and someone is left to test
+
+        Returns:
+            (boolean mask of users passing everything, filter statistics)
+        """
+        survivors = np.arange(size)
+        breakdown = {}
+        for predicate in self.predicates:
+            if not len(survivors):
+                breakdown[predicate.name] = {'evaluated': 0, 'passed': 0, 'failed': 0}
+                continue
+            column = columns[predicate.column]
+            if callable(column):
+                column = columns[predicate.column] = column()
+            passed = np.asarray(predicate.test(column[survivors]), dtype=bool)
+            passed_count = int(passed.sum())
+            breakdown[predicate.name] = {
+                'evaluated': len(survivors),
+                'passed': passed_count,
+                'failed': len(survivors) - passed_count
+            }
+            predicate.evaluated += len(survivors)
+            predicate.passed += passed_count
+            survivors = survivors[passed]
+        self._reorder()
+
+        mask = np.zeros(size, dtype=bool)
+        mask[survivors] = True
+        statistics = {
+            'users_evaluated': size,
+            'missing_user_info': breakdown['user_info']['failed'],
+            **{f'failed_{name}': counts['failed'] for name, counts in breakdown.items() if name != 'user_info'},
+            'passed': len(survivors),
+            'predicates': breakdown
+        }
+        return mask, statistics
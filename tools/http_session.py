@@ -0,0 +1,89 @@
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+# Transient server failures; 429 is left to ScheduledClient, which paces by the rate-limit headers
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+_shared_session: Optional[requests.Session] = None
+_shared_session_lock = threading.Lock()
+
+
+class PooledSession(requests.Session):
+    """requests.Session with a default timeout, since tweepy never passes one"""
+
+    def __init__(self, timeout: float = 30.0):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(
+    pool_size: int = 16,
+    max_retries: int = 4,
+    backoff_factor: float = 0.5,
+    backoff_jitter: float = 0.5,
+    timeout: float = 30.0
+) -> requests.Session:
+    """
+    Build a keep-alive session with a sized connection pool and retry policy
+
+    Connect/read timeouts and 5xx responses to idempotent requests are retried
+    with exponential backoff (backoff_factor * 2^n, plus up to backoff_jitter
+    seconds of random jitter), honouring Retry-After.
+
+    Args:
+        pool_size: Connections kept alive per host; should cover the worker count
+        max_retries: Retries per request before the error is raised
+        backoff_factor: Base of the exponential backoff in seconds
+        backoff_jitter: Maximum random seconds added to each backoff
+        timeout: Default connect/read timeout in seconds
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        respect_retry_after_header=True,
+        # Hand the last 5xx back so tweepy raises its usual TwitterServerError
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+
+    session = PooledSession(timeout)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    # Every content coding urllib3 can decode here (brotli/zstd when their packages are installed)
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+def shared_session() -> requests.Session:
+    """
+    Process-wide pooled session, configured from the environment on first use
+
+    TWITTER_HTTP_POOL_SIZE, TWITTER_HTTP_RETRIES and TWITTER_HTTP_TIMEOUT
+    override the create_session defaults.
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session(
+                pool_size=int(os.getenv('TWITTER_HTTP_POOL_SIZE', '16')),
+                max_retries=int(os.getenv('TWITTER_HTTP_RETRIES', '4')),
+                timeout=float(os.getenv('TWITTER_HTTP_TIMEOUT', '30'))
+            )
+        return _shared_session
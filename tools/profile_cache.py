@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Any, List, Callable, Iterable, Optional, Tuple
+
+# SQLite's default limit on bound parameters is 999; stay well below it
+_SELECT_BATCH_SIZE = 500
+
+
+def merge_profile(*profiles: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine known profiles of one user, later ones winning
+
+    get_users lookups carry no language (it is tagged from search pages), so
+    a plain replace would drop `lang` and fail every language filter.
+    """
+    merged = {}
+    for profile in profiles:
+        if profile:
+            merged.update(profile)
+    return merged
+
+
+class UserProfileCache:
+    """
+    Persistent index of the last seen profile (user_info) per user id
+
+    Profiles are recorded whenever the API returns them and kept in memory
+    for O(1) lookups. refresh() only spends get_users calls on entries that
+    are older than the TTL, or close enough to the follower threshold that a
+    fresh count could flip the filter decision, which use the shorter
+    boundary TTL.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 86400,
+        boundary_ttl_seconds: float = 3600,
+        boundary_margin: float = 0.1
+    ):
+        """
+        Args:
+            path: SQLite database file
+            ttl_seconds: Age after which a profile is looked up again
+            boundary_ttl_seconds: Age after which a profile near the follower threshold is looked up again
+            boundary_margin: Relative distance from the threshold (0.1 = within 10%) counted as near it
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.boundary_ttl_seconds = boundary_ttl_seconds
+        self.boundary_margin = boundary_margin
+        self.hits = 0
+        self.refreshed = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Sharded crawl workers record into the same file; wait for their locks instead of failing
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS profiles (
+                user_id INTEGER PRIMARY KEY,
+                user_info TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        self._profiles: Dict[int, Tuple[Dict[str, Any], float]] = {
+            user_id: (json.loads(info), updated_at)
+            for user_id, info, updated_at in self._conn.execute("SELECT user_id, user_info, updated_at FROM profiles")
+        }
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Last seen profile of a user, or None"""
+        entry = self._profiles.get(user_id)
+        return entry[0] if entry else None
+
+    def record(self, users: Dict[int, Dict[str, Any]], seen_at: float = None) -> None:
+        """Store profiles just returned by the API"""
+        if not users:
+            return
+        seen_at = seen_at or time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?)",
+                ((user_id, json.dumps(info), seen_at) for user_id, info in users.items())
+            )
+            self._conn.commit()
+            for user_id, info in users.items():
+                self._profiles[user_id] = (info, seen_at)
+
+    def needs_refresh(self, user_id: int, min_followers: Optional[int] = None, now: float = None) -> bool:
+        """Whether a user's profile is missing, past its TTL, or near the threshold and past the boundary TTL"""
+        entry = self._profiles.get(user_id)
+        if entry is None:
+            return True
+        info, updated_at = entry
+        age = (now or time.time()) - updated_at
+        if age >= self.ttl_seconds:
+            return True
+        if min_followers is not None and abs(info['followers_count'] - min_followers) <= min_followers * self.boundary_margin:
+            return age >= self.boundary_ttl_seconds
+        return False
+
+    def _reload(self, user_ids: List[int]) -> None:
+        """Pick up profiles other processes recorded since this index was loaded"""
+        with self._lock:
+            for start in range(0, len(user_ids), _SELECT_BATCH_SIZE):
+                batch = user_ids[start:start + _SELECT_BATCH_SIZE]
+                for user_id, info, updated_at in self._conn.execute(
+                    f"SELECT user_id, user_info, updated_at FROM profiles "
+                    f"WHERE user_id IN ({','.join('?' * len(batch))})", batch
+                ):
+                    current = self._profiles.get(user_id)
+                    if current is None or current[1] < updated_at:
+                        self._profiles[user_id] = (json.loads(info), updated_at)
+
+    def refresh(
+        self,
+        users: Dict[int, Dict[str, Any]],
+        lookup: Callable[[Iterable[int]], Dict[int, Dict[str, Any]]],
+        min_followers: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        Bring `users` up to date, looking up only the profiles that need it
+
+        Cached profiles newer than the ones in `users` replace them in place;
+        the rest go to `lookup` (e.g. TwitterSearchClient.lookup_users) in one
+        batched call and are recorded. Fields the lookup doesn't return, like
+        `lang`, are carried over from the previous profile.
+
+        Returns:
+            Counts of profiles served from the cache and refreshed from the API
+        """
+        now = time.time()
+        stale = [user_id for user_id in users if self.needs_refresh(user_id, min_followers, now)]
+        if stale:
+            self._reload(stale)
+            stale = [user_id for user_id in stale if self.needs_refresh(user_id, min_followers, now)]
+
+        stale_ids = set(stale)
+        cached = 0
+        for user_id in users:
+            if user_id not in stale_ids:
+                users[user_id] = merge_profile(users[user_id], self._profiles[user_id][0])
+                cached += 1
+
+        fresh = {
+            user_id: merge_profile(self.get(user_id), users.get(user_id), info)
+            for user_id, info in (lookup(stale) if stale else {}).items()
+        }
+        self.record(fresh)
+        users.update(fresh)
+
+        self.hits += cached
+        self.refreshed += len(fresh)
+        return {'cached': cached, 'refreshed': len(fresh)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._profiles),
+            'hits': self.hits,
+            'refreshed': self.refreshed
+        }
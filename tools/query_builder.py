@@ -0,0 +1,77 @@
+import re
+from typing import List, Optional, TYPE_CHECKING
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from .filter_spec import FilterSpec
+
+# Twitter API v2 recent search query length limit (Essential/Basic access)
+MAX_QUERY_LENGTH = 512
+QUERY_SUFFIX = "-is:retweet"
+
+_TERM_PATTERN = re.compile(r'"[^"]+"|\S+')
+
+
+def split_keywords(keywords: str) -> List[str]:
+    """Split a keyword string into search terms, keeping quoted phrases together"""
+    terms = []
+    seen = set()
+    for term in _TERM_PATTERN.findall(keywords):
+        key = term.lower()
+        if key in ('or', 'and') or key in seen:
+            continue
+        seen.add(key)
+        terms.append(term)
+    return terms
+
+
+def query_suffix(filter_spec: Optional['FilterSpec'] = None) -> str:
+    """Operators appended to every query: no retweets, plus the spec's languages if it sets any"""
+    languages = filter_spec.languages if filter_spec else None
+    if not languages:
+        return QUERY_SUFFIX
+    if len(languages) == 1:
+        return f"{QUERY_SUFFIX} lang:{languages[0]}"
+    return f"{QUERY_SUFFIX} ({' OR '.join(f'lang:{language}' for language in languages)})"
+
+
+def build_query_shards(
+    keywords: str,
+    max_query_length: int = MAX_QUERY_LENGTH,
+    filter_spec: Optional['FilterSpec'] = None
+) -> List[str]:
+    """
+    Pack keywords into OR-queries that each fit within the API query length limit
+
+    Args:
+        keywords: Space-separated keywords (quoted phrases are kept intact)
+        max_query_length: Maximum length of a single query string
+        filter_spec: Criteria whose languages are searched for (default: any language)
+    """
+    suffix = query_suffix(filter_spec)
+    overhead = len("() ") + len(suffix)
+    budget = max_query_length - overhead
+
+    shards = []
+    current: List[str] = []
+    current_length = 0
+
+    for term in split_keywords(keywords):
+        if len(term) > budget:
+            logger.warning(f"Skipping keyword longer than query limit: {term[:40]}...")
+            continue
+
+        added_length = len(term) if not current else len(term) + len(" OR ")
+        if current and current_length + added_length > budget:
+            shards.append(current)
+            current, current_length = [], 0
+            added_length = len(term)
+
+        current.append(term)
+        current_length += added_length
+
+    if current:
+        shards.append(current)
+
+    return [f"({' OR '.join(terms)}) {suffix}" for terms in shards]
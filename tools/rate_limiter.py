@@ -0,0 +1,247 @@
+import re
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import tweepy
+from loguru import logger
+
+from .request_metrics import RequestMetrics
+
+# Default app-auth quotas per 15-minute window, used until the API reports
+# the real values through x-rate-limit-* headers
+RATE_LIMIT_WINDOW_SECONDS = 15 * 60
+DEFAULT_ENDPOINT_QUOTAS = {
+    'search_recent_tweets': 450,
+    'get_users': 300,
+    'get_users_tweets': 1500,
+}
+
+_ROUTE_ENDPOINTS = [
+    (re.compile(r'^/2/tweets/search/recent$'), 'search_recent_tweets'),
+    (re.compile(r'^/2/users/[^/]+/tweets$'), 'get_users_tweets'),
+    (re.compile(r'^/2/users(/by)?$'), 'get_users'),
+]
+
+
+def endpoint_for_route(route: str) -> str:
+    """Map an API route to the endpoint name its quota is tracked under"""
+    for pattern, endpoint in _ROUTE_ENDPOINTS:
+        if pattern.match(route):
+            return endpoint
+    return route
+
+
+class TokenBucket:
+    """Token bucket refilled evenly over the rate-limit window and corrected by API headers"""
+
+    def __init__(self, capacity: int, window_seconds: float = RATE_LIMIT_WINDOW_SECONDS):
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self.tokens = float(capacity)
+        self.reset_at: Optional[float] = None
+        self.requests_made = 0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.window_seconds
+
+    def _refill(self, now: float) -> None:
+        # Once the API says the window has reset, the full quota is available again
+        if self.reset_at is not None and time.time() >= self.reset_at:
+            self.tokens = float(self.capacity)
+            self.reset_at = None
+        else:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.refill_rate)
+        self._updated_at = now
+
+    def _wait_time(self) -> float:
+        if self.tokens >= 1:
+            return 0.0
+        if self.reset_at is not None:
+            return max(0.0, self.reset_at - time.time())
+        return (1 - self.tokens) / self.refill_rate
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                wait = self._wait_time()
+                if wait <= 0:
+                    self.tokens -= 1
+                    self.requests_made += 1
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+    def update(self, limit: Optional[int], remaining: Optional[int], reset: Optional[int]) -> None:
+        """Correct the bucket with the x-rate-limit-* values from a response"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if limit:
+                self.capacity = limit
+            if remaining is not None:
+                self.tokens = min(self.tokens, float(remaining))
+            if reset is not None and self.tokens < 1:
+                self.reset_at = float(reset)
+
+    def exhaust(self, reset: Optional[int]) -> None:
+        """Block the bucket after a 429 until the window resets"""
+        with self._lock:
+            self.tokens = 0.0
+            self.reset_at = float(reset) if reset else time.time() + self.window_seconds
+            self._updated_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                'limit': self.capacity,
+                'remaining': int(self.tokens),
+                'reset_at': self.reset_at,
+                'requests_made': self.requests_made
+            }
+
+
+class RateLimitScheduler:
+    """Per-endpoint token buckets that pace requests so concurrent workers stay under quota"""
+
+    def __init__(self, quotas: Dict[str, int] = None, quota_share: float = 1.0):
+        """
+        Args:
+            quotas: Per-endpoint request limits overriding DEFAULT_ENDPOINT_QUOTAS
+            quota_share: Fraction of each quota this scheduler may use, for processes sharing a token
+        """
+        self.quota_share = quota_share
+        self.quotas = {
+            endpoint: max(1, int(limit * quota_share))
+            for endpoint, limit in dict(DEFAULT_ENDPOINT_QUOTAS, **(quotas or {})).items()
+        }
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.total_wait_seconds = 0.0
+        self.rate_limited_responses = 0
+        self._lock = threading.Lock()
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        with self._lock:
+            if endpoint not in self.buckets:
+                self.buckets[endpoint] = TokenBucket(self.quotas.get(endpoint, 300))
+            return self.buckets[endpoint]
+
+    def acquire(self, endpoint: str) -> None:
+        waited = self.bucket(endpoint).acquire()
+        if waited:
+            logger.debug(f"Paced {endpoint} request for {waited:.1f}s")
+            with self._lock:
+                self.total_wait_seconds += waited
+
+    def record_response(self, endpoint: str, headers) -> None:
+        def header(name):
+            value = headers.get(name)
+            return int(value) if value is not None else None
+
+        limit, remaining = header('x-rate-limit-limit'), header('x-rate-limit-remaining')
+        if limit is not None:
+            limit = int(limit * self.quota_share)
+            if self.quota_share < 1:
+                # A small share of a small quota still needs one request per window
+                limit = max(1, limit)
+        if remaining is not None:
+            # No minimum here: an exhausted quota has to block the bucket until the reset
+            remaining = int(remaining * self.quota_share)
+        self.bucket(endpoint).update(limit, remaining, header('x-rate-limit-reset'))
+
+    def record_rate_limited(self, endpoint: str, reset_time: Optional[int]) -> None:
+        logger.warning(f"Rate limit hit on {endpoint}; pausing it until the window resets")
+        with self._lock:
+            self.rate_limited_responses += 1
+        self.bucket(endpoint).exhaust(reset_time)
+
+    def estimate_time_to_complete(self, endpoint: str, requests_needed: int) -> float:
+        """Estimate seconds needed to make `requests_needed` more requests to an endpoint"""
+        bucket = self.bucket(endpoint)
+        state = bucket.snapshot()
+        backlog = requests_needed - state['remaining']
+        if backlog <= 0:
+            return 0.0
+        if state['reset_at'] is not None:
+            wait = max(0.0, state['reset_at'] - time.time())
+            backlog -= bucket.capacity
+            windows = max(0, -(-backlog // bucket.capacity))
+            return wait + windows * bucket.window_seconds
+        return backlog / bucket.refill_rate
+
+    def quota(self) -> Dict[str, Any]:
+        """Remaining quota per endpoint plus pacing totals"""
+        with self._lock:
+            endpoints = list(self.buckets.items())
+        return {
+            'endpoints': {name: bucket.snapshot() for name, bucket in endpoints},
+            'total_wait_seconds': round(self.total_wait_seconds, 3),
+            'rate_limited_responses': self.rate_limited_responses
+        }
+
+
+class ScheduledClient(tweepy.Client):
+    """tweepy.Client that paces every request through a RateLimitScheduler"""
+
+    def __init__(self, *args, scheduler: RateLimitScheduler = None, max_rate_limit_retries: int = 3,
+                 response_cache=None, request_metrics: RequestMetrics = None, session=None, **kwargs):
+        kwargs['wait_on_rate_limit'] = False
+        super().__init__(*args, **kwargs)
+        if session is not None:
+            # Share pooled keep-alive connections instead of tweepy's per-client session
+            self.session = session
+        self.scheduler = scheduler or RateLimitScheduler()
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.response_cache = response_cache
+        self.request_metrics = request_metrics
+
+    def _make_request(self, method, route, params={}, endpoint_parameters=(), json=None,
+                      data_type=None, user_auth=False):
+        # Only plain JSON reads can be served from the response cache
+        if self.response_cache is None or method != "GET" or self.return_type is not dict:
+            return super()._make_request(method, route, params, endpoint_parameters, json, data_type, user_auth)
+
+        request_params = self._process_params(params, endpoint_parameters)
+        cached = self.response_cache.get(route, request_params)
+        if cached is not None:
+            return cached
+
+        response = super()._make_request(method, route, params, endpoint_parameters, json, data_type, user_auth)
+        self.response_cache.set(route, request_params, response)
+        return response
+
+    def request(self, method, route, params=None, json=None, user_auth=False):
+        endpoint = endpoint_for_route(route)
+        attempts = 0
+        while True:
+            self.scheduler.acquire(endpoint)
+            started = time.perf_counter()
+            try:
+                response = super().request(method, route, params=params, json=json, user_auth=user_auth)
+            except tweepy.TooManyRequests as e:
+                self._record_metrics(endpoint, started, e.response, error=True)
+                attempts += 1
+                self.scheduler.record_rate_limited(endpoint, e.reset_time)
+                if attempts > self.max_rate_limit_retries:
+                    raise
+                continue
+            except tweepy.HTTPException as e:
+                self._record_metrics(endpoint, started, e.response, error=True)
+                raise
+
+            self._record_metrics(endpoint, started, response)
+            self.scheduler.record_response(endpoint, response.headers)
+            return response
+
+    def _record_metrics(self, endpoint: str, started: float, response, error: bool = False) -> None:
+        if self.request_metrics is None:
+            return
+        # Content-Length is the transferred (possibly compressed) size when the server sends it
+        size = int(response.headers.get('content-length') or len(response.content or b''))
+        self.request_metrics.record(endpoint, time.perf_counter() - started, size, error)
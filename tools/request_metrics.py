@@ -0,0 +1,72 @@
+import threading
+from typing import Dict, Any, List
+
+import numpy as np
+
+
+class RequestMetrics:
+    """
+    Per-endpoint API call counts, latencies and bytes downloaded
+
+    Latencies cover the HTTP round trip only; time spent waiting on the
+    rate limiter is tracked by RateLimitScheduler.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latencies: Dict[str, List[float]] = {}
+            self.bytes_downloaded: Dict[str, int] = {}
+            self.errors: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float, size: int = 0, error: bool = False) -> None:
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            self.bytes_downloaded[endpoint] = self.bytes_downloaded.get(endpoint, 0) + size
+            if error:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Raw per-endpoint samples, picklable, for merge() in another process"""
+        with self._lock:
+            return {
+                'latencies': {endpoint: list(latencies) for endpoint, latencies in self.latencies.items()},
+                'bytes_downloaded': dict(self.bytes_downloaded),
+                'errors': dict(self.errors)
+            }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Add the samples of another RequestMetrics (e.g. a crawl worker's) to these"""
+        with self._lock:
+            for endpoint, latencies in snapshot['latencies'].items():
+                self.latencies.setdefault(endpoint, []).extend(latencies)
+            for endpoint, size in snapshot['bytes_downloaded'].items():
+                self.bytes_downloaded[endpoint] = self.bytes_downloaded.get(endpoint, 0) + size
+            for endpoint, errors in snapshot['errors'].items():
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + errors
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(len(latencies) for latencies in self.latencies.values())
+
+    def summary(self) -> Dict[str, Any]:
+        """Calls, errors, p50/p95 latency and bytes per endpoint, plus totals"""
+        with self._lock:
+            endpoints = {}
+            for endpoint, latencies in self.latencies.items():
+                p50, p95 = np.percentile(latencies, [50, 95])
+                endpoints[endpoint] = {
+                    'calls': len(latencies),
+                    'errors': self.errors.get(endpoint, 0),
+                    'p50_ms': round(float(p50) * 1000, 1),
+                    'p95_ms': round(float(p95) * 1000, 1),
+                    'bytes_downloaded': self.bytes_downloaded.get(endpoint, 0)
+                }
+        return {
+            'endpoints': endpoints,
+            'total_calls': sum(stats['calls'] for stats in endpoints.values()),
+            'total_bytes_downloaded': sum(stats['bytes_downloaded'] for stats in endpoints.values())
+        }
@@ -0,0 +1,268 @@
+import os
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
+
+from loguru import logger
+
+from .query_builder import build_query_shards, MAX_QUERY_LENGTH
+from .crawl_state import CrawlState
+from .filter_spec import FilterSpec
+from .request_metrics import RequestMetrics
+from .tweet_store import TweetStore
+from .twitter_client import TwitterSearchClient, AuthorPrefilter
+
+
+def bearer_token_pool() -> List[str]:
+    """Bearer tokens from TWITTER_BEARER_TOKENS (comma-separated), falling back to TWITTER_BEARER_TOKEN"""
+    tokens = [token.strip() for token in os.getenv('TWITTER_BEARER_TOKENS', '').split(',') if token.strip()]
+    if not tokens and os.getenv('TWITTER_BEARER_TOKEN'):
+        tokens = [os.getenv('TWITTER_BEARER_TOKEN')]
+    return tokens
+
+
+def _crawl_partition(
+    queries: List[str],
+    per_query_limit: int,
+    since_ids: Dict[str, str],
+    backlog: Dict[str, List[List[Optional[str]]]],
+    min_followers: Optional[int],
+    bearer_token: str,
+    quota_share: float,
+    store_path: str,
+    client_options: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Worker process: fetch a partition of the query shards and merge it into the shared store
+
+    Runs in a spawned process, so everything it needs arrives as arguments
+    and only a small summary travels back; the tweets, and the ids the
+    follower pre-filter dropped, go through SQLite.
+    """
+    client = TwitterSearchClient(bearer_token=bearer_token, quota_share=quota_share, **client_options)
+    prefilter = AuthorPrefilter(min_followers)
+    search_results = client.search_shards(queries, per_query_limit, since_ids, min_followers, backlog, prefilter)
+    if 'error' in search_results:
+        raise RuntimeError(search_results['error'])
+
+    crawl_state = CrawlState(store_path)
+    try:
+        tweets_added = crawl_state.merge_search_results(search_results['tweet_store'], search_results['users'])
+        crawl_state.merge_pruned(prefilter.author_ids, prefilter.tweet_ids)
+    finally:
+        crawl_state.close()
+
+    return {
+        'pid': os.getpid(),
+        'queries': len(queries),
+        'tweets_fetched': len(search_results['tweet_store']),
+        'tweets_added': tweets_added,
+        'prefilter': search_results['prefilter'],
+        'failed_queries': search_results['failed_queries'],
+        'newest_ids': search_results['newest_ids'],
+        'backlog': search_results['backlog'],
+        'rate_limit': search_results['rate_limit'],
+        'response_cache': search_results['response_cache'],
+        'api_requests': client.request_metrics.summary(),
+        'request_metrics': client.request_metrics.snapshot()
+    }
+
+
+def _merge_rate_limits(quotas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine the workers' RateLimitScheduler.quota() reports
+
+    Each worker's buckets hold its own share of a token's quota, so limits,
+    remaining quota, requests and waits all add up across workers.
+    """
+    endpoints: Dict[str, Dict[str, Any]] = {}
+    for quota in quotas:
+        for name, bucket in quota['endpoints'].items():
+            merged = endpoints.setdefault(name, {'limit': 0, 'remaining': 0, 'reset_at': None, 'requests_made': 0})
+            for key in ('limit', 'remaining', 'requests_made'):
+                merged[key] += bucket[key]
+            if bucket['reset_at'] is not None:
+                merged['reset_at'] = max(merged['reset_at'] or 0, bucket['reset_at'])
+    return {
+        'endpoints': endpoints,
+        'total_wait_seconds': round(sum(quota['total_wait_seconds'] for quota in quotas), 3),
+        'rate_limited_responses': sum(quota['rate_limited_responses'] for quota in quotas)
+    }
+
+
+def _merge_cache_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine the workers' ResponseCache.stats(); they share one cache file, so only lookups add up"""
+    stats = [worker_stats for worker_stats in stats if worker_stats]
+    if not stats:
+        return {}
+    hits = sum(worker_stats['hits'] for worker_stats in stats)
+    misses = sum(worker_stats['misses'] for worker_stats in stats)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        'entries': max(worker_stats['entries'] for worker_stats in stats),
+        'size_bytes': max(worker_stats['size_bytes'] for worker_stats in stats)
+    }
+
+
+class ShardedCrawler:
+    """
+    Crawl query shards across worker processes and a pool of bearer tokens
+
+    Query shards are dealt round-robin to `workers_per_token` processes per
+    token. Each worker runs the usual threaded search over its partition and
+    merges the results into one SQLite store, where tweets are de-duplicated
+    by tweet id and users by user id; the parent reads the merged result back
+    in the TwitterSearchClient.search layout. Workers sharing a token split
+    its rate limits evenly. Their API request samples, quotas and cache
+    lookups are merged into the results and `request_metrics`.
+    """
+
+    def __init__(
+        self,
+        bearer_tokens: List[str] = None,
+        store_dir: str = '.cache/shards',
+        workers_per_token: int = 1,
+        max_query_length: int = MAX_QUERY_LENGTH,
+        client_options: Dict[str, Any] = None,
+        request_metrics: Optional[RequestMetrics] = None
+    ):
+        """
+        Args:
+            bearer_tokens: API tokens to spread the workers over (default: bearer_token_pool())
+            store_dir: Directory for the per-run SQLite store the workers merge into
+            workers_per_token: Worker processes per token; each gets an equal share of its quota
+            max_query_length: Maximum length of a single search query
+            client_options: Extra TwitterSearchClient arguments for the workers (max_concurrency, cache_path, ...)
+            request_metrics: Metrics the workers' API requests are merged into (e.g. the parent client's)
+        """
+        self.bearer_tokens = bearer_tokens or bearer_token_pool()
+        if not self.bearer_tokens:
+            raise ValueError("No bearer tokens found in TWITTER_BEARER_TOKENS or TWITTER_BEARER_TOKEN")
+        self.store_dir = store_dir
+        self.workers_per_token = max(1, workers_per_token)
+        self.max_query_length = max_query_length
+        self.client_options = client_options or {}
+        self.request_metrics = request_metrics or RequestMetrics()
+
+    @property
+    def workers(self) -> int:
+        return len(self.bearer_tokens) * self.workers_per_token
+
+    def search(
+        self,
+        keywords: str,
+        max_results: int = 100,
+        since_ids: Optional[Dict[str, str]] = None,
+        min_followers: Optional[int] = None,
+        backlog: Optional[Dict[str, List[List[Optional[str]]]]] = None,
+        filter_spec: Optional[FilterSpec] = None
+    ) -> Dict[str, Any]:
+        """
+        Search for users posting about financial markets, sharded across processes
+
+        Takes the same arguments and returns the same layout as
+        TwitterSearchClient.search, plus a per-worker summary under 'workers'.
+        """
+        try:
+            queries = build_query_shards(keywords, self.max_query_length, filter_spec)
+            if not queries:
+                raise ValueError("No usable keywords to search for")
+            per_query_limit = -(-max_results // len(queries))
+            since_ids = since_ids or {}
+            backlog = backlog or {}
+
+            workers = min(self.workers, len(queries))
+            partitions = [queries[index::workers] for index in range(workers)]
+            store_path = os.path.join(self.store_dir, f'crawl-{uuid.uuid4().hex}.sqlite')
+            logger.info(
+                f"Crawling {len(queries)} query shards with {workers} worker processes "
+                f"over {len(self.bearer_tokens)} bearer tokens"
+            )
+
+            # Create the schema once so workers don't race on CREATE TABLE
+            CrawlState(store_path).close()
+            try:
+                summaries = []
+                failed_queries = []
+                # Spawn, not fork: the parent holds threads, locks and an open HTTP pool
+                context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                    futures = {
+                        executor.submit(
+                            _crawl_partition,
+                            partition,
+                            per_query_limit,
+                            {query: since_ids[query] for query in partition if query in since_ids},
+                            {query: backlog[query] for query in partition if query in backlog},
+                            min_followers,
+                            self.bearer_tokens[index % len(self.bearer_tokens)],
+                            1.0 / self.workers_per_token,
+                            store_path,
+                            self.client_options
+                        ): partition
+                        for index, partition in enumerate(partitions)
+                    }
+                    for future in as_completed(futures):
+                        try:
+                            summary = future.result()
+                        except Exception as e:
+                            logger.warning(f"Crawl worker failed: {e}")
+                            failed_queries.extend(futures[future])
+                            continue
+                        summaries.append(summary)
+                        failed_queries.extend(summary['failed_queries'])
+                        self.request_metrics.merge(summary['request_metrics'])
+
+                if not summaries:
+                    raise RuntimeError("All crawl workers failed")
+
+                crawl_state = CrawlState(store_path)
+                try:
+                    tweet_store, users = crawl_state.load_search_results()
+                    # Partitions can turn up the same authors and tweets; the store counts each id once
+                    pruned_authors, pruned_tweets = crawl_state.pruned_counts()
+                finally:
+                    crawl_state.close()
+            finally:
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(store_path + suffix):
+                        os.remove(store_path + suffix)
+
+            # Each query belongs to exactly one partition
+            newest_ids = {}
+            remaining_backlog = {}
+            for summary in summaries:
+                newest_ids.update(summary['newest_ids'])
+                remaining_backlog.update(summary['backlog'])
+
+            return {
+                'tweet_store': tweet_store,
+                'users': users,
+                'total_users_found': len(users) + pruned_authors,
+                'total_tweets_found': len(tweet_store) + pruned_tweets,
+                'prefilter': {
+                    'min_followers': min_followers,
+                    'pruned_authors': pruned_authors,
+                    'pruned_tweets': pruned_tweets
+                },
+                'search_queries': queries,
+                'failed_queries': failed_queries,
+                'newest_ids': newest_ids,
+                'backlog': remaining_backlog,
+                'rate_limit': _merge_rate_limits([summary['rate_limit'] for summary in summaries]),
+                'response_cache': _merge_cache_stats([summary['response_cache'] for summary in summaries]),
+                'workers': [
+                    {
+                        key: summary[key]
+                        for key in ('pid', 'queries', 'tweets_fetched', 'tweets_added', 'prefilter', 'rate_limit', 'api_requests')
+                    }
+                    for summary in summaries
+                ]
+            }
+
+        except Exception as e:
+            logger.error(f"Error in sharded crawl: {e}")
+            return {'error': str(e), 'tweet_store': TweetStore(), 'users': {}, 'total_users_found': 0}
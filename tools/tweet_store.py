@@ -0,0 +1,223 @@
+import bisect
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable, List, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .filter_engine import to_utc
+
+METRIC_COLUMNS = ('retweet_count', 'reply_count', 'like_count', 'quote_count')
+
+# IdIndex holds ids added since its last merge in a set until it reaches this size,
+# or 1/16 of the merged ids if that is larger
+_MIN_RECENT_IDS = 65536
+
+# Rough size of one int object in a set, including its slot in the hash table
+_SET_ENTRY_BYTES = 64
+
+
+class IdIndex:
+    """
+    Set of int64 ids held as a sorted array plus a small set of recent additions
+
+    Costs about 8 bytes per id instead of the ~64 of a Python set, at the
+    price of a bisect per lookup; the recent set is merged into the array in
+    one linear pass whenever it reaches _MIN_RECENT_IDS or 1/16 of the array.
+    """
+
+    __slots__ = ('_sorted_ids', '_recent_ids')
+
+    def __init__(self, sorted_ids: Optional[array] = None):
+        """
+        Args:
+            sorted_ids: Unique ids in ascending order, as an array('q'), to start from
+        """
+        self._sorted_ids = sorted_ids if sorted_ids is not None else array('q')
+        self._recent_ids = set()
+
+    def __len__(self) -> int:
+        return len(self._sorted_ids) + len(self._recent_ids)
+
+    def __contains__(self, item_id) -> bool:
+        item_id = int(item_id)
+        if item_id in self._recent_ids:
+            return True
+        # bisect over the array beats np.searchsorted's per-call overhead for single ids
+        index = bisect.bisect_left(self._sorted_ids, item_id)
+        return index < len(self._sorted_ids) and self._sorted_ids[index] == item_id
+
+    def __iter__(self) -> Iterator[int]:
+        yield from self._sorted_ids
+        yield from self._recent_ids
+
+    def add(self, item_id) -> bool:
+        """Add an id. Returns True if it was not in the index yet."""
+        item_id = int(item_id)
+        if item_id in self:
+            return False
+        self._recent_ids.add(item_id)
+        if len(self._recent_ids) >= max(_MIN_RECENT_IDS, len(self._sorted_ids) // 16):
+            self._merge_recent_ids()
+        return True
+
+    def count_in(self, item_ids: Iterable[int]) -> int:
+        """How many of `item_ids` are in the index"""
+        if not len(self):
+            return 0
+        return sum(1 for item_id in item_ids if item_id in self)
+
+    def _merge_recent_ids(self) -> None:
+        recent = np.fromiter(self._recent_ids, dtype=np.int64, count=len(self._recent_ids))
+        merged = np.concatenate([np.frombuffer(self._sorted_ids, dtype=np.int64), np.sort(recent)])
+        # Both runs are sorted, so the stable sort is a linear merge
+        self._sorted_ids = array('q', np.sort(merged, kind='stable').tobytes())
+        self._recent_ids = set()
+
+    def memory_bytes(self) -> int:
+        return self._sorted_ids.itemsize * len(self._sorted_ids) + len(self._recent_ids) * _SET_ENTRY_BYTES
+
+
+class TweetStore:
+    """
+    Compact columnar storage for tweets
+
+    Ids and epoch timestamps are int64 columns, public metrics are int32
+    columns and tweet text lives in a separate string table, so a tweet
+    costs a few dozen bytes plus its text instead of a nested dict.
+    Columns are exposed to NumPy without copying via `column()`.
+
+    Duplicate ids are detected against an IdIndex rather than a set of
+    every id, which would outweigh the columns themselves.
+    """
+
+    __slots__ = ('tweet_ids', 'author_ids', 'created_at', 'metrics', 'texts', '_ids')
+
+    def __init__(self):
+        self.tweet_ids = array('q')
+        self.author_ids = array('q')
+        self.created_at = array('q')
+        self.metrics = {name: array('i') for name in METRIC_COLUMNS}
+        self.texts: List[str] = []
+        self._ids = IdIndex()
+
+    def __len__(self) -> int:
+        return len(self.tweet_ids)
+
+    def __repr__(self) -> str:
+        return f"TweetStore({len(self)} tweets, {len(set(self.author_ids))} authors)"
+
+    def __contains__(self, tweet_id) -> bool:
+        return tweet_id in self._ids
+
+    @classmethod
+    def from_columns(cls, tweet_ids, author_ids, created_at, texts: List[str],
+                     metrics: Dict[str, Any] = None) -> 'TweetStore':
+        """
+        Build a store from parallel columns in one vectorized pass
+
+        Rows repeating an earlier tweet id are dropped, as append() would.
+        Integer columns are copied straight into the store's buffers.
+        """
+        tweet_ids = np.asarray(tweet_ids, dtype=np.int64)
+        unique_ids, first_rows = np.unique(tweet_ids, return_index=True)
+        keep = np.sort(first_rows)
+
+        store = cls()
+        store.tweet_ids.frombytes(tweet_ids[keep].tobytes())
+        store.author_ids.frombytes(np.asarray(author_ids, dtype=np.int64)[keep].tobytes())
+        store.created_at.frombytes(np.asarray(created_at, dtype=np.int64)[keep].tobytes())
+        metrics = metrics or {}
+        for name in METRIC_COLUMNS:
+            values = metrics.get(name)
+            column = np.zeros(len(keep), dtype=np.int32) if values is None else np.asarray(values, dtype=np.int32)[keep]
+            store.metrics[name].frombytes(column.tobytes())
+        store.texts = [texts[row] for row in keep.tolist()]
+        store._ids = IdIndex(array('q', unique_ids.tobytes()))
+        return store
+
+    def append(self, tweet_id, author_id, created_at, text: str, public_metrics: Dict[str, int] = None) -> bool:
+        """Add a tweet, skipping ids already stored. Returns True if the tweet was new."""
+        tweet_id = int(tweet_id)
+        if not self._ids.add(tweet_id):
+            return False
+
+        if not isinstance(created_at, (int, float)):
+            created_at = to_utc(created_at).timestamp()
+
+        public_metrics = public_metrics or {}
+        self.tweet_ids.append(tweet_id)
+        self.author_ids.append(int(author_id))
+        self.created_at.append(int(created_at))
+        for name in METRIC_COLUMNS:
+            self.metrics[name].append(public_metrics.get(name, 0))
+        self.texts.append(text)
+        return True
+
+    def append_tweet(self, tweet: Dict[str, Any]) -> bool:
+        """Add a raw tweet object from the API"""
+        return self.append(
+            tweet['id'], tweet['author_id'], tweet['created_at'],
+            tweet['text'], tweet.get('public_metrics')
+        )
+
+    def extend(self, other: 'TweetStore') -> int:
+        """Merge another store into this one, de-duplicating by tweet id. Returns tweets added."""
+        added = 0
+        for row in range(len(other)):
+            added += self.append(
+                other.tweet_ids[row], other.author_ids[row], other.created_at[row],
+                other.texts[row], {name: other.metrics[name][row] for name in METRIC_COLUMNS}
+            )
+        return added
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Zero-copy NumPy view of a column ('tweet_ids', 'author_ids', 'created_at' or a metric)
+
+        The store can't grow while a view is alive, so don't hold views across appends.
+        """
+        values = self.metrics[name] if name in self.metrics else getattr(self, name)
+        dtype = np.int32 if values.typecode == 'i' else np.int64
+        if not len(values):
+            return np.empty(0, dtype=dtype)
+        return np.frombuffer(values, dtype=dtype)
+
+    def author_counts(self, since: float = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Unique author ids and their tweet counts, optionally only for tweets at or after `since` (epoch seconds)"""
+        author_ids = self.column('author_ids')
+        if since is not None:
+            author_ids = author_ids[self.column('created_at') >= since]
+        return np.unique(author_ids, return_counts=True)
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Iterate tweets as record dicts"""
+        for row in range(len(self)):
+            yield self.record(row)
+
+    def record(self, row: int) -> Dict[str, Any]:
+        return {
+            'id': self.tweet_ids[row],
+            'author_id': self.author_ids[row],
+            'created_at': datetime.fromtimestamp(self.created_at[row], tz=timezone.utc),
+            'text': self.texts[row],
+            'public_metrics': {name: self.metrics[name][row] for name in METRIC_COLUMNS}
+        }
+
+    def to_users_data(self, users: Dict[int, Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """Expand into the nested {author_id: {'tweets': [...], 'user_info': {...}}} layout"""
+        users_data: Dict[int, Dict[str, Any]] = {}
+        for record in self.rows():
+            author_id = record.pop('author_id')
+            data = users_data.setdefault(author_id, {'tweets': [], 'user_info': users.get(author_id)})
+            data['tweets'].append(record)
+        return users_data
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the columns, the text table and the duplicate-id index"""
+        columns = [self.tweet_ids, self.author_ids, self.created_at, *self.metrics.values()]
+        return (
+            sum(column.itemsize * len(column) for column in columns)
+            + sum(len(text.encode('utf-8')) for text in self.texts)
+            + self._ids.memory_bytes()
+        )
@@ -0,0 +1,484 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterator, Tuple, Optional
+
+import requests
+import tweepy
+from loguru import logger
+
+from .query_builder import build_query_shards, MAX_QUERY_LENGTH
+from .http_session import shared_session
+from .rate_limiter import RateLimitScheduler, ScheduledClient
+from .request_metrics import RequestMetrics
+from .response_cache import ResponseCache
+from .profile_cache import UserProfileCache, merge_profile
+from .filter_spec import FilterSpec
+from .tweet_store import TweetStore, IdIndex
+
+TWEET_FIELDS = ['author_id', 'created_at', 'public_metrics', 'lang']
+USER_FIELDS = ['username', 'name', 'public_metrics', 'verified']
+USER_LOOKUP_BATCH_SIZE = 100
+
+
+class ShardCursor:
+    """
+    Progress of one query shard over one tweet id range during a search
+
+    A query's main range runs from its checkpoint (since_id) to the newest
+    tweet; backlog ranges are gaps earlier runs left behind, bounded above by
+    until_id. Pages arrive newest first, so a range cut off by the per-query
+    limit leaves (since_id, oldest fetched id) unfetched.
+    """
+
+    __slots__ = ('query', 'since_id', 'until_id', 'fetched', 'newest_id', 'oldest_id', 'failed')
+
+    def __init__(self, query: str, since_id: Optional[str] = None, until_id: Optional[str] = None):
+        self.query = query
+        self.since_id = since_id
+        self.until_id = until_id
+        self.fetched = 0
+        self.newest_id: Optional[int] = None
+        self.oldest_id: Optional[int] = None
+        self.failed = False
+
+    def observe(self, tweets: List[Dict[str, Any]]) -> None:
+        """Account for a page of tweets fetched for this range"""
+        for tweet in tweets:
+            tweet_id = int(tweet['id'])
+            if self.newest_id is None or tweet_id > self.newest_id:
+                self.newest_id = tweet_id
+            if self.oldest_id is None or tweet_id < self.oldest_id:
+                self.oldest_id = tweet_id
+        self.fetched += len(tweets)
+
+
+def plan_shard_cursors(
+    queries: List[str],
+    since_ids: Optional[Dict[str, str]] = None,
+    backlog: Optional[Dict[str, List[List[Optional[str]]]]] = None
+) -> List[ShardCursor]:
+    """One cursor per query for tweets newer than its checkpoint, plus one per backlog gap"""
+    since_ids = since_ids or {}
+    backlog = backlog or {}
+    cursors = [ShardCursor(query, since_ids.get(query)) for query in queries]
+    for query in queries:
+        cursors.extend(ShardCursor(query, since_id, until_id) for since_id, until_id in backlog.get(query, []))
+    return cursors
+
+
+def checkpoint_updates(
+    cursors: List[ShardCursor],
+    limit: int
+) -> Tuple[Dict[str, str], Dict[str, List[List[Optional[str]]]]]:
+    """
+    New checkpoints and backlog gaps after a search
+
+    A query's checkpoint moves to the newest tweet of its main range, unless
+    that range failed and has to be fetched again. Ranges that hit `limit`
+    before running out of pages leave a gap below their oldest tweet; failed
+    backlog ranges are kept as they were.
+
+    Returns:
+        (newest id per query, remaining [since_id, until_id] gaps per query)
+    """
+    newest_ids: Dict[str, str] = {}
+    backlog: Dict[str, List[List[Optional[str]]]] = {}
+    for cursor in cursors:
+        gaps = backlog.setdefault(cursor.query, [])
+        if cursor.failed:
+            if cursor.until_id is not None:
+                gaps.append([cursor.since_id, cursor.until_id])
+            continue
+        if cursor.until_id is None and cursor.newest_id is not None:
+            newest_ids[cursor.query] = str(cursor.newest_id)
+        if cursor.fetched >= limit and cursor.oldest_id is not None:
+            gaps.append([cursor.since_id, str(cursor.oldest_id)])
+    return newest_ids, backlog
+
+
+class AuthorPrefilter:
+    """
+    Follower threshold applied to search pages as they arrive
+
+    Tweets by authors below min_followers are dropped before they reach the
+    TweetStore. Only the ids of pruned authors and tweets are kept, in
+    IdIndexes, so one turned up by several shards is counted once without a
+    Python set of every id.
+    """
+
+    def __init__(self, min_followers: Optional[int] = None):
+        self.min_followers = min_followers
+        self.author_ids = IdIndex()
+        self.tweet_ids = IdIndex()
+
+    def filter_page(
+        self,
+        tweets: List[Dict[str, Any]],
+        users: Dict[int, Dict[str, Any]],
+        user_index: Dict[int, Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Add the page's qualifying authors to `user_index` and return the tweets worth keeping
+
+        An author seen above the threshold on any page is kept.
+        """
+        for user_id, info in users.items():
+            if self.min_followers is not None and info['followers_count'] < self.min_followers:
+                self.author_ids.add(user_id)
+            else:
+                user_index[user_id] = info
+
+        kept = []
+        for tweet in tweets:
+            author_id = int(tweet['author_id'])
+            if author_id not in user_index and author_id in self.author_ids:
+                self.tweet_ids.add(tweet['id'])
+            else:
+                kept.append(tweet)
+        return kept
+
+    def counts(self, tweet_store: TweetStore, user_index: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+        """The 'prefilter' statistics, leaving out authors and tweets that were kept after all"""
+        return {
+            'min_followers': self.min_followers,
+            'pruned_authors': len(self.author_ids) - self.author_ids.count_in(user_index),
+            'pruned_tweets': len(self.tweet_ids) - self.tweet_ids.count_in(tweet_store.tweet_ids)
+        }
+
+
+class TwitterSearchClient:
+    """
+    Twitter API access used by the flow: sharded search, user lookups and timeline backfill
+
+    Independent of CrewAI, so the direct (no-LLM) path never imports it;
+    TwitterSearchTool wraps an instance for the agents.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_query_length: int = MAX_QUERY_LENGTH,
+        cache_path: Optional[str] = None,
+        cache_ttl_seconds: int = 900,
+        session: Optional[requests.Session] = None,
+        bearer_token: Optional[str] = None,
+        quota_share: float = 1.0,
+        profile_cache_path: Optional[str] = None,
+        profile_ttl_seconds: int = 86400
+    ):
+        """
+        Args:
+            max_concurrency: Maximum number of query shards fetched in parallel
+            max_query_length: Maximum length of a single search query
+            cache_path: SQLite file for the API response cache (disabled if unset)
+            cache_ttl_seconds: Time-to-live of cached API responses
+            session: HTTP session to send requests through (default: the process-wide pooled session)
+            bearer_token: API token to authenticate with (default: TWITTER_BEARER_TOKEN)
+            quota_share: Fraction of the token's rate limits this client may use
+            profile_cache_path: SQLite file for the persistent user profile index (disabled if unset)
+            profile_ttl_seconds: Age after which a cached profile is looked up again
+        """
+        self.max_concurrency = max_concurrency
+        self.max_query_length = max_query_length
+        self.cache_path = cache_path
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.session = session
+        self.bearer_token = bearer_token
+        self.quota_share = quota_share
+        self.profile_cache_path = profile_cache_path
+        self.profile_ttl_seconds = profile_ttl_seconds
+        self.setup_twitter_api()
+    
+    def setup_twitter_api(self):
+        """Initialize Twitter API client"""
+        try:
+            bearer_token = self.bearer_token or os.getenv('TWITTER_BEARER_TOKEN')
+            if not bearer_token:
+                raise ValueError("TWITTER_BEARER_TOKEN not found in environment variables")
+            
+            self.rate_limiter = RateLimitScheduler(quota_share=self.quota_share)
+            self.request_metrics = RequestMetrics()
+            self.response_cache = (
+                ResponseCache(self.cache_path, ttl_seconds=self.cache_ttl_seconds)
+                if self.cache_path else None
+            )
+            self.profile_cache = (
+                UserProfileCache(self.profile_cache_path, ttl_seconds=self.profile_ttl_seconds)
+                if self.profile_cache_path else None
+            )
+            self.client = ScheduledClient(
+                bearer_token=bearer_token,
+                return_type=dict,
+                scheduler=self.rate_limiter,
+                response_cache=self.response_cache,
+                request_metrics=self.request_metrics,
+                session=self.session or shared_session()
+            )
+            logger.info("Twitter API client initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize Twitter API: {e}")
+            raise
+    
+    @staticmethod
+    def _user_info(user: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a user expansion object into the user_info record"""
+        return {
+            'user_id': int(user['id']),
+            'username': user['username'],
+            'name': user['name'],
+            'followers_count': user['public_metrics']['followers_count'],
+            'verified': user.get('verified', False),
+            'profile_url': f"https://twitter.com/{user['username']}"
+        }
+    
+    def _iter_pages(self, query: str, limit: int, since_id: Optional[str] = None,
+                    until_id: Optional[str] = None) -> Iterator[Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]]:
+        """
+        Stream a query shard one response page at a time, newest tweets first
+        
+        Yields (tweet records, {user_id: user_info}) for each page, so user
+        expansions are never lost and only one page is held per shard.
+        """
+        fetched = 0
+        for page in tweepy.Paginator(
+            self.client.search_recent_tweets,
+            query=query,
+            since_id=since_id,
+            until_id=until_id,
+            tweet_fields=TWEET_FIELDS,
+            user_fields=USER_FIELDS,
+            expansions=['author_id'],
+            max_results=min(100, max(10, limit))
+        ):
+            tweets = page.get('data', [])[:limit - fetched]
+            users = {
+                int(user['id']): self._user_info(user)
+                for user in page.get('includes', {}).get('users', [])
+            }
+            # Profiles carry no language; tag each author with the language of their newest tweet on the page
+            for tweet in reversed(tweets):
+                if 'lang' in tweet and int(tweet['author_id']) in users:
+                    users[int(tweet['author_id'])]['lang'] = tweet['lang']
+            yield tweets, users
+            
+            fetched += len(tweets)
+            if fetched >= limit:
+                break
+    
+    def search(
+        self,
+        keywords: str,
+        max_results: int = 100,
+        since_ids: Optional[Dict[str, str]] = None,
+        min_followers: Optional[int] = None,
+        backlog: Optional[Dict[str, List[List[Optional[str]]]]] = None,
+        filter_spec: Optional[FilterSpec] = None
+    ) -> Dict[str, Any]:
+        """
+        Search for users posting about financial markets
+        
+        Args:
+            keywords: Space-separated keywords to search for
+            max_results: Maximum number of results to return (split across query shards)
+            since_ids: Per-query checkpoints; only tweets newer than these ids are fetched
+            min_followers: Drop tweets from authors below this follower count as pages arrive
+            backlog: Per-query [since_id, until_id] gaps earlier runs left unfetched
+            filter_spec: Criteria whose languages the queries are limited to (default: any language)
+        """
+        # Split keywords into OR-queries that respect the query length limit
+        queries = build_query_shards(keywords, self.max_query_length, filter_spec)
+        per_query_limit = -(-max_results // max(1, len(queries)))
+        return self.search_shards(queries, per_query_limit, since_ids, min_followers, backlog)
+    
+    def search_shards(
+        self,
+        queries: List[str],
+        per_query_limit: int,
+        since_ids: Optional[Dict[str, str]] = None,
+        min_followers: Optional[int] = None,
+        backlog: Optional[Dict[str, List[List[Optional[str]]]]] = None,
+        prefilter: Optional[AuthorPrefilter] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch already built query shards concurrently and merge their pages
+        
+        Args:
+            queries: Search queries from build_query_shards
+            per_query_limit: Maximum tweets fetched per query and id range
+            since_ids: Per-query checkpoints; only tweets newer than these ids are fetched
+            min_followers: Drop tweets from authors below this follower count as pages arrive
+            backlog: Per-query [since_id, until_id] gaps earlier runs left unfetched
+            prefilter: AuthorPrefilter to apply min_followers with, for callers that
+                need the pruned ids afterwards (default: a new one)
+        """
+        try:
+            if not queries:
+                raise ValueError("No usable keywords to search for")
+            
+            cursors = plan_shard_cursors(queries, since_ids, backlog)
+            requests_needed = len(cursors) * -(-per_query_limit // 100)
+            eta = self.rate_limiter.estimate_time_to_complete('search_recent_tweets', requests_needed)
+            logger.info(
+                f"Searching {len(queries)} query shards and {len(cursors) - len(queries)} backlog gaps "
+                f"(~{requests_needed} requests, est. {eta:.0f}s rate-limit wait)"
+            )
+            
+            tweet_store = TweetStore()
+            user_index = {}
+            prefilter = prefilter or AuthorPrefilter(min_followers)
+            lock = threading.Lock()
+            
+            def consume(cursor: ShardCursor) -> None:
+                # Merge each page as it arrives, de-duplicating by tweet id
+                for tweets, users in self._iter_pages(cursor.query, per_query_limit, cursor.since_id, cursor.until_id):
+                    cursor.observe(tweets)
+                    with lock:
+                        # Authors below the follower threshold can never qualify; keep only the ids
+                        for tweet in prefilter.filter_page(tweets, users, user_index):
+                            tweet_store.append_tweet(tweet)
+            
+            # Fetch shards concurrently
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(cursors))) as executor:
+                futures = {executor.submit(consume, cursor): cursor for cursor in cursors}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.warning(f"Query shard failed: {e}")
+                        futures[future].failed = True
+            
+            failed_queries = sorted({cursor.query for cursor in cursors if cursor.failed})
+            if all(cursor.failed for cursor in cursors):
+                raise RuntimeError("All search query shards failed")
+            newest_ids, remaining_backlog = checkpoint_updates(cursors, per_query_limit)
+            
+            if self.profile_cache:
+                self.profile_cache.record(user_index)
+            
+            author_ids = set(tweet_store.author_ids)
+            pruned = prefilter.counts(tweet_store, user_index)
+            
+            return {
+                'tweet_store': tweet_store,
+                'users': {user_id: info for user_id, info in user_index.items() if user_id in author_ids},
+                'total_users_found': len(author_ids) + pruned['pruned_authors'],
+                'total_tweets_found': len(tweet_store) + pruned['pruned_tweets'],
+                'prefilter': pruned,
+                'search_queries': queries,
+                'failed_queries': failed_queries,
+                'newest_ids': newest_ids,
+                'backlog': remaining_backlog,
+                'rate_limit': self.rate_limiter.quota(),
+                'response_cache': self.response_cache.stats() if self.response_cache else {}
+            }
+            
+        except Exception as e:
+            logger.error(f"Error searching Twitter: {e}")
+            return {'error': str(e), 'tweet_store': TweetStore(), 'users': {}, 'total_users_found': 0}
+    
+    def lookup_users(self, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Fetch current profiles for user ids, 100 per get_users call"""
+        profiles = {}
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), USER_LOOKUP_BATCH_SIZE):
+            batch = user_ids[start:start + USER_LOOKUP_BATCH_SIZE]
+            response = self.client.get_users(ids=batch, user_fields=USER_FIELDS)
+            for user in response.get('data', []):
+                profiles[int(user['id'])] = self._user_info(user)
+        return profiles
+    
+    def refresh_profiles(self, users: Dict[int, Dict[str, Any]], min_followers: Optional[int] = None) -> Dict[str, int]:
+        """
+        Bring follower counts in `users` up to date in place
+        
+        With a profile cache only stale profiles, or those near `min_followers`,
+        are looked up; without one every user is. Known languages are kept.
+        """
+        if self.profile_cache:
+            return self.profile_cache.refresh(users, self.lookup_users, min_followers)
+        fresh = self.lookup_users(users)
+        for user_id, info in fresh.items():
+            users[user_id] = merge_profile(users.get(user_id), info)
+        return {'cached': 0, 'refreshed': len(fresh)}
+    
+    def _iter_timeline(self, user_id: int, start_time: datetime) -> Iterator[Dict[str, Any]]:
+        """Yield a user's own tweets since start_time, newest first"""
+        for page in tweepy.Paginator(
+            self.client.get_users_tweets,
+            id=user_id,
+            start_time=start_time,
+            exclude=['retweets'],
+            tweet_fields=TWEET_FIELDS,
+            max_results=100
+        ):
+            yield from page.get('data', [])
+    
+    def backfill_timelines(
+        self,
+        tweet_store: TweetStore,
+        users: Dict[int, Dict[str, Any]],
+        min_followers: int,
+        window_days: int = 14
+    ) -> Dict[str, Any]:
+        """
+        Measure real activity for authors that pass the follower threshold
+        
+        Refreshes candidate follower counts with batched user lookups, then
+        pages through each remaining candidate's timeline for the activity
+        window and adds those tweets to `tweet_store`. Authors below the
+        threshold never cost a timeline request.
+        
+        Args:
+            tweet_store: Store the timeline tweets are merged into
+            users: Author id -> user_info; refreshed in place
+            min_followers: Follower threshold candidates must pass
+            window_days: Length of the activity window to backfill
+        """
+        candidates = [
+            user_id for user_id, info in users.items()
+            if info and info['followers_count'] >= min_followers
+        ]
+        summary = {'candidates': 0, 'timelines_fetched': 0, 'failed_users': [], 'tweets_added': 0, 'profiles_refreshed': 0}
+        if not candidates:
+            return summary
+        
+        # Follower counts in search expansions can be stale; re-check before spending timeline calls
+        candidate_profiles = {user_id: users[user_id] for user_id in candidates}
+        summary['profiles_refreshed'] = self.refresh_profiles(candidate_profiles, min_followers)['refreshed']
+        users.update(candidate_profiles)
+        candidates = [user_id for user_id in candidates if users[user_id]['followers_count'] >= min_followers]
+        if not candidates:
+            return summary
+        
+        # Hour-aligned start keeps timeline requests cacheable across close reruns
+        start_time = (datetime.now(timezone.utc) - timedelta(days=window_days)).replace(minute=0, second=0, microsecond=0)
+        lock = threading.Lock()
+        tweets_added = 0
+        failed_users = []
+        
+        def backfill(user_id: int) -> None:
+            nonlocal tweets_added
+            for tweet in self._iter_timeline(user_id, start_time):
+                tweet.setdefault('author_id', str(user_id))
+                with lock:
+                    tweets_added += tweet_store.append_tweet(tweet)
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(candidates))) as executor:
+            futures = {executor.submit(backfill, user_id): user_id for user_id in candidates}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.warning(f"Timeline backfill failed for user {futures[future]}: {e}")
+                    failed_users.append(futures[future])
+        
+        logger.info(f"Backfilled {len(candidates)} timelines with {tweets_added} additional tweets")
+        summary.update(
+            candidates=len(candidates),
+            timelines_fetched=len(candidates) - len(failed_users),
+            failed_users=failed_users,
+            tweets_added=tweets_added
+        )
+        return summary